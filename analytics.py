@@ -0,0 +1,299 @@
+"""
+Analytics aggregates for the dashboard
+Per student (and classroom), per classroom and per assessment totals live in
+the analytics_* tables (migration 7): submission count, score sum and sum of
+squares (mean and spread without rereading scores), last submission time,
+plus members/submitters per classroom for participation. They are updated
+in the transaction that scores a submission (grading.grade_submission and
+regrades), so the dashboard never touches the submissions table.
+
+  python -m app.analytics rebuild   # backfill / reset from the raw tables
+  python -m app.analytics check     # compare against a full recompute
+"""
+import argparse
+import json
+import math
+import numbers
+import sys
+from flask import Blueprint, abort, jsonify
+from flask_login import current_user, login_required
+from .db import get_db
+from .roles import role_required
+
+analytics_bp = Blueprint("analytics_api", __name__)
+
+TOTALS = ("submissions", "score_sum", "score_sq_sum", "last_submitted_at")
+COUNTERS = ("members", "submitters", "submissions", "score_sum", "score_sq_sum")
+
+_SCORED = """SELECT s.user_id, s.score, s.submitted_at, a.id AS assignment_id, a.classroom_id
+    FROM submissions s JOIN assignments a ON a.id = s.assignment_id WHERE s.score IS NOT NULL"""
+
+# table -> (key columns, columns, full recompute from the raw tables)
+RECOMPUTE = {
+    "analytics_student": (
+        ("user_id", "classroom_id"), ("user_id", "classroom_id") + TOTALS,
+        f"""SELECT user_id, classroom_id, COUNT(*), SUM(score), SUM(score * score), MAX(submitted_at)
+            FROM ({_SCORED}) x GROUP BY user_id, classroom_id"""),
+    "analytics_assessment": (
+        ("assignment_id",), ("assignment_id", "classroom_id") + TOTALS,
+        """SELECT a.id, a.classroom_id, COUNT(s.id), COALESCE(SUM(s.score), 0), COALESCE(SUM(s.score * s.score), 0),
+                  MAX(s.submitted_at)
+            FROM assignments a LEFT JOIN submissions s ON s.assignment_id = a.id AND s.score IS NOT NULL
+            GROUP BY a.id, a.classroom_id"""),
+    "analytics_classroom": (
+        ("classroom_id",), ("classroom_id", "members", "submitters") + TOTALS,
+        f"""SELECT k.classroom_id, COALESCE(m.members, 0), COALESCE(x.submitters, 0), COALESCE(x.submissions, 0),
+                  COALESCE(x.score_sum, 0), COALESCE(x.score_sq_sum, 0), x.last_submitted_at
+            FROM (SELECT id AS classroom_id FROM classrooms UNION SELECT classroom_id FROM assignments) k
+            LEFT JOIN (SELECT classroom_id, COUNT(*) AS members FROM classroom_members GROUP BY classroom_id) m
+                ON m.classroom_id = k.classroom_id
+            LEFT JOIN (SELECT classroom_id, COUNT(DISTINCT user_id) AS submitters, COUNT(*) AS submissions,
+                              SUM(score) AS score_sum, SUM(score * score) AS score_sq_sum,
+                              MAX(submitted_at) AS last_submitted_at
+                       FROM ({_SCORED}) y GROUP BY classroom_id) x
+                ON x.classroom_id = k.classroom_id"""),
+}
+
+
+def _is_sqlite(conn):
+    return hasattr(conn, "executescript")
+
+
+def _sql(conn, sql):
+    return sql if _is_sqlite(conn) else sql.replace("?", "%s")
+
+
+def _rows(conn, sql, params=()):
+    cur = conn.cursor()
+    cur.execute(_sql(conn, sql), params)
+    columns = [c[0] for c in cur.description]
+    rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+    cur.close()
+    return rows
+
+
+def _ts(value):
+    # datetime (MySQL, PARSE_DECLTYPES) or TEXT (SQLite) -> "YYYY-MM-DD HH:MM:SS"
+    return None if value is None else str(value)[:19]
+
+
+def _later(a, b):
+    return b if a is None or (b is not None and b > a) else a
+
+
+def _delta(changes):
+    """Sum (user_id, old score or None, new score, submitted_at) changes per student"""
+    students = {}
+    for user_id, old, new, submitted_at in changes:
+        d = students.setdefault(user_id, [0, 0.0, 0.0, None])
+        old = None if old is None else float(old)
+        new = float(new)
+        d[0] += old is None  # first score counts as a new submission
+        d[1] += new - (old or 0.0)
+        d[2] += new * new - (old or 0.0) ** 2
+        d[3] = _later(d[3], _ts(submitted_at))
+    return students
+
+
+_UPDATE = """UPDATE {table} SET submissions = submissions + ?, score_sum = score_sum + ?,
+    score_sq_sum = score_sq_sum + ?{extra},
+    last_submitted_at = CASE WHEN last_submitted_at IS NULL OR last_submitted_at < ? THEN ? ELSE last_submitted_at END
+    WHERE {where}"""
+
+
+def apply_scores(conn, assignment_id, changes):
+    """Fold scored submissions of one assignment into the aggregates
+
+    changes are (user_id, previous score or None, new score, submitted_at).
+    Runs in the caller's transaction; the caller commits.
+    """
+    students = _delta(changes)
+    if not students:
+        return
+    row = _rows(conn, "SELECT classroom_id FROM assignments WHERE id = ?", (assignment_id,))
+    if not row:
+        raise LookupError(f"assignment {assignment_id} not found")
+    classroom_id = row[0]["classroom_id"]
+    total = [sum(d[0] for d in students.values()), sum(d[1] for d in students.values()),
+             sum(d[2] for d in students.values()), None]
+    for d in students.values():
+        total[3] = _later(total[3], d[3])
+
+    ignore = "INSERT OR IGNORE" if _is_sqlite(conn) else "INSERT IGNORE"
+    cur = conn.cursor()
+    cur.executemany(_sql(conn, f"{ignore} INTO analytics_student(user_id, classroom_id) VALUES(?, ?)"),
+                    [(user_id, classroom_id) for user_id in students])
+    new_students = max(cur.rowcount, 0)
+    cur.executemany(_sql(conn, _UPDATE.format(table="analytics_student", extra="", where="user_id = ? AND classroom_id = ?")),
+                    [(d[0], d[1], d[2], d[3], d[3], user_id, classroom_id) for user_id, d in students.items()])
+    cur.execute(_sql(conn, f"{ignore} INTO analytics_assessment(assignment_id, classroom_id) VALUES(?, ?)"),
+                (assignment_id, classroom_id))
+    cur.execute(_sql(conn, _UPDATE.format(table="analytics_assessment", extra="", where="assignment_id = ?")),
+                (*total[:3], total[3], total[3], assignment_id))
+    cur.execute(_sql(conn, f"{ignore} INTO analytics_classroom(classroom_id) VALUES(?)"), (classroom_id,))
+    cur.execute(_sql(conn, _UPDATE.format(table="analytics_classroom", extra=", submitters = submitters + ?",
+                                          where="classroom_id = ?")),
+                (*total[:3], new_students, total[3], total[3], classroom_id))
+    cur.close()
+
+
+def membership_changed(conn, classroom_id, delta):
+    """Call when students join (+1) or leave (-1) a classroom"""
+    ignore = "INSERT OR IGNORE" if _is_sqlite(conn) else "INSERT IGNORE"
+    cur = conn.cursor()
+    cur.execute(_sql(conn, f"{ignore} INTO analytics_classroom(classroom_id) VALUES(?)"), (classroom_id,))
+    cur.execute(_sql(conn, "UPDATE analytics_classroom SET members = members + ? WHERE classroom_id = ?"),
+                (delta, classroom_id))
+    cur.close()
+
+
+def rebuild(conn):
+    """Recompute every aggregate from the raw tables, returns row counts
+
+    Scores written while this runs may be counted twice or not at all;
+    run it before starting the app or follow it with check().
+    """
+    counts = {}
+    cur = conn.cursor()
+    for table, (_, columns, select) in RECOMPUTE.items():
+        cur.execute(f"DELETE FROM {table}")
+        cur.execute(f"INSERT INTO {table}({', '.join(columns)}) {select}")
+        counts[table] = cur.rowcount
+    cur.close()
+    conn.commit()
+    return counts
+
+
+def _same(a, b, tolerance):
+    if isinstance(a, numbers.Number) or isinstance(b, numbers.Number):
+        a, b = float(a or 0), float(b or 0)
+        return abs(a - b) <= tolerance * max(1.0, abs(a), abs(b))
+    return _ts(a) == _ts(b)
+
+
+def _empty(row):
+    return dict(row, last_submitted_at=None, **{c: 0 for c in COUNTERS if c in row})
+
+
+def check(conn, tolerance=1e-9, examples=10):
+    """Compare the stored aggregates with a full recompute
+
+    A missing stored row equals an all-zero one (nothing scored yet).
+    """
+    report = {"ok": True, "tables": {}, "examples": []}
+    for table, (keys, columns, select) in RECOMPUTE.items():
+        cur = conn.cursor()
+        cur.execute(select)
+        expected = {tuple(row[:len(keys)]): dict(zip(columns, row)) for row in cur.fetchall()}
+        cur.close()
+        stored = {tuple(r[k] for k in keys): r for r in _rows(conn, f"SELECT {', '.join(columns)} FROM {table}")}
+        mismatched = 0
+        for key in expected.keys() | stored.keys():
+            want = expected.get(key) or _empty(stored[key])
+            have = stored.get(key) or _empty(expected[key])
+            wrong = [c for c in columns if not _same(want.get(c), have.get(c), tolerance)]
+            if wrong:
+                mismatched += 1
+                if len(report["examples"]) < examples:
+                    report["examples"].append({"table": table, "key": list(key),
+                                               "expected": {c: want.get(c) for c in wrong},
+                                               "stored": {c: have.get(c) for c in wrong}})
+        report["tables"][table] = {"rows": len(stored), "mismatched": mismatched}
+        report["ok"] = report["ok"] and not mismatched
+    return report
+
+
+def _summary(row):
+    n = row.pop("submissions")
+    total, squares = float(row.pop("score_sum")), float(row.pop("score_sq_sum"))
+    mean = total / n if n else None
+    row.update(submissions=n, mean_score=None if mean is None else round(mean, 2),
+               std_score=None if mean is None else round(math.sqrt(max(squares / n - mean * mean, 0.0)), 2),
+               last_submitted_at=_ts(row["last_submitted_at"]))
+    if "members" in row:
+        row["participation"] = round(row["submitters"] / row["members"], 4) if row["members"] else None
+    return row
+
+
+def classroom_overview(conn, owner_id=None):
+    """Per-classroom participation and performance (all classrooms for owner_id=None)"""
+    sql = ("SELECT k.classroom_id, c.name, k.members, k.submitters, k.submissions, k.score_sum, k.score_sq_sum, "
+           "k.last_submitted_at FROM analytics_classroom k LEFT JOIN classrooms c ON c.id = k.classroom_id")
+    params = ()
+    if owner_id is not None:
+        sql += " WHERE c.created_by = ?"
+        params = (owner_id,)
+    return [_summary(r) for r in _rows(conn, sql + " ORDER BY k.classroom_id", params)]
+
+
+def assessment_overview(conn, owner_id=None):
+    sql = ("SELECT k.assignment_id, k.classroom_id, a.title, k.submissions, k.score_sum, k.score_sq_sum, "
+           "k.last_submitted_at FROM analytics_assessment k JOIN assignments a ON a.id = k.assignment_id")
+    params = ()
+    if owner_id is not None:
+        sql += " WHERE k.classroom_id IN (SELECT id FROM classrooms WHERE created_by = ?)"
+        params = (owner_id,)
+    return [_summary(r) for r in _rows(conn, sql + " ORDER BY k.assignment_id", params)]
+
+
+def student_progress(conn, user_id):
+    """A student's totals per classroom next to the classroom average"""
+    rows = _rows(conn, "SELECT s.classroom_id, s.submissions, s.score_sum, s.score_sq_sum, s.last_submitted_at, "
+                       "k.submissions AS class_submissions, k.score_sum AS class_score_sum "
+                       "FROM analytics_student s LEFT JOIN analytics_classroom k ON k.classroom_id = s.classroom_id "
+                       "WHERE s.user_id = ? ORDER BY s.classroom_id", (user_id,))
+    for row in rows:
+        n, total = row.pop("class_submissions"), row.pop("class_score_sum")
+        _summary(row)
+        row["class_mean_score"] = round(float(total) / n, 2) if n else None
+    return rows
+
+
+def classroom_students(conn, classroom_id):
+    """Per-student totals in one classroom (participation vs performance)"""
+    return [_summary(r) for r in _rows(conn, "SELECT user_id, submissions, score_sum, score_sq_sum, last_submitted_at "
+                                             "FROM analytics_student WHERE classroom_id = ? ORDER BY user_id",
+                                       (classroom_id,))]
+
+
+@analytics_bp.route("/api/v1/analytics/dashboard")
+@login_required
+def dashboard():
+    db = get_db(readonly=True)
+    if current_user.role == "student":
+        return jsonify({"progress": student_progress(db, current_user.id)})
+    owner = None if current_user.role == "admin" else current_user.id
+    return jsonify({"classrooms": classroom_overview(db, owner), "assessments": assessment_overview(db, owner)})
+
+
+@analytics_bp.route("/api/v1/analytics/classrooms/<int:classroom_id>/students")
+@role_required("teacher", "admin")
+def students(classroom_id):
+    db = get_db(readonly=True)
+    if current_user.role != "admin":
+        owner = _rows(db, "SELECT created_by FROM classrooms WHERE id = ?", (classroom_id,))
+        if not owner:
+            abort(404)
+        if str(owner[0]["created_by"]) != str(current_user.id):
+            abort(403)
+    return jsonify({"classroom_id": classroom_id, "students": classroom_students(db, classroom_id)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild or check the analytics aggregates")
+    parser.add_argument("command", choices=("rebuild", "check"))
+    args = parser.parse_args()
+    from . import create_app
+    app = create_app()
+    with app.app_context():
+        db = get_db(readonly=False)
+        if args.command == "rebuild":
+            print(json.dumps(rebuild(db)))
+            return 0
+        report = check(db)
+        print(json.dumps(report, indent=2, default=str))
+        return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
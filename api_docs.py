@@ -1,17 +1,34 @@
 """
 API Documentation using Flask-RESTX (Swagger UI)
 Comprehensive documentation for all API endpoints
+The Resource classes below are `pass` stubs that only describe the API: they
+are not routed (DocsApi), so the real handlers in the other blueprints serve
+these paths whatever order the blueprints are registered in.
 """
 from flask import Blueprint
 from flask_restx import Api, Resource, fields, Namespace
+from flask_restx.api import SwaggerView
 from flask_login import login_required, current_user
 from werkzeug.datastructures import FileStorage
 
 # Create API documentation blueprint
 api_docs_bp = Blueprint('api_docs', __name__)
 
+
+class DocsApi(Api):
+    """Serves /docs/ and swagger.json without adding URL rules for the documented resources
+
+    A stub rule registered before the real one would answer in its place
+    (Flask serves the first matching rule) with an empty 200.
+    """
+
+    def _register_view(self, app, resource, namespace, *urls, **kwargs):
+        if resource is SwaggerView:
+            return super()._register_view(app, resource, namespace, *urls, **kwargs)
+
+
 # Initialize Flask-RESTX API
-api = Api(
+api = DocsApi(
     api_docs_bp,
     version='1.0',
     title='Sphere AI Platform API',
@@ -58,6 +75,11 @@ ocr_result_model = api.model('OCR Result', {
     'timestamp': fields.DateTime(description='Processing timestamp')
 })
 
+ocr_search_model = api.model('OCR Search Page', {
+    'items': fields.List(fields.Raw, description='id, filename, created_at, plus snippet and rank when searching'),
+    'next_cursor': fields.String(description='Cursor for the next page, null on the last page')
+})
+
 job_status_model = api.model('Job Status', {
     'job_id': fields.String(description='Job identifier'),
     'status': fields.String(description='Job status: queued, processing, completed, failed'),
@@ -69,7 +91,9 @@ ai_response_model = api.model('AI Response', {
     'reply': fields.String(description='AI-generated response'),
     'context_used': fields.Boolean(description='Whether context was used'),
     'sources': fields.List(fields.String, description='Source documents used'),
-    'confidence': fields.Float(description='Response confidence score')
+    'context_sources': fields.Raw(description='Per context source (ocr, mysql, rag): status, ms, items, used'),
+    'confidence': fields.Float(description='Response confidence score'),
+    'cached': fields.Boolean(description='Whether the reply came from the semantic cache')
 })
 
 # Authentication namespace
@@ -107,10 +131,9 @@ api.add_namespace(classrooms_ns)
 
 @classrooms_ns.route('/')
 class ClassroomList(Resource):
-    @classrooms_ns.doc('list_classrooms')
-    @classrooms_ns.marshal_list_with(classroom_model)
+    @classrooms_ns.doc('list_classrooms', params={'limit': 'Page size (default 20, max 100)', 'cursor': 'next_cursor from the previous page'})
     def get(self):
-        """Get user's classrooms"""
+        """Get user's classrooms, newest first: {items: [Classroom], next_cursor}"""
         pass
 
     @classrooms_ns.doc('create_classroom')
@@ -149,10 +172,9 @@ api.add_namespace(assessments_ns)
 
 @assessments_ns.route('/')
 class AssessmentList(Resource):
-    @assessments_ns.doc('list_assessments')
-    @assessments_ns.marshal_list_with(assessment_model)
+    @assessments_ns.doc('list_assessments', params={'limit': 'Page size (default 20, max 100)', 'cursor': 'next_cursor from the previous page'})
     def get(self):
-        """Get available assessments"""
+        """Get available assessments, newest first: {items: [Assessment without content], next_cursor}"""
         pass
 
 @assessments_ns.route('/upload')
@@ -183,6 +205,13 @@ class AssessmentSubmit(Resource):
         """Submit assessment answers"""
         pass
 
+@assessments_ns.route('/<int:assessment_id>/regrade')
+class AssessmentRegrade(Resource):
+    @assessments_ns.doc('regrade_assessment')
+    def post(self, assessment_id):
+        """Rescore all submissions against the current answer key (teachers/admin, background job, progress via /jobs/status/<job_id>)"""
+        pass
+
 # OCR namespace
 ocr_ns = Namespace('ocr', description='Optical Character Recognition')
 api.add_namespace(ocr_ns)
@@ -191,17 +220,20 @@ api.add_namespace(ocr_ns)
 class OCRUpload(Resource):
     @ocr_ns.doc('ocr_upload')
     @ocr_ns.expect(api.parser().add_argument('image', location='files', type=FileStorage, required=True))
-    @ocr_ns.marshal_with(ocr_result_model)
     def post(self):
-        """Extract text from image or PDF"""
+        """Extract text from image or PDF as a background job (pages OCR'd in parallel, page progress via /jobs/status/<job_id>, the job result follows ocr_result_model, repeat files served from cache)"""
         pass
 
 @ocr_ns.route('/extractions')
 class OCRExtractions(Resource):
-    @ocr_ns.doc('list_extractions')
-    @ocr_ns.marshal_list_with(ocr_result_model)
+    @ocr_ns.doc('list_extractions', params={
+        'q': 'Full-text query, results ranked by relevance with highlighted snippets',
+        'limit': 'Page size (default 20)',
+        'cursor': 'next_cursor from the previous page'
+    })
+    @ocr_ns.marshal_with(ocr_search_model)
     def get(self):
-        """Get OCR extraction history"""
+        """Get OCR extraction history, newest first or searched with q"""
         pass
 
 # AI Tutor namespace
@@ -213,13 +245,30 @@ class TutorChat(Resource):
     @tutor_ns.doc('tutor_chat')
     @tutor_ns.expect(api.model('ChatMessage', {
         'message': fields.String(required=True, description='User message'),
-        'context': fields.Boolean(description='Use document context')
+        'context': fields.Boolean(description='Use document context'),
+        'namespace': fields.String(description='Document namespace', default='default'),
+        'session_id': fields.String(description='Chat session the reply is saved to'),
+        'classroom_id': fields.Integer(description='Classroom the cached reply is scoped to')
     }))
     @tutor_ns.marshal_with(ai_response_model)
     def post(self):
         """Chat with AI tutor"""
         pass
 
+@tutor_ns.route('/chat/stream')
+class TutorChatStream(Resource):
+    @tutor_ns.doc('tutor_chat_stream')
+    @tutor_ns.expect(api.model('StreamChatMessage', {
+        'message': fields.String(required=True, description='User message'),
+        'context': fields.Boolean(description='Use document context'),
+        'namespace': fields.String(description='Document namespace', default='default'),
+        'session_id': fields.String(description='Chat session the reply is saved to'),
+        'classroom_id': fields.Integer(description='Classroom the cached reply is scoped to')
+    }))
+    def post(self):
+        """Chat with AI tutor, streamed as Server-Sent Events (token events, then a done event with sources/context_used)"""
+        pass
+
 @tutor_ns.route('/sessions')
 class TutorSessions(Resource):
     @tutor_ns.doc('list_sessions')
@@ -242,7 +291,7 @@ class RAGIngest(Resource):
     @rag_ns.expect(api.parser().add_argument('file', location='files', type=FileStorage, required=True)
                    .add_argument('namespace', location='form', default='default'))
     def post(self):
-        """Ingest document for RAG system"""
+        """Ingest document for RAG system (background job, progress via /jobs/status/<job_id>; the returned doc_id is unique per upload)"""
         pass
 
 @rag_ns.route('/search')
@@ -261,7 +310,7 @@ class RAGSearch(Resource):
 class RAGReindex(Resource):
     @rag_ns.doc('rag_reindex')
     def post(self):
-        """Rebuild document index (admin only)"""
+        """Rebuild document index (admin only, optional JSON namespace) as a background job - only changed documents are re-embedded, uploaded documents are kept"""
         pass
 
 # Background Jobs namespace
@@ -276,11 +325,38 @@ class JobStatus(Resource):
         """Get background job status"""
         pass
 
+@jobs_ns.route('/status/<job_id>/wait')
+class JobStatusWait(Resource):
+    @jobs_ns.doc('wait_job_status', params={
+        'status': 'Last status the client saw',
+        'progress': 'Last progress the client saw',
+        'timeout': 'Seconds to hold the request (default 25)'
+    })
+    @jobs_ns.marshal_with(job_status_model)
+    def get(self, job_id):
+        """Long poll: returns when the status or progress changes, or at the timeout (503 when the worker is at its subscriber cap)"""
+        pass
+
+@jobs_ns.route('/status/<job_id>/stream')
+class JobStatusStream(Resource):
+    @jobs_ns.doc('stream_job_status')
+    def get(self, job_id):
+        """Server-Sent Events: a `status` event (job_status_model) per transition, closed after completed/failed"""
+        pass
+
+@jobs_ns.route('/cancel/<job_id>')
+class JobCancel(Resource):
+    @jobs_ns.doc('cancel_job')
+    @jobs_ns.marshal_with(job_status_model)
+    def post(self, job_id):
+        """Cancel a queued job, or stop a running one at its next progress update"""
+        pass
+
 @jobs_ns.route('/queue/info')
 class QueueInfo(Resource):
     @jobs_ns.doc('get_queue_info')
     def get(self):
-        """Get job queue information (admin only)"""
+        """Get job queue information (admin only): backend, queued, processing, completed, failed, workers"""
         pass
 
 # Data Analysis namespace
@@ -293,8 +369,13 @@ class DataAnalyze(Resource):
     @data_ns.expect(api.model('DataArray', {
         'data': fields.List(fields.Float, required=True, description='Numeric data array')
     }))
+    @data_ns.doc(params={
+        'bins': 'Histogram bins (default 20)',
+        'dtype': 'float64 or float32, for raw application/octet-stream bodies',
+        'column': 'CSV column name or index (default the first)'
+    })
     def post(self):
-        """Perform statistical analysis on data"""
+        """Perform statistical analysis on data (JSON list, or .npy / raw little-endian floats / CSV streamed in chunks)"""
         pass
 
 @data_ns.route('/fit')
@@ -309,14 +390,63 @@ class DataFit(Resource):
         """Perform curve fitting on data"""
         pass
 
+@data_ns.route('/fit/batch')
+class DataFitBatch(Resource):
+    @data_ns.doc('fit_curve_batch')
+    @data_ns.expect(api.model('FitBatch', {
+        'series': fields.List(fields.Raw, required=True, description='[{id?, x, y, kind?, degree?}], lengths may differ'),
+        'kind': fields.String(description='Default fit type: linear, polynomial, quadratic, logarithmic, exponential, power, gaussian', default='linear')
+    }))
+    def post(self):
+        """Fit many series in one call, results (params, errors, r_squared, rmse) in input order"""
+        pass
+
 @data_ns.route('/propagate')
 class DataPropagate(Resource):
     @data_ns.doc('error_propagation')
     @data_ns.expect(api.model('PropagationData', {
         'formula': fields.String(required=True, description='Mathematical formula'),
-        'values': fields.Raw(required=True, description='Variable values'),
-        'errors': fields.Raw(required=True, description='Variable errors')
+        'values': fields.Raw(required=True, description='Variable values (numbers or equal-length arrays)'),
+        'errors': fields.Raw(required=True, description='Variable errors (numbers or equal-length arrays)'),
+        'mode': fields.String(description='linear (first order) or montecarlo', default='linear'),
+        'samples': fields.Integer(description='Monte Carlo draws', default=10000),
+        'seed': fields.Integer(description='Monte Carlo random seed')
     }))
     def post(self):
-        """Calculate error propagation"""
-        pass
\ No newline at end of file
+        """Calculate error propagation (compiled formulas are cached, arrays are evaluated in one call)"""
+        pass
+
+
+# Analytics namespace
+analytics_ns = Namespace('analytics', description='Analytics Dashboard')
+api.add_namespace(analytics_ns)
+
+@analytics_ns.route('/dashboard')
+class AnalyticsDashboard(Resource):
+    @analytics_ns.doc('analytics_dashboard')
+    def get(self):
+        """Dashboard totals from the analytics aggregates: per-classroom participation and per-assessment scores (teacher/admin), per-classroom progress (student)"""
+        pass
+
+@analytics_ns.route('/classrooms/<int:classroom_id>/students')
+class AnalyticsClassroomStudents(Resource):
+    @analytics_ns.doc('analytics_classroom_students')
+    def get(self, classroom_id):
+        """Submissions, mean and spread of scores per student in a classroom (teacher/admin)"""
+        pass
+
+# Exports namespace
+exports_ns = Namespace('exports', description='Streaming Data Exports')
+api.add_namespace(exports_ns)
+
+@exports_ns.route('/<name>.<fmt>')
+class Export(Resource):
+    @exports_ns.doc('export', params={
+        'name': 'submissions, classrooms, assessments, students (teacher/admin) or users (admin)',
+        'fmt': 'csv or json',
+        'classroom_id': 'Only rows of this classroom',
+        'gzip': '1 to gzip the stream (<name>.<fmt>.gz)'
+    })
+    def get(self, name, fmt):
+        """Download an export, streamed in chunks as it is read (teachers get their own classrooms only)"""
+        pass
@@ -0,0 +1,30 @@
+"""
+Assessment endpoints (/api/v1/assessments/*) added alongside the existing
+handlers: bulk regrade as a background job.
+"""
+from flask import Blueprint, abort, jsonify
+from flask_login import current_user
+from .db import get_db
+from .grading import regrade_job
+from .jobs import enqueue
+from .roles import role_required
+
+assessments_bp = Blueprint("assessments_api", __name__)
+
+
+def _can_manage(assignment_id):
+    row = get_db(readonly=True).execute(
+        "SELECT c.created_by FROM assignments a LEFT JOIN classrooms c ON c.id = a.classroom_id WHERE a.id=?",
+        (assignment_id,)).fetchone()
+    if row is None:
+        abort(404)
+    return current_user.role == "admin" or str(row["created_by"]) == str(current_user.id)
+
+
+@assessments_bp.route("/api/v1/assessments/<int:assessment_id>/regrade", methods=["POST"])
+@role_required("teacher", "admin")
+def regrade(assessment_id):
+    if not _can_manage(assessment_id):
+        abort(403)
+    job_id = enqueue(regrade_job, assessment_id, priority=1)
+    return jsonify({"job_id": job_id, "status": "queued"}), 202
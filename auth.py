@@ -1,7 +1,8 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_user, logout_user, login_required, UserMixin
-from passlib.hash import pbkdf2_sha256
 from .db import get_db
+from .passwords import hash_password, verify_password, HashingBusy
+from .user_cache import get_user_cache, invalidate_user
 
 auth_bp = Blueprint("auth", __name__, template_folder="../templates")
 
@@ -13,11 +14,16 @@ class User(UserMixin):
         self.full_name = full_name
 
 def user_loader(user_id):
-    db = get_db()
-    row = db.execute("SELECT id, email, role, full_name FROM users WHERE id=?", (user_id,)).fetchone()
-    if row:
-        return User(row["id"], row["email"], row["role"], row["full_name"])
-    return None
+    cache = get_user_cache()
+    fields = cache.get(user_id)
+    if fields is None:
+        db = get_db()
+        row = db.execute("SELECT id, email, role, full_name FROM users WHERE id=?", (user_id,)).fetchone()
+        if not row:
+            return None
+        fields = {"id": row["id"], "email": row["email"], "role": row["role"], "full_name": row["full_name"]}
+        cache.put(user_id, fields)
+    return User(fields["id"], fields["email"], fields["role"], fields["full_name"])
 
 @auth_bp.route("/login", methods=["GET","POST"])
 def login():
@@ -26,7 +32,16 @@ def login():
         pw = request.form.get("password","")
         db = get_db()
         row = db.execute("SELECT * FROM users WHERE email=?", (email,)).fetchone()
-        if row and pbkdf2_sha256.verify(pw, row["password_hash"]):
+        try:
+            ok, new_hash = verify_password(pw, row["password_hash"]) if row else (False, None)
+        except HashingBusy:
+            flash("Too many sign-ins right now, please try again in a moment", "error")
+            return render_template("auth_login.html"), 503
+        if ok:
+            if new_hash:
+                # hash cost changed since this password was stored
+                db.execute("UPDATE users SET password_hash=? WHERE id=?", (new_hash, row["id"]))
+                db.commit()
             login_user(User(row["id"], row["email"], row["role"], row["full_name"]))
             return redirect(url_for("main.home"))
         flash("Invalid credentials", "error")
@@ -41,11 +56,18 @@ def register():
         role = request.form.get("role","student")
         if role not in ("student","teacher"):
             role = "student"
+        try:
+            password_hash = hash_password(pw)
+        except HashingBusy:
+            flash("Too many sign-ups right now, please try again in a moment", "error")
+            return render_template("auth_register.html"), 503
         db = get_db()
         try:
-            db.execute("INSERT INTO users(email,password_hash,role,full_name) VALUES(?,?,?,?)",
-                       (email, pbkdf2_sha256.hash(pw), role, full_name))
+            cur = db.execute("INSERT INTO users(email,password_hash,role,full_name) VALUES(?,?,?,?)",
+                             (email, password_hash, role, full_name))
             db.commit()
+            # the id may have belonged to a deleted user still sitting in the cache
+            invalidate_user(cur.lastrowid)
             flash("Registered! Please login.", "success")
             return redirect(url_for("auth.login"))
         except Exception as e:
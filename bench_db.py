@@ -0,0 +1,48 @@
+"""
+Benchmark: SQLite connection setup cost per request
+Compares the old path (connect + run db/schema.sql on every connection)
+with the migrated path (connect only, schema applied once at startup).
+
+Usage: python bench_db.py [iterations]
+"""
+import os, sqlite3, sys, tempfile, time
+from app.migrations import SCHEMA_PATH, apply_migrations
+
+iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+schema_sql = open(SCHEMA_PATH, "r", encoding="utf-8").read()
+path = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+setup = sqlite3.connect(path)
+apply_migrations(setup)
+setup.close()
+
+
+def per_request_schema():
+    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(schema_sql)
+    conn.commit()
+    conn.execute("SELECT 1").fetchone()
+    conn.close()
+
+
+def migrated():
+    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+    conn.row_factory = sqlite3.Row
+    conn.execute("SELECT 1").fetchone()
+    conn.close()
+
+
+def run(label, fn):
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed / iterations * 1e6:10.1f} us/connection  ({iterations} iterations)")
+    return elapsed
+
+
+before = run("schema.sql per connection", per_request_schema)
+after = run("versioned migrations", migrated)
+print(f"speedup: {before / after:.1f}x")
@@ -0,0 +1,257 @@
+"""
+Endpoint benchmark suite for the hot paths
+Runs create_app() against a freshly seeded SQLite database with Gemini and
+Redis stubbed out, either in-process (Flask test client) or over HTTP
+(local threaded WSGI server), and writes p50/p95/p99 latency and
+throughput per endpoint to a JSON file. compare flags slower latency or
+throughput, and error rates above the threshold (an endpoint that stops
+answering at all included), with a non-zero exit code.
+
+  python bench_endpoints.py run --out before.json
+  python bench_endpoints.py run --mode server --concurrency 8 --out after.json
+  python bench_endpoints.py compare before.json after.json --threshold 0.10
+"""
+import argparse, io, json, os, platform, statistics, subprocess, sys, tempfile, threading, time, urllib.request
+from datetime import datetime
+
+
+# name -> (method, path, payload builder); payloads are werkzeug EnvironBuilder kwargs
+def _png_bytes():
+    try:
+        from PIL import Image, ImageDraw
+        img = Image.new("L", (400, 80), 255)
+        ImageDraw.Draw(img).text((10, 30), "F = m * a", fill=0)
+        buf = io.BytesIO()
+        img.save(buf, "PNG")
+        return buf.getvalue()
+    except ImportError:
+        return b"\x89PNG\r\n\x1a\n"
+
+SCENARIOS = {
+    "login": ("POST", "/login", lambda: {"data": {"email": "student@ai.com", "password": "password123"}}),
+    "user_loader": ("GET", "/", lambda: {}),
+    "classrooms_list": ("GET", "/classrooms/", lambda: {}),
+    "assessment_submit": ("POST", "/assessments/1/submit", lambda: {"data": {"answers": ["N", "d/t", "9.8"]}}),
+    "rag_search": ("POST", "/rag/search", lambda: {"json": {"q": "Newton's second law", "namespace": "default", "limit": 5}}),
+    "ocr_upload": ("POST", "/ocr/upload", lambda: {"data": {"image": (io.BytesIO(_png_bytes()), "page.png")}}),
+}
+
+# statuses that count as a successful request, anything else is an error (default: 2xx)
+EXPECTED_STATUS = {"login": (302, 303)}
+
+
+def _ok(name, status):
+    expected = EXPECTED_STATUS.get(name)
+    return status in expected if expected else 200 <= status < 300
+
+
+def _stub_services():
+    """Replace Gemini and Redis with in-process fakes"""
+    try:
+        import google.generativeai as genai
+
+        class _FakeResponse:
+            text = "Stubbed tutor reply."
+            candidates = []
+
+        genai.GenerativeModel.generate_content = lambda self, *a, **kw: _FakeResponse()
+    except ImportError:
+        pass
+    try:
+        import fakeredis, redis
+        server = fakeredis.FakeServer()
+        redis.Redis.from_url = classmethod(lambda cls, *a, **kw: fakeredis.FakeRedis(server=server))
+    except ImportError:
+        # unreachable Redis makes the app use its non-Redis fallback
+        os.environ["REDIS_URL"] = "redis://127.0.0.1:1/0"
+
+
+def _prepare_app(students):
+    os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+    _stub_services()
+    from app import create_app
+    app = create_app()  # applies migrations
+    app.config.update(WTF_CSRF_ENABLED=False, RATELIMIT_ENABLED=False, TESTING=True)
+    subprocess.run([sys.executable, "seed_demo.py", "--students", str(students),
+                    "--teachers", str(max(students // 50, 1)), "--classrooms", str(max(students // 25, 1)),
+                    "--seed", "42"], check=True, stdout=subprocess.DEVNULL)
+    return app
+
+
+def _percentile(samples, pct):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+class _ClientSession:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, **kwargs):
+        return self.client.open(path, method=method, **kwargs).status_code
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # report the redirect itself, like the test client does
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class _HttpSession:
+    def __init__(self, base_url):
+        import http.cookiejar
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+                                                  _NoRedirect())
+
+    def request(self, method, path, **kwargs):
+        import urllib.error
+        from werkzeug.test import EnvironBuilder
+        env = EnvironBuilder(path=path, method=method, **kwargs).get_environ()
+        body = env["wsgi.input"].read() or None
+        headers = {"Content-Type": env["CONTENT_TYPE"]} if env.get("CONTENT_TYPE") else {}
+        req = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers)
+        try:
+            with self.opener.open(req) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def _run_scenario(make_session, name, requests_per_worker, concurrency):
+    method, path, payload = SCENARIOS[name]
+    latencies, errors, lock = [], {}, threading.Lock()
+
+    def worker():
+        session = make_session()
+        local, bad = [], {}
+        if name != "login":
+            status = session.request(*SCENARIOS["login"][:2], **SCENARIOS["login"][2]())
+            if not _ok("login", status):
+                bad[f"login {status}"] = 1
+        for _ in range(requests_per_worker):
+            start = time.perf_counter()
+            status = session.request(method, path, **payload())
+            elapsed = (time.perf_counter() - start) * 1000
+            # only successful responses are timed, a fast 302/401/404 says nothing about the endpoint
+            if _ok(name, status):
+                local.append(elapsed)
+            else:
+                bad[str(status)] = bad.get(str(status), 0) + 1
+        with lock:
+            latencies.extend(local)
+            for status, n in bad.items():
+                errors[status] = errors.get(status, 0) + n
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    timed = bool(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "error_statuses": errors,
+        "p50_ms": round(_percentile(latencies, 50), 3) if timed else None,
+        "p95_ms": round(_percentile(latencies, 95), 3) if timed else None,
+        "p99_ms": round(_percentile(latencies, 99), 3) if timed else None,
+        "mean_ms": round(statistics.fmean(latencies), 3) if timed else None,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+    }
+
+
+def run(opts):
+    app = _prepare_app(opts.students)
+    server = None
+    if opts.mode == "server":
+        from werkzeug.serving import make_server
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        make_session = lambda: _HttpSession(base_url)
+    else:
+        make_session = lambda: _ClientSession(app)
+
+    results = {}
+    for name in opts.endpoints or SCENARIOS:
+        _run_scenario(make_session, name, max(opts.requests // 10, 1), 1)  # warm up
+        results[name] = _run_scenario(make_session, name, opts.requests, opts.concurrency)
+        r = results[name]
+        if r["requests"]:
+            print(f"{name:<18} p50 {r['p50_ms']:8.2f}ms  p95 {r['p95_ms']:8.2f}ms  p99 {r['p99_ms']:8.2f}ms  "
+                  f"{r['throughput_rps']:8.1f} req/s  errors {r['errors']}")
+        else:
+            print(f"{name:<18} no successful requests")
+        if r["errors"]:
+            print(f"{'':<18} non-2xx responses (not timed): {r['error_statuses']}")
+    if server is not None:
+        server.shutdown()
+
+    report = {
+        "meta": {"mode": opts.mode, "concurrency": opts.concurrency, "requests_per_worker": opts.requests,
+                 "students": opts.students, "python": platform.python_version(),
+                 "timestamp": datetime.now().isoformat(timespec="seconds")},
+        "endpoints": results,
+    }
+    with open(opts.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print("Wrote", opts.out)
+
+
+def _error_rate(r):
+    total = r["requests"] + r.get("errors", 0)
+    return r.get("errors", 0) / total if total else 0.0
+
+
+def compare(opts):
+    base = json.load(open(opts.baseline, encoding="utf-8"))["endpoints"]
+    new = json.load(open(opts.candidate, encoding="utf-8"))["endpoints"]
+    regressions = []
+    for name in sorted(set(base) & set(new)):
+        b, n = base[name], new[name]
+        b_rate, n_rate = _error_rate(b), _error_rate(n)
+        if n_rate > b_rate and n_rate > opts.threshold:
+            regressions.append(f"{name}.error_rate: {b_rate:.0%} -> {n_rate:.0%} {n.get('error_statuses', {})}")
+        if not (b["requests"] and n["requests"]):
+            if b["requests"] and not n["requests"]:
+                regressions.append(f"{name}: no successful requests in the candidate run {n.get('error_statuses', {})}")
+            print(f"{name:<18} latency skipped, no successful requests in one of the runs")
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            change = (n[metric] - b[metric]) / b[metric] if b[metric] else 0.0
+            if change > opts.threshold:
+                regressions.append(f"{name}.{metric}: {b[metric]} -> {n[metric]} (+{change:.0%})")
+        change = (b["throughput_rps"] - n["throughput_rps"]) / b["throughput_rps"] if b["throughput_rps"] else 0.0
+        if change > opts.threshold:
+            regressions.append(f"{name}.throughput_rps: {b['throughput_rps']} -> {n['throughput_rps']} (-{change:.0%})")
+        print(f"{name:<18} p95 {b['p95_ms']:8.2f} -> {n['p95_ms']:8.2f}ms   "
+              f"{b['throughput_rps']:8.1f} -> {n['throughput_rps']:8.1f} req/s")
+    if regressions:
+        print(f"\nREGRESSIONS (threshold {opts.threshold:.0%}):")
+        for line in regressions:
+            print("  " + line)
+        sys.exit(1)
+    print("\nNo regressions beyond threshold.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_run = sub.add_parser("run")
+    p_run.add_argument("--mode", choices=("client", "server"), default="client")
+    p_run.add_argument("--concurrency", type=int, default=4)
+    p_run.add_argument("--requests", type=int, default=200, help="requests per worker per endpoint")
+    p_run.add_argument("--students", type=int, default=2000, help="size of the seeded dataset")
+    p_run.add_argument("--endpoints", nargs="*", choices=list(SCENARIOS))
+    p_run.add_argument("--out", default="bench_results.json")
+    p_cmp = sub.add_parser("compare")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("candidate")
+    p_cmp.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown")
+    opts = parser.parse_args()
+    run(opts) if opts.command == "run" else compare(opts)
@@ -0,0 +1,59 @@
+"""
+Benchmark: peak memory of an export, buffered vs streamed
+Fills a temporary SQLite database with synthetic submissions, then builds
+the CSV export the old way (fetchall + one string) and the streamed way
+(iter_batches -> encode_csv, optionally gzip), measuring Python peak memory
+with tracemalloc. The streamed peak should stay flat as rows grow.
+
+Usage: python bench_exports.py [rows ...]
+"""
+import csv, io, os, sqlite3, sys, tempfile, time, tracemalloc
+from app.exports import encode_csv, gzip_chunks, iter_batches
+
+sizes = [int(a) for a in sys.argv[1:]] or [100000, 1000000]
+SQL = "SELECT id, assignment_id, user_id, score, submitted_at FROM submissions"
+
+
+def database(rows):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE submissions(id INTEGER PRIMARY KEY, assignment_id INT, user_id INT, score REAL, submitted_at TEXT)")
+    conn.executemany("INSERT INTO submissions(assignment_id, user_id, score, submitted_at) VALUES(?,?,?,?)",
+                     ((i % 500, i % 20000, (i * 37) % 10001 / 100, "2025-09-01 10:00:00") for i in range(rows)))
+    conn.commit()
+    return conn
+
+
+def buffered(conn):
+    cur = conn.execute(SQL)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow([c[0] for c in cur.description])
+    writer.writerows(cur.fetchall())
+    return len(buf.getvalue().encode("utf-8"))
+
+
+def streamed(conn, gzip=False):
+    chunks = encode_csv(iter_batches(conn, SQL))
+    if gzip:
+        chunks = gzip_chunks(chunks)
+    return sum(len(c) for c in chunks)
+
+
+def measure(label, fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"  {label:<16} {size / 1e6:8.1f} MB out  peak {peak / 1e6:8.2f} MB  {elapsed:6.2f} s")
+
+
+for rows in sizes:
+    conn = database(rows)
+    print(f"{rows} rows")
+    measure("buffered", buffered, conn)
+    measure("streamed", streamed, conn)
+    measure("streamed + gzip", streamed, conn, True)
+    conn.close()
@@ -0,0 +1,87 @@
+"""
+Benchmark: classroom/assessment listing, full list vs OFFSET vs keyset pages
+Seeds a synthetic dataset with seed_demo.py into a temporary SQLite file,
+then times walking every page of the busiest teacher's and student's
+assessment list with LIMIT/OFFSET and with the keyset cursor, with and
+without the migration 6 indexes. With DATABASE_URL set (and the same
+--seed loaded there) every page is also compared against MySQL.
+
+Usage: python bench_listings.py [students] [page size]
+"""
+import os, sqlite3, subprocess, sys, tempfile, time
+from urllib.parse import urlparse
+from app.listings import ASSESSMENT_COLUMNS, list_assessments, list_classrooms
+from app.migrations import _listing_indexes, apply_migrations
+
+students = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+path = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+conn = sqlite3.connect(path)
+apply_migrations(conn)
+conn.close()
+subprocess.run([sys.executable, "seed_demo.py", "--no-demo", "--students", str(students),
+                "--teachers", str(students // 50), "--classrooms", str(students // 25)],
+               env=dict(os.environ, SQLITE_PATH=path, SQLITE_FALLBACK="1"), check=True)
+conn = sqlite3.connect(path)
+conn.row_factory = sqlite3.Row
+
+teacher = conn.execute("SELECT created_by FROM classrooms GROUP BY created_by ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+student = conn.execute("SELECT user_id FROM classroom_members GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+
+
+def walk_keyset(db, fn, user_id, role):
+    pages, cursor = [], None
+    while True:
+        result = fn(db, user_id, role, page_size, cursor)
+        pages.append(result["items"])
+        cursor = result["next_cursor"]
+        if not cursor:
+            return pages
+
+
+def walk_offset(db, user_id):
+    # the old way: same filter, LIMIT/OFFSET re-reads every skipped row
+    pages, offset = [], 0
+    while True:
+        rows = db.execute(f"SELECT {ASSESSMENT_COLUMNS} FROM assignments a WHERE a.classroom_id = 0 OR a.classroom_id IN "
+                          "(SELECT c.id FROM classrooms c WHERE c.created_by = ?) ORDER BY a.id DESC LIMIT ? OFFSET ?",
+                          (user_id, page_size, offset)).fetchall()
+        if not rows:
+            return pages
+        pages.append(rows)
+        offset += page_size
+
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    pages = fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<44} {len(pages):6d} pages {elapsed * 1000:9.1f} ms  {elapsed / len(pages) * 1e6:8.1f} us/page")
+    return pages
+
+
+def drop_indexes(db):
+    for statement in _listing_indexes("sqlite"):
+        db.execute(f"DROP INDEX IF EXISTS {statement.split()[5]}")
+
+
+print(f"teacher {teacher}, student {student}, page size {page_size}")
+timed("teacher assessments, OFFSET", walk_offset, conn, teacher)
+keyset_pages = timed("teacher assessments, keyset", walk_keyset, conn, list_assessments, teacher, "teacher")
+timed("student assessments, keyset", walk_keyset, conn, list_assessments, student, "student")
+timed("student classrooms, keyset", walk_keyset, conn, list_classrooms, student, "student")
+timed("admin assessments, keyset", walk_keyset, conn, list_assessments, 0, "admin")
+drop_indexes(conn)
+timed("teacher assessments, keyset, no indexes", walk_keyset, conn, list_assessments, teacher, "teacher")
+timed("student assessments, keyset, no indexes", walk_keyset, conn, list_assessments, student, "student")
+
+if os.getenv("DATABASE_URL"):
+    import mysql.connector
+    url = urlparse(os.getenv("DATABASE_URL"))
+    mysql_conn = mysql.connector.connect(host=url.hostname, port=url.port or 3306, user=url.username,
+                                         password=url.password, database=url.path.lstrip("/"))
+    for fn, user_id, role in ((list_assessments, teacher, "teacher"), (list_assessments, student, "student"),
+                              (list_classrooms, student, "student")):
+        same = walk_keyset(conn, fn, user_id, role) == walk_keyset(mysql_conn, fn, user_id, role)
+        print(f"{fn.__name__} {role}: MySQL pages {'identical' if same else 'DIFFER'}")
@@ -0,0 +1,53 @@
+"""
+Benchmark: login requests/sec under concurrency, hashing pool on vs off
+Each mode runs in its own process so the pool settings are read fresh.
+
+Usage: python bench_login.py [threads] [logins_per_thread]
+"""
+import os, subprocess, sys, tempfile, threading, time
+
+threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+
+def run_mode(workers):
+    os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["PASSWORD_POOL_WORKERS"] = str(workers)
+    from passlib.hash import pbkdf2_sha256
+    from app import create_app
+
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, RATELIMIT_ENABLED=False, TESTING=True)
+    with app.app_context():
+        from app.db import get_db
+        db = get_db()
+        db.execute("INSERT INTO users(email,password_hash,role,full_name) VALUES(?,?,?,?)",
+                   ("bench@ai.com", pbkdf2_sha256.hash("password123"), "student", "Bench User"))
+        db.commit()
+
+    status = {}
+
+    def worker():
+        client = app.test_client()
+        for _ in range(per_thread):
+            resp = client.post("/login", data={"email": "bench@ai.com", "password": "password123"})
+            status[resp.status_code] = status.get(resp.status_code, 0) + 1
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    label = f"pool ({workers} procs)" if workers else "inline"
+    print(f"{label:<18} {threads * per_thread / elapsed:8.1f} logins/s  statuses={status}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3:
+        run_mode(int(sys.argv[3]))
+    else:
+        print(f"{threads} concurrent clients x {per_thread} logins")
+        for workers in (0, os.cpu_count() or 2):
+            subprocess.run([sys.executable, __file__, str(threads), str(per_thread), str(workers)], check=True)
@@ -0,0 +1,58 @@
+"""
+Benchmark: page-parallel OCR throughput by worker count
+Renders a multi-page "scanned" PDF (text drawn into images, no text layer),
+then OCRs it with 1, 2, 4... workers up to the available cores. The page
+cache is cleared between runs; the last line re-submits the same file to
+show the content-hash hit.
+
+Usage: python bench_ocr.py [pages]
+"""
+import os, sys, tempfile, time
+from PIL import Image, ImageDraw
+
+pages = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+
+def scanned_pdf(path):
+    images = []
+    for p in range(pages):
+        image = Image.new("L", (1700, 2200), 255)
+        draw = ImageDraw.Draw(image)
+        for line in range(40):
+            draw.text((120, 120 + line * 50), f"Page {p + 1} line {line + 1}: the quick brown fox jumps over the lazy dog", fill=0)
+        images.append(image)
+    images[0].save(path, save_all=True, append_images=images[1:], resolution=200)
+
+
+def main():
+    from app import create_app
+    from app.db import get_db
+    from app.ocr_engine import available_cores, extract
+    path = os.path.join(tempfile.mkdtemp(), "scan.pdf")
+    scanned_pdf(path)
+    app = create_app()
+    cores = available_cores()
+    counts = sorted({1, cores} | {w for w in (2, 4, 8, 16, 32) if w < cores})
+
+    print(f"{pages}-page scanned PDF, {cores} cores available")
+    print(f"{'workers':>8} {'seconds':>9} {'pages/s':>9} {'speedup':>8}")
+    base = None
+    with app.app_context():
+        for workers in counts:
+            db = get_db(readonly=False)
+            db.execute("DELETE FROM ocr_pages")
+            db.commit()
+            app.config["OCR_WORKERS"] = workers
+            start = time.perf_counter()
+            extract(path)
+            elapsed = time.perf_counter() - start
+            base = base or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {pages / elapsed:>9.2f} {base / elapsed:>7.2f}x")
+        start = time.perf_counter()
+        result = extract(path)
+        print(f"repeat upload: {time.perf_counter() - start:.3f}s, {result['cached_pages']}/{pages} pages from cache")
+
+
+if __name__ == "__main__":
+    main()
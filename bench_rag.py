@@ -0,0 +1,49 @@
+"""
+Benchmark: RAG namespace index recall@k and query latency by corpus size
+Uses clustered synthetic embeddings (384-d like all-MiniLM-L6-v2) so no model
+download is needed; exact brute-force search provides the ground truth.
+
+Usage: python bench_rag.py [sizes...]      e.g. python bench_rag.py 10000 100000 300000
+"""
+import statistics, sys, tempfile, time
+import faiss
+import numpy as np
+from app.vector_index import NamespaceIndex
+
+DIM, K, QUERIES, BATCH = 384, 10, 500, 20000
+sizes = [int(s) for s in sys.argv[1:]] or [10000, 100000, 300000]
+rng = np.random.default_rng(7)
+
+
+def corpus(n):
+    centers = rng.standard_normal((max(n // 500, 8), DIM)).astype("float32")
+    labels = rng.integers(0, len(centers), n)
+    return centers[labels] + 0.35 * rng.standard_normal((n, DIM)).astype("float32")
+
+
+print(f"{'chunks':>8} {'index':>6} {'build s':>8} {'recall@' + str(K):>10} {'p50 ms':>8} {'p95 ms':>8}")
+for n in sizes:
+    vectors = corpus(n)
+    index = NamespaceIndex(tempfile.mkdtemp(), "bench")
+    start = time.perf_counter()
+    for i in range(0, n, BATCH):  # appended in ingest-sized batches
+        part = vectors[i:i + BATCH]
+        index.add(part, [("bench", j, "") for j in range(i, i + len(part))])
+    build = time.perf_counter() - start
+
+    stored = np.ascontiguousarray(index.vectors())
+    exact = faiss.IndexFlatIP(DIM)
+    exact.add(stored)
+    queries = stored[rng.choice(n, QUERIES, replace=False)] + 0.05 * rng.standard_normal((QUERIES, DIM)).astype("float32")
+    faiss.normalize_L2(queries)
+    _, truth = exact.search(queries, K)
+
+    latencies, hits = [], 0
+    for q, expected in zip(queries, truth):
+        t0 = time.perf_counter()
+        _, ids = index.search_vectors(q, K)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        hits += len(set(ids[0]) & set(expected))
+    p95 = statistics.quantiles(latencies, n=100)[94]
+    print(f"{n:>8} {index._info('kind'):>6} {build:8.1f} {hits / (QUERIES * K):10.3f} "
+          f"{statistics.median(latencies):8.2f} {p95:8.2f}")
@@ -0,0 +1,67 @@
+"""
+Benchmark: concurrent SQLite writers (e.g. a burst of assessment submissions)
+Each process simulates a gunicorn worker handling write requests.
+
+  default - fresh connection per request, rollback journal (old behaviour)
+  wal     - per-worker persistent connection from connect_sqlite()
+
+Usage: python bench_sqlite_writers.py [workers] [requests_per_worker]
+"""
+import os, sqlite3, sys, tempfile, time
+from multiprocessing import Pool
+from app.db import connect_sqlite
+
+workers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+per_worker = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+DDL = """CREATE TABLE IF NOT EXISTS bench_submissions(
+    id INTEGER PRIMARY KEY, student_id INTEGER, answers_json TEXT, score REAL)"""
+
+
+def _request(conn, worker, i):
+    conn.execute("SELECT COUNT(*) FROM bench_submissions WHERE student_id=?", (worker,)).fetchone()
+    conn.execute("INSERT INTO bench_submissions(student_id,answers_json,score) VALUES(?,?,?)",
+                 (worker, '["N","d/t","9.8"]', 3.0))
+    conn.commit()
+
+
+def _worker(args):
+    mode, path, worker = args
+    errors = 0
+    conn = connect_sqlite(path) if mode == "wal" else None
+    for i in range(per_worker):
+        try:
+            if mode == "wal":
+                _request(conn, worker, i)
+            else:
+                c = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+                try:
+                    _request(c, worker, i)
+                finally:
+                    c.close()
+        except sqlite3.OperationalError:
+            errors += 1
+            if conn is not None and conn.in_transaction:
+                conn.rollback()
+    return errors
+
+
+def run(mode):
+    path = os.path.join(tempfile.mkdtemp(), f"{mode}.db")
+    conn = sqlite3.connect(path)
+    conn.execute(DDL)
+    conn.close()
+    start = time.perf_counter()
+    with Pool(workers) as pool:
+        errors = sum(pool.map(_worker, [(mode, path, w) for w in range(workers)]))
+    elapsed = time.perf_counter() - start
+    ok = workers * per_worker - errors
+    print(f"{mode:<8} {ok / elapsed:10.0f} writes/s  {errors:6d} 'database is locked' errors  ({elapsed:.2f}s)")
+    return ok / elapsed
+
+
+if __name__ == "__main__":
+    print(f"{workers} workers x {per_worker} write requests")
+    before = run("default")
+    after = run("wal")
+    print(f"throughput gain: {after / before:.1f}x")
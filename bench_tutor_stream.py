@@ -0,0 +1,94 @@
+"""
+Benchmark: tutor time-to-first-token with SSE streaming
+A local fake Gemini server streams a reply token by token (TOKEN_DELAY
+apart); the app talks to it over REST via GEMINI_API_ENDPOINT. Time to the
+first `token` event is compared with time to the `done` event, which is what
+a client of the non-streaming endpoint waits for.
+
+Usage: python bench_tutor_stream.py [requests] [tokens_per_reply]
+"""
+import http.client, json, os, statistics, sys, tempfile, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode
+
+requests_n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+tokens = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+TOKEN_DELAY = 0.03
+
+
+class FakeGemini(BaseHTTPRequestHandler):
+    """Streams a JSON array of GenerateContentResponse chunks, like the REST API"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b"[")
+        for i in range(tokens):
+            chunk = {"candidates": [{"content": {"parts": [{"text": f"tok{i} "}], "role": "model"}, "index": 0}]}
+            if i == tokens - 1:
+                chunk["candidates"][0]["finishReason"] = 1
+            self.wfile.write((("," if i else "") + json.dumps(chunk)).encode())
+            self.wfile.flush()
+            time.sleep(TOKEN_DELAY)
+        self.wfile.write(b"]")
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    fake = ThreadingHTTPServer(("127.0.0.1", 0), FakeGemini)
+    threading.Thread(target=fake.serve_forever, daemon=True).start()
+    os.environ["GEMINI_API_ENDPOINT"] = f"http://127.0.0.1:{fake.server_port}"
+    os.environ["GEMINI_API_KEY"] = "bench"
+    os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    from passlib.hash import pbkdf2_sha256
+    from werkzeug.serving import make_server
+    from app import create_app
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, RATELIMIT_ENABLED=False, TUTOR_CACHE_ENABLED=False)
+    with app.app_context():
+        from app.db import get_db
+        db = get_db()
+        db.execute("INSERT INTO users(email,password_hash,role,full_name) VALUES(?,?,?,?)",
+                   ("bench@ai.com", pbkdf2_sha256.hash("password123"), "student", "Bench User"))
+        db.commit()
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port)
+    conn.request("POST", "/login", urlencode({"email": "bench@ai.com", "password": "password123"}),
+                 {"Content-Type": "application/x-www-form-urlencoded"})
+    resp = conn.getresponse()
+    resp.read()
+    cookie = resp.getheader("Set-Cookie").split(";")[0]
+
+    ttft, total = [], []
+    for _ in range(requests_n):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_port)
+        start = time.perf_counter()
+        conn.request("POST", "/api/v1/tutor/chat/stream", json.dumps({"message": "Explain Newton's second law"}),
+                     {"Content-Type": "application/json", "Cookie": cookie})
+        resp = conn.getresponse()
+        first = None
+        for line in resp:
+            if line.startswith(b"event: token") and first is None:
+                first = time.perf_counter() - start
+            if line.startswith(b"event: done") or line.startswith(b"event: error"):
+                break
+        total.append(time.perf_counter() - start)
+        ttft.append(first if first is not None else total[-1])
+        conn.close()
+
+    print(f"{requests_n} replies x {tokens} tokens, {TOKEN_DELAY * 1000:.0f}ms/token from fake Gemini")
+    print(f"time to first token (stream)   p50 {statistics.median(ttft) * 1000:8.1f}ms  max {max(ttft) * 1000:8.1f}ms")
+    print(f"time to full reply (blocking)  p50 {statistics.median(total) * 1000:8.1f}ms  max {max(total) * 1000:8.1f}ms")
+    server.shutdown()
+    fake.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -16,19 +16,109 @@ class Config:
     SQLITE_PATH = os.getenv("SQLITE_PATH", "instance/app.db")
     FORCE_DB = os.getenv("FORCE_DB", "0") == "1"
 
+    # SQLite tuning - "wal" keeps per-thread connections with WAL journaling
+    SQLITE_MODE = os.getenv("SQLITE_MODE", "default")
+    SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # ms to wait on a locked database
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000"))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+    # MySQL connection pool (one per worker process)
+    MYSQL_POOL_SIZE = int(os.getenv("MYSQL_POOL_SIZE", "5"))
+    MYSQL_POOL_MAX_OVERFLOW = int(os.getenv("MYSQL_POOL_MAX_OVERFLOW", "10"))
+    MYSQL_POOL_TIMEOUT = float(os.getenv("MYSQL_POOL_TIMEOUT", "10"))  # seconds to wait for a free connection
+    MYSQL_POOL_IDLE_TIMEOUT = int(os.getenv("MYSQL_POOL_IDLE_TIMEOUT", "300"))  # seconds before an idle connection is dropped
+    MYSQL_POOL_PRE_PING = os.getenv("MYSQL_POOL_PRE_PING", "1") == "1"
+
     # Redis / RQ
     REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     RQ_DEFAULT_QUEUE = "rag-jobs"
 
+    # Job backend: "rq", "local" (jobs table + worker threads) or "auto" (rq if Redis answers)
+    JOB_BACKEND = os.getenv("JOB_BACKEND", "auto")
+    JOB_MAX_RETRIES = int(os.getenv("JOB_MAX_RETRIES", "2"))
+    JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "5"))  # seconds, doubled per attempt
+    JOB_LOCAL_WORKERS = int(os.getenv("JOB_LOCAL_WORKERS", "2"))  # threads per process
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+    JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "120"))  # requeue jobs of a silent worker
+    JOB_EVENTS_MAX_SUBSCRIBERS = int(os.getenv("JOB_EVENTS_MAX_SUBSCRIBERS", "100"))  # long-poll/SSE per process
+    JOB_EVENTS_MAX_WAIT = float(os.getenv("JOB_EVENTS_MAX_WAIT", "60"))
+    JOB_EVENTS_RECHECK = float(os.getenv("JOB_EVENTS_RECHECK", "5"))  # safety re-read without an event
+    JOB_EVENTS_KEEPALIVE = float(os.getenv("JOB_EVENTS_KEEPALIVE", "15"))
+
+    # user_loader cache ("local" per worker, or "redis" shared via REDIS_URL)
+    USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "local")
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))  # seconds
+
+    # Password hashing (process pool, 0 workers = hash on the request thread)
+    PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))  # stored hashes are upgraded on login
+    PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", "2"))
+    PASSWORD_POOL_QUEUE = int(os.getenv("PASSWORD_POOL_QUEUE", "32"))  # pending hashes before rejecting
+    PASSWORD_POOL_TIMEOUT = float(os.getenv("PASSWORD_POOL_TIMEOUT", "10"))
+
     # AI
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
     GOOGLE_AI_API_KEY = os.getenv("GOOGLE_AI_API_KEY", "")
     GEMINI_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-2.5-flash")
+    GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT", "")  # override, e.g. http://127.0.0.1:8089 for a fake server
+
+    # Tutor semantic response cache (per worker, scoped per classroom)
+    TUTOR_CACHE_ENABLED = os.getenv("TUTOR_CACHE_ENABLED", "1") == "1"
+    TUTOR_CACHE_THRESHOLD = float(os.getenv("TUTOR_CACHE_THRESHOLD", "0.92"))  # cosine similarity for a hit
+    TUTOR_CACHE_TTL = int(os.getenv("TUTOR_CACHE_TTL", "3600"))
+    TUTOR_CACHE_SIZE = int(os.getenv("TUTOR_CACHE_SIZE", "2000"))
+
+    # Tutor context - OCR, MySQL and RAG queried in parallel
+    TUTOR_CONTEXT_DEADLINE_MS = int(os.getenv("TUTOR_CONTEXT_DEADLINE_MS", "800"))  # slower sources are dropped
+    TUTOR_CONTEXT_TOKEN_BUDGET = int(os.getenv("TUTOR_CONTEXT_TOKEN_BUDGET", "1500"))
+    TUTOR_CONTEXT_WORKERS = int(os.getenv("TUTOR_CONTEXT_WORKERS", "8"))
+    TUTOR_CONTEXT_MAX_OVERDUE = int(os.getenv("TUTOR_CONTEXT_MAX_OVERDUE", "2"))  # per source, calls past the deadline
+
+    # Monitoring - per-request query/timing stats and /metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+    SLOW_REQUEST_QUERIES = int(os.getenv("SLOW_REQUEST_QUERIES", "50"))
+
+    # RAG vector index (one FAISS index per namespace, memory-mapped by readers)
+    RAG_INDEX_DIR = os.getenv("RAG_INDEX_DIR", "instance/rag")
+    RAG_SOURCE_DIR = os.getenv("RAG_SOURCE_DIR", "uploads/rag")  # <namespace>/<files> walked by /rag/reindex
+    RAG_EMBEDDING_CACHE = os.getenv("RAG_EMBEDDING_CACHE", "instance/rag/embeddings.db")
+    RAG_EMBEDDING_MODEL = os.getenv("RAG_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    RAG_FLAT_MAX = int(os.getenv("RAG_FLAT_MAX", "20000"))  # exact search up to this many chunks
+    RAG_IVF_MIN = int(os.getenv("RAG_IVF_MIN", "200000"))  # HNSW below, IVF from here on
+    RAG_IVF_NPROBE = int(os.getenv("RAG_IVF_NPROBE", "16"))
+    RAG_HNSW_EF_SEARCH = int(os.getenv("RAG_HNSW_EF_SEARCH", "64"))
+    RAG_CHUNK_SIZE = int(os.getenv("RAG_CHUNK_SIZE", "1000"))  # characters
+    RAG_CHUNK_OVERLAP = int(os.getenv("RAG_CHUNK_OVERLAP", "150"))
+    RAG_EMBED_BATCH = int(os.getenv("RAG_EMBED_BATCH", "64"))  # chunks embedded and indexed together
+    RAG_INGEST_FLUSH_EVERY = int(os.getenv("RAG_INGEST_FLUSH_EVERY", "20"))  # batches between index writes
 
     # File uploads
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "uploads")
     MAX_CONTENT_LENGTH = 25 * 1024 * 1024  # 25MB
 
+    # OCR - pages are processed in a process pool
+    OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0"))  # 0 = available cores
+    OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+    OCR_LANG = os.getenv("OCR_LANG", "eng")
+    OCR_MIN_TEXT_CHARS = int(os.getenv("OCR_MIN_TEXT_CHARS", "32"))  # PDF text layer used as-is above this
+
+    # Data tools
+    DATA_FIT_WORKERS = int(os.getenv("DATA_FIT_WORKERS", "0"))  # nonlinear fits, 0 = cores
+    DATA_FIT_MAX_SERIES = int(os.getenv("DATA_FIT_MAX_SERIES", "1000"))
+    DATA_MC_MAX_DRAWS = int(os.getenv("DATA_MC_MAX_DRAWS", "10000000"))  # Monte Carlo samples x array length
+
+    # Listings (keyset pagination)
+    LISTING_MAX_LIMIT = int(os.getenv("LISTING_MAX_LIMIT", "100"))
+
+    # Streaming exports
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))  # rows fetched and encoded per chunk
+    EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+
+    # Auto-grading
+    GRADING_CACHE_SIZE = int(os.getenv("GRADING_CACHE_SIZE", "512"))  # compiled answer keys per process
+    GRADING_BATCH_SIZE = int(os.getenv("GRADING_BATCH_SIZE", "1000"))  # submissions per regrade batch
+
     # Email Configuration
     MAIL_SERVER = os.getenv("MAIL_SERVER", "smtp.gmail.com")
     MAIL_PORT = int(os.getenv("MAIL_PORT", "587"))
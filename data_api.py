@@ -0,0 +1,103 @@
+"""
+Data analysis endpoints (/api/v1/data/*)
+/analyze takes the JSON {"data": [...]} body as before, or a large array as
+.npy (application/x-npy), raw little-endian floats (application/octet-stream,
+?dtype=float64|float32) or CSV (text/csv, ?column=), sent as the request body
+or as an uploaded `file`; those are reduced chunk by chunk (data_stats.py).
+/fit/batch fits many series in one call (data_fit.py), /propagate evaluates
+cached compiled formulas over scalars or arrays (data_propagate.py).
+"""
+import os
+from flask import Blueprint, abort, current_app, jsonify, request
+from flask_login import login_required
+from .data_fit import InvalidSeries, fit_batch
+from .data_propagate import output_size, propagate as propagate_errors
+from .data_stats import analyze_chunks, iter_csv, iter_npy, iter_raw
+
+data_bp = Blueprint("data_api", __name__)
+
+EXTENSION_TYPES = {".npy": "application/x-npy", ".csv": "text/csv", ".bin": "application/octet-stream",
+                   ".raw": "application/octet-stream", ".f64": "application/octet-stream"}
+
+
+def _bad_request(message):
+    response = jsonify({"error": message})
+    response.status_code = 400
+    return response
+
+
+def _array_source():
+    """(mimetype, binary stream) for a large-array request, None for the JSON body"""
+    upload = request.files.get("file")
+    if upload is not None:
+        ext = os.path.splitext(upload.filename or "")[1].lower()
+        if ext == ".f32":
+            return "application/octet-stream", upload.stream, "float32"
+        return EXTENSION_TYPES.get(ext, upload.mimetype), upload.stream, None
+    if request.mimetype in ("application/x-npy", "application/octet-stream", "text/csv"):
+        return request.mimetype, request.stream, None
+    return None
+
+
+@data_bp.route("/api/v1/data/analyze", methods=["POST"])
+@login_required
+def analyze():
+    bins = request.args.get("bins", 20, type=int)
+    if not 1 <= bins <= 1000:
+        return _bad_request("bins must be between 1 and 1000")
+    source = _array_source()
+    try:
+        if source is None:
+            data = (request.get_json(silent=True) or {}).get("data")
+            if not isinstance(data, list) or not data:
+                return _bad_request("data must be a non-empty list of numbers")
+            return jsonify(analyze_chunks([data], bins))
+        mimetype, stream, dtype = source
+        if mimetype == "application/x-npy":
+            chunks = iter_npy(stream)
+        elif mimetype == "application/octet-stream":
+            chunks = iter_raw(stream, dtype or request.args.get("dtype", "float64"))
+        elif mimetype == "text/csv":
+            chunks = iter_csv(stream, request.args.get("column"))
+        else:
+            abort(415)
+        return jsonify(analyze_chunks(chunks, bins))
+    except (ValueError, TypeError) as e:
+        return _bad_request(str(e))
+
+
+@data_bp.route("/api/v1/data/fit/batch", methods=["POST"])
+@login_required
+def fit_many():
+    payload = request.get_json(silent=True) or {}
+    series = payload.get("series")
+    if not isinstance(series, list) or not series or not all(isinstance(s, dict) for s in series):
+        return _bad_request("series must be a non-empty list of {x, y} objects")
+    if len(series) > current_app.config.get("DATA_FIT_MAX_SERIES", 1000):
+        return _bad_request("too many series in one request")
+    try:
+        return jsonify({"results": fit_batch(series, payload.get("kind") or "linear")})
+    except InvalidSeries as e:
+        return _bad_request(str(e))
+
+
+@data_bp.route("/api/v1/data/propagate", methods=["POST"])
+@login_required
+def propagate():
+    payload = request.get_json(silent=True) or {}
+    formula = payload.get("formula")
+    if not isinstance(formula, str) or not formula.strip():
+        return _bad_request("formula is required")
+    samples = payload.get("samples", 10000)
+    if not isinstance(samples, int) or samples < 2:
+        return _bad_request("samples must be an integer >= 2")
+    try:
+        values, errors = payload.get("values"), payload.get("errors")
+        if payload.get("mode") == "montecarlo":
+            # errors arrays broadcast against scalar values, so both set the draw count
+            if samples * output_size(values, errors) > current_app.config.get("DATA_MC_MAX_DRAWS", 10_000_000):
+                return _bad_request("samples x array length is too large")
+        return jsonify(propagate_errors(formula, values, errors, payload.get("mode") or "linear",
+                                        samples, payload.get("seed")))
+    except (ValueError, TypeError, AttributeError) as e:
+        return _bad_request(str(e))
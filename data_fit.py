@@ -0,0 +1,218 @@
+"""
+Batched curve fitting for /data/fit/batch
+Kinds that are linear in their parameters (linear, polynomial, logarithmic)
+are fitted together: series are zero-padded to a common length (padded rows
+add nothing to the residual) and solved as one stacked QR least-squares
+problem per design shape. Only series within a factor of two in length share
+a batch, so padding at most doubles memory instead of scaling with the
+longest series times the number of series. Nonlinear kinds go through scipy curve_fit in a
+process pool. Parameters follow numpy.polyfit order (highest power first).
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from flask import current_app
+
+LINEAR_KINDS = {"linear", "polynomial", "quadratic", "logarithmic"}
+NONLINEAR_KINDS = {"exponential", "power", "gaussian"}
+PARAM_NAMES = {
+    "linear": ["slope", "intercept"],
+    "logarithmic": ["a", "b"],  # a*ln(x) + b
+    "exponential": ["a", "b"],  # a*exp(b*x)
+    "power": ["a", "b"],  # a*x**b
+    "gaussian": ["amplitude", "mean", "sigma"],
+}
+
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+
+
+class InvalidSeries(ValueError):
+    """A malformed request rather than a series that cannot be fitted, the whole batch is rejected"""
+
+
+def _degree(kind, degree):
+    if kind in ("linear", "logarithmic"):
+        return 1
+    if kind == "quadratic":
+        return 2
+    if degree is None:
+        return 2
+    if isinstance(degree, bool) or not isinstance(degree, (int, float)) or degree != int(degree) or degree < 1:
+        raise InvalidSeries("degree must be an integer >= 1")
+    return int(degree)
+
+
+def _features(kind, x):
+    if kind == "logarithmic":
+        if np.any(x <= 0):
+            raise ValueError("logarithmic fit needs x > 0")
+        return np.log(x)
+    return x
+
+
+def _goodness(y, fitted, n_params):
+    residuals = y - fitted
+    ssr = float(residuals @ residuals)
+    sst = float(np.square(y - y.mean()).sum())
+    return {
+        "r_squared": 1.0 - ssr / sst if sst > 0 else 1.0,
+        "rmse": float(np.sqrt(ssr / len(y))),
+        "chi2_reduced": ssr / (len(y) - n_params) if len(y) > n_params else None,
+    }
+
+
+def fit_linear_batch(series, kind, degree=None):
+    """Fit all series (list of (x, y) float arrays) with one stacked lstsq, returns result dicts"""
+    deg = _degree(kind, degree)
+    p = deg + 1
+    lengths = np.array([len(x) for x, _ in series])
+    mask = np.arange(lengths.max()) < lengths[:, None]
+    xs = np.zeros(mask.shape)
+    target = np.zeros(mask.shape)
+    xs[mask] = np.concatenate([_features(kind, x) for x, _ in series])
+    target[mask] = np.concatenate([y for _, y in series])
+    # padded rows of the design are all zero, so they add nothing to the fit
+    design = np.where(mask[..., None], xs[..., None] ** np.arange(deg, -1, -1), 0.0)
+
+    q, r = np.linalg.qr(design)
+    params = np.linalg.solve(r, np.einsum("slp,sl->sp", q, target)[..., None])[..., 0]
+    fitted = np.einsum("slp,sp->sl", design, params)
+    ssr = np.square(target - fitted).sum(axis=1)
+    means = target.sum(axis=1) / lengths
+    sst = np.square(np.where(mask, target - means[:, None], 0.0)).sum(axis=1)
+    dof = lengths - p
+    r_inv = np.linalg.inv(r)
+    cov_unscaled = r_inv @ np.swapaxes(r_inv, 1, 2)  # (R^T R)^-1
+    variance = ssr / np.maximum(dof, 1)
+    errors = np.sqrt(np.diagonal(cov_unscaled, axis1=1, axis2=2) * variance[:, None])
+    r_squared = np.where(sst > 0, 1.0 - ssr / np.where(sst > 0, sst, 1.0), 1.0)
+    rmse = np.sqrt(ssr / lengths)
+
+    names = PARAM_NAMES.get(kind)
+    results = []
+    for i, n in enumerate(lengths.tolist()):
+        result = {"kind": kind, "n": n, "params": params[i].tolist(),
+                  "errors": errors[i].tolist() if dof[i] > 0 else None,
+                  "r_squared": float(r_squared[i]), "rmse": float(rmse[i]),
+                  "chi2_reduced": float(variance[i]) if dof[i] > 0 else None}
+        if names:
+            result["param_names"] = names
+        results.append(result)
+    return results
+
+
+def _model(kind):
+    if kind == "exponential":
+        return lambda x, a, b: a * np.exp(b * x)
+    if kind == "power":
+        return lambda x, a, b: a * np.power(x, b)
+    return lambda x, a, mu, sigma: a * np.exp(-np.square(x - mu) / (2 * sigma ** 2))
+
+
+def _initial_guess(kind, x, y):
+    if kind == "gaussian":
+        return [float(y.max()), float(x[np.argmax(y)]), float(x.std() or 1.0)]
+    if kind == "power" and np.all(x > 0) and np.all(y > 0):
+        b, log_a = np.polyfit(np.log(x), np.log(y), 1)
+        return [float(np.exp(log_a)), float(b)]
+    if kind == "exponential" and np.all(y > 0):
+        b, log_a = np.polyfit(x, np.log(y), 1)
+        return [float(np.exp(log_a)), float(b)]
+    return [1.0, 1.0]
+
+
+def fit_nonlinear(kind, x, y):
+    """Fit one series with curve_fit (runs in a pool worker), returns a result dict"""
+    from scipy.optimize import curve_fit
+    model = _model(kind)
+    try:
+        params, cov = curve_fit(model, x, y, p0=_initial_guess(kind, x, y), maxfev=5000)
+    except (RuntimeError, ValueError) as e:
+        return {"kind": kind, "n": len(x), "error": str(e)}
+    errors = np.sqrt(np.diag(cov))
+    result = {"kind": kind, "n": len(x), "params": params.tolist(), "param_names": PARAM_NAMES[kind],
+              "errors": errors.tolist() if np.all(np.isfinite(errors)) else None}
+    result.update(_goodness(y, model(x, *params), len(params)))
+    return result
+
+
+def _get_pool(workers):
+    global _pool, _pool_key
+    key = (os.getpid(), workers)
+    if _pool is None or _pool_key != key:
+        with _pool_lock:
+            if _pool is None or _pool_key != key:
+                if _pool is not None and _pool_key[0] == os.getpid():
+                    _pool.shutdown(wait=False)
+                _pool = ProcessPoolExecutor(max_workers=workers)
+                _pool_key = key
+    return _pool
+
+
+def _check(entry, default_kind):
+    kind = entry.get("kind") or default_kind
+    if kind not in LINEAR_KINDS | NONLINEAR_KINDS:
+        raise ValueError(f"unknown kind '{kind}'")
+    x = np.asarray(entry.get("x"), dtype=np.float64)
+    y = np.asarray(entry.get("y"), dtype=np.float64)
+    if x.ndim != 1:
+        raise InvalidSeries("x must be a flat list of numbers, multivariate fits are not supported")
+    if x.shape != y.shape:
+        raise ValueError("x and y must be lists of the same length")
+    mask = np.isfinite(x) & np.isfinite(y)
+    x, y = x[mask], y[mask]
+    degree = _degree(kind, entry.get("degree"))
+    if kind in LINEAR_KINDS and degree >= len(x):
+        raise ValueError(f"degree must be less than the number of points ({len(x)})")
+    n_params = degree + 1 if kind in LINEAR_KINDS else len(PARAM_NAMES[kind])
+    if len(np.unique(x)) < n_params:
+        raise ValueError(f"{kind} fit needs at least {n_params} distinct x values")
+    return kind, degree, x, y
+
+
+def fit_batch(entries, default_kind="linear"):
+    """Fit every {"x", "y", "kind"?, "degree"?, "id"?} entry, results in input order
+
+    Raises InvalidSeries for a malformed entry (bad degree, 2-D x); series
+    that just cannot be fitted get an {"error"} result instead.
+    """
+    results = [None] * len(entries)
+    groups, nonlinear = {}, []
+    for i, entry in enumerate(entries):
+        try:
+            kind, degree, x, y = _check(entry, default_kind)
+            if kind in LINEAR_KINDS:
+                _features(kind, x)  # reject bad domains before they poison the batch
+        except InvalidSeries as e:
+            raise InvalidSeries(f"series[{i}]: {e}")
+        except (ValueError, TypeError) as e:
+            results[i] = {"error": str(e)}
+            continue
+        if kind in LINEAR_KINDS:
+            # bucket by power of two of the length, see the module docstring
+            groups.setdefault((kind, degree, len(x).bit_length()), []).append((i, x, y))
+        else:
+            nonlinear.append((i, kind, x, y))
+
+    for (kind, degree, _), members in groups.items():
+        fitted = fit_linear_batch([(x, y) for _, x, y in members], kind, degree)
+        for (i, _, _), result in zip(members, fitted):
+            results[i] = result
+
+    if len(nonlinear) > 1:
+        workers = current_app.config.get("DATA_FIT_WORKERS", 0) or os.cpu_count() or 1
+        pool = _get_pool(workers)
+        futures = [(i, pool.submit(fit_nonlinear, kind, x, y)) for i, kind, x, y in nonlinear]
+        for i, future in futures:
+            results[i] = future.result()
+    else:
+        for i, kind, x, y in nonlinear:
+            results[i] = fit_nonlinear(kind, x, y)
+
+    for entry, result in zip(entries, results):
+        if "id" in entry:
+            result["id"] = entry["id"]
+    return results
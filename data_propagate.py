@@ -0,0 +1,120 @@
+"""
+Error propagation for /data/propagate
+A formula is parsed, differentiated and lambdified to NumPy once and kept in
+an LRU cache keyed by the normalized formula text, so repeat requests only
+evaluate. values/errors may be numbers or equal-length arrays, evaluated in
+one vectorized call; mode="montecarlo" draws all samples at once instead of
+using the first-order (linear) approximation.
+"""
+import re
+from functools import lru_cache
+import numpy as np
+
+FORMULA_CACHE_SIZE = 256
+FORMULA_PATTERN = re.compile(r"^[A-Za-z0-9_+\-*/^()., ]+$")
+
+
+def normalize_formula(formula):
+    return re.sub(r"\s+", "", formula).replace("^", "**")
+
+
+class CompiledFormula:
+    def __init__(self, formula):
+        import sympy
+        if not FORMULA_PATTERN.match(formula) or "__" in formula:
+            raise ValueError("formula contains unsupported characters")
+        try:
+            expr = sympy.sympify(formula)
+        except (sympy.SympifyError, SyntaxError, TypeError) as e:
+            raise ValueError(f"could not parse formula: {e}")
+        symbols = sorted(expr.free_symbols, key=lambda s: s.name)
+        self.expression = str(expr)
+        self.variables = [s.name for s in symbols]
+        partials = [sympy.diff(expr, s) for s in symbols]
+        self.partials = {s.name: str(d) for s, d in zip(symbols, partials)}
+        self._value = sympy.lambdify(symbols, expr, "numpy")
+        self._gradient = [sympy.lambdify(symbols, d, "numpy") for d in partials]
+
+    def _args(self, values, shape):
+        missing = [v for v in self.variables if v not in values]
+        if missing:
+            raise ValueError(f"missing values for {', '.join(missing)}")
+        return [np.broadcast_to(values[v], shape) for v in self.variables]
+
+    def value(self, values, shape=()):
+        # constant expressions come back as scalars, broadcast them to the inputs
+        return np.broadcast_to(self._value(*self._args(values, shape)), shape)
+
+    def linear(self, values, errors, shape=()):
+        """First-order propagation for independent errors, returns (value, error)"""
+        args = self._args(values, shape)
+        variance = np.zeros(shape)
+        for name, grad in zip(self.variables, self._gradient):
+            variance = variance + np.square(np.broadcast_to(grad(*args), shape) * errors.get(name, 0.0))
+        return self.value(values, shape), np.sqrt(variance)
+
+    def monte_carlo(self, values, errors, shape=(), samples=10000, seed=None):
+        """Returns (mean, std, 2.5th percentile, 97.5th percentile) over `samples` normal draws"""
+        rng = np.random.default_rng(seed)
+        draws = {name: rng.normal(np.broadcast_to(values[name], shape), np.broadcast_to(errors.get(name, 0.0), shape),
+                                  size=(samples,) + shape)
+                 for name in self.variables}
+        out = self.value(draws, (samples,) + shape)
+        low, high = np.percentile(out, [2.5, 97.5], axis=0)
+        return out.mean(axis=0), out.std(axis=0, ddof=1), low, high
+
+
+@lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def _compile(normalized):
+    return CompiledFormula(normalized)
+
+
+def compile_formula(formula):
+    """Cached CompiledFormula for a formula string (raises ValueError for bad input)"""
+    return _compile(normalize_formula(formula))
+
+
+def _as_arrays(mapping, label):
+    if not isinstance(mapping, dict):
+        raise ValueError(f"{label} must be an object of variable -> number or list")
+    return {k: np.asarray(v, dtype=np.float64) for k, v in mapping.items()}
+
+
+def _out(array):
+    return array.tolist() if np.ndim(array) else float(array)
+
+
+def _shape(values, errors):
+    try:
+        return np.broadcast_shapes(*[a.shape for a in list(values.values()) + list(errors.values())])
+    except ValueError:
+        raise ValueError("array values and errors must have the same length")
+
+
+def output_size(values, errors):
+    """Number of results a request evaluates, arrays in values and errors both count"""
+    return int(np.prod(_shape(_as_arrays(values, "values"), _as_arrays(errors or {}, "errors"))))
+
+
+def propagate(formula, values, errors, mode="linear", samples=10000, seed=None):
+    compiled = compile_formula(formula)
+    values, errors = _as_arrays(values, "values"), _as_arrays(errors or {}, "errors")
+    shape = _shape(values, errors)
+    result = {"formula": compiled.expression, "variables": compiled.variables, "partials": compiled.partials,
+              "mode": mode}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if mode == "montecarlo":
+            mean, std, low, high = compiled.monte_carlo(values, errors, shape, samples, seed)
+            result.update(value=_out(compiled.value(values, shape)), mean=_out(mean), error=_out(std),
+                          interval_95=[_out(low), _out(high)], samples=samples)
+        elif mode == "linear":
+            value, error = compiled.linear(values, errors, shape)
+            result.update(value=_out(value), error=_out(error))
+        else:
+            raise ValueError("mode must be linear or montecarlo")
+    return result
+
+
+def formula_cache_stats():
+    info = _compile.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "entries": info.currsize}
@@ -0,0 +1,156 @@
+"""
+Streaming statistics for /data/analyze
+Large inputs (.npy, raw little-endian floats, CSV) are read in fixed-size
+chunks and folded into StreamingStats: count/mean/M2 are merged per chunk
+with Chan's parallel update, min/max exactly, and values go into a fine
+histogram whose range doubles as needed. The result has the same keys as the
+JSON path; median and histogram are exact while the input fits in one chunk
+and are read off the fine histogram (within one fine bin) beyond that.
+"""
+import numpy as np
+
+CHUNK_ELEMENTS = 256 * 1024
+FINE_BINS = 8192  # even, the range grows by merging bin pairs
+RAW_DTYPES = {"float64": "<f8", "float32": "<f4"}
+
+
+class StreamingStats:
+    def __init__(self, bins=20):
+        self.bins = bins
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.lo = None  # fine histogram: FINE_BINS bins of self.width from self.lo
+        self.width = None
+        self.fine = np.zeros(FINE_BINS, dtype=np.int64)
+        self.exact = []  # values kept while the input still fits in one chunk
+
+    def update(self, values):
+        x = np.asarray(values, dtype=np.float64).ravel()
+        x = x[np.isfinite(x)]
+        n = x.size
+        if not n:
+            return
+        chunk_mean = float(x.mean())
+        chunk_m2 = float(np.square(x - chunk_mean).sum())
+        # Chan et al. pairwise merge of (count, mean, M2)
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta * delta * self.count * n / total
+        self.count = total
+        lo, hi = float(x.min()), float(x.max())
+        self.min, self.max = min(self.min, lo), max(self.max, hi)
+        self._histogram(x, lo, hi)
+        if self.exact is not None:
+            self.exact.append(x)
+            if self.count > CHUNK_ELEMENTS:
+                self.exact = None
+
+    def _histogram(self, x, lo, hi):
+        if self.lo is None:
+            self.lo = lo
+            self.width = (hi - lo) / FINE_BINS or max(abs(lo), 1.0) * 1e-9
+        while lo < self.lo or hi >= self.lo + FINE_BINS * self.width:
+            merged = self.fine.reshape(-1, 2).sum(axis=1)
+            self.fine[:] = 0
+            if lo < self.lo:  # old range becomes the upper half
+                self.fine[FINE_BINS // 2:] = merged
+                self.lo -= FINE_BINS * self.width
+            else:
+                self.fine[:FINE_BINS // 2] = merged
+            self.width *= 2
+        idx = np.minimum(((x - self.lo) / self.width).astype(np.int64), FINE_BINS - 1)
+        self.fine += np.bincount(idx, minlength=FINE_BINS)
+
+    def result(self):
+        if not self.count:
+            raise ValueError("no finite values in data")
+        variance = self.m2 / (self.count - 1) if self.count > 1 else 0.0
+        if self.exact is not None:
+            values = np.concatenate(self.exact)
+            median = float(np.median(values))
+            counts, edges = np.histogram(values, bins=self.bins)
+        else:
+            median, counts, edges = self._from_fine()
+        return {
+            "count": int(self.count),
+            "mean": float(self.mean),
+            "median": median,
+            "std": float(np.sqrt(variance)),
+            "variance": float(variance),
+            "min": float(self.min),
+            "max": float(self.max),
+            "histogram": {"counts": [int(c) for c in counts], "bin_edges": [float(e) for e in edges]},
+        }
+
+    def _from_fine(self):
+        fine_edges = self.lo + self.width * np.arange(FINE_BINS + 1)
+        cdf = np.concatenate([[0], np.cumsum(self.fine)]).astype(np.float64)
+        median = float(np.clip(np.interp(self.count / 2, cdf, fine_edges), self.min, self.max))
+        edges = np.linspace(self.min, self.max, self.bins + 1)
+        cumulative = np.round(np.interp(edges, fine_edges, cdf))
+        cumulative[0], cumulative[-1] = 0, self.count
+        return median, np.diff(cumulative).astype(np.int64), edges
+
+
+def _read_exact(stream, size):
+    parts, remaining = [], size
+    while remaining:
+        data = stream.read(remaining)
+        if not data:
+            break
+        parts.append(data)
+        remaining -= len(data)
+    return b"".join(parts)
+
+
+def iter_npy(stream, chunk_elements=CHUNK_ELEMENTS):
+    """Chunks of a .npy stream; element order is irrelevant for the stats so any shape works"""
+    version = np.lib.format.read_magic(stream)
+    if version == (1, 0):
+        shape, _, dtype = np.lib.format.read_array_header_1_0(stream)
+    else:
+        shape, _, dtype = np.lib.format.read_array_header_2_0(stream)
+    if dtype.kind not in "fiu":
+        raise ValueError(f"unsupported .npy dtype {dtype}")
+    remaining = int(np.prod(shape))
+    while remaining:
+        n = min(chunk_elements, remaining)
+        data = _read_exact(stream, n * dtype.itemsize)
+        if len(data) != n * dtype.itemsize:
+            raise ValueError("truncated .npy data")
+        yield np.frombuffer(data, dtype=dtype)
+        remaining -= n
+
+
+def iter_raw(stream, dtype="float64", chunk_elements=CHUNK_ELEMENTS):
+    """Chunks of a raw little-endian float buffer"""
+    if dtype not in RAW_DTYPES:
+        raise ValueError(f"dtype must be one of {', '.join(RAW_DTYPES)}")
+    dt = np.dtype(RAW_DTYPES[dtype])
+    while True:
+        data = _read_exact(stream, chunk_elements * dt.itemsize)
+        if not data:
+            return
+        if len(data) % dt.itemsize:
+            raise ValueError(f"buffer length is not a multiple of {dt.itemsize} bytes")
+        yield np.frombuffer(data, dtype=dt)
+
+
+def iter_csv(stream, column=None, chunk_rows=CHUNK_ELEMENTS):
+    """Chunks of one CSV column (name or index, default the first), non-numbers skipped"""
+    import pandas as pd
+    if isinstance(column, str) and column.isdigit():
+        column = int(column)
+    for frame in pd.read_csv(stream, chunksize=chunk_rows, usecols=[column or 0]):
+        yield pd.to_numeric(frame.iloc[:, 0], errors="coerce").to_numpy(dtype=np.float64)
+
+
+def analyze_chunks(chunks, bins=20):
+    stats = StreamingStats(bins)
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats.result()
@@ -1,8 +1,16 @@
 import os
 import sqlite3
+import threading
 import mysql.connector
 from flask import g, current_app
 from urllib.parse import urlparse
+from .migrations import apply_migrations
+from .db_pool import ConnectionPool
+from .instrumentation import instrument_connection
+
+_mysql_pool = None
+_mysql_pool_lock = threading.Lock()
+_sqlite_local = threading.local()
 
 
 def init_db(app):
@@ -10,35 +18,106 @@ def init_db(app):
     with app.app_context():
         os.makedirs(os.path.dirname(app.config["SQLITE_PATH"]), exist_ok=True)
         os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+        migrate_db(app)
 
-def get_db():
-    """Get database connection - supports both SQLite and MySQL"""
-    conn = getattr(g, "_db_conn", None)
-    if conn is None:
-        if current_app.config.get("DATABASE_URL") and not current_app.config.get("SQLITE_FALLBACK"):
-            # MySQL connection
+def migrate_db(app):
+    """Apply pending schema migrations once per process start (never per request)"""
+    if app.config.get("DATABASE_URL") and not app.config.get("SQLITE_FALLBACK"):
+        try:
             conn = get_mysql_connection()
-        else:
-            # SQLite (dev default)
-            conn = get_sqlite_connection()
-        g._db_conn = conn
+        except Exception as e:
+            app.logger.error(f"Skipping MySQL migrations, connection failed: {e}")
+            return
+    else:
+        conn = sqlite3.connect(app.config["SQLITE_PATH"])
+        if app.config.get("SQLITE_MODE") == "wal":
+            # journal mode is persistent, switch once before workers connect
+            conn.execute("PRAGMA journal_mode=WAL")
+    try:
+        applied = apply_migrations(conn)
+        if applied:
+            app.logger.info(f"Applied schema migrations: {applied}")
+    finally:
+        conn.close()
+
+def get_db(readonly=False):
+    """Get database connection - supports both SQLite and MySQL
+
+    In SQLite "wal" mode, readonly=True opts into a separate query_only read
+    connection; everything else, GET handlers included, gets the writer.
+    """
+    if current_app.config.get("DATABASE_URL") and not current_app.config.get("SQLITE_FALLBACK"):
+        conn = getattr(g, "_db_conn", None)
+        if conn is None:
+            # MySQL connection
+            conn = g._db_conn = _instrumented(get_mysql_connection())
+        return conn
+
+    # SQLite (dev default)
+    if current_app.config.get("SQLITE_MODE") != "wal":
+        readonly = False
+    attr = "_db_read_conn" if readonly else "_db_conn"
+    conn = getattr(g, attr, None)
+    if conn is None:
+        conn = _instrumented(get_sqlite_connection(readonly=readonly))
+        setattr(g, attr, conn)
     return conn
 
-def get_sqlite_connection():
-    """Get SQLite connection"""
-    path = current_app.config["SQLITE_PATH"]
-    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+def _instrumented(conn):
+    # a plain config lookup when metrics are off
+    return instrument_connection(conn) if current_app.config.get("METRICS_ENABLED") else conn
+
+def get_sqlite_connection(readonly=False):
+    """Get SQLite connection
+
+    Default mode opens a fresh connection per request. "wal" mode keeps one
+    writer and one reader connection alive per thread across requests.
+    """
+    cfg = current_app.config
+    path = cfg["SQLITE_PATH"]
+    if cfg.get("SQLITE_MODE") != "wal":
+        conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    conns = getattr(_sqlite_local, "conns", None)
+    if conns is None or _sqlite_local.pid != os.getpid():
+        conns = _sqlite_local.conns = {}
+        _sqlite_local.pid = os.getpid()
+    key = (path, readonly)
+    conn = conns.get(key)
+    if conn is None:
+        conn = conns[key] = connect_sqlite(
+            path,
+            readonly=readonly,
+            busy_timeout_ms=cfg.get("SQLITE_BUSY_TIMEOUT", 5000),
+            cache_size_kb=cfg.get("SQLITE_CACHE_SIZE_KB", 20000),
+            mmap_size=cfg.get("SQLITE_MMAP_SIZE", 0),
+        )
+    return conn
+
+def connect_sqlite(path, readonly=False, busy_timeout_ms=5000, cache_size_kb=20000, mmap_size=0):
+    """Open a long-lived SQLite connection tuned for concurrent access (WAL)"""
+    # IMMEDIATE takes the write lock at BEGIN so the busy timeout applies,
+    # instead of failing when a deferred read upgrades to a write
+    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES,
+                           timeout=busy_timeout_ms / 1000,
+                           isolation_level=None if readonly else "IMMEDIATE")
     conn.row_factory = sqlite3.Row
-    # ensure schema
-    _ensure_schema(conn)
+    if not readonly:
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+    conn.execute(f"PRAGMA cache_size=-{int(cache_size_kb)}")
+    conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    if readonly:
+        conn.execute("PRAGMA query_only=1")
     return conn
 
-def get_mysql_connection():
-    """Get MySQL connection"""
-    database_url = current_app.config["DATABASE_URL"]
+def _mysql_config(database_url):
     parsed = urlparse(database_url)
-    
-    config = {
+    return {
         'host': parsed.hostname,
         'port': parsed.port or 3306,
         'user': parsed.username,
@@ -46,39 +125,65 @@ def get_mysql_connection():
         'database': parsed.path.lstrip('/'),
         'autocommit': True,
     }
-    
-    conn = mysql.connector.connect(**config)
-    return conn
+
+def get_mysql_pool():
+    """Get the process-wide MySQL pool, created from Config on first use"""
+    global _mysql_pool
+    pool = _mysql_pool
+    # a pool inherited across fork (gunicorn --preload) must not be shared
+    if pool is None or pool.pid != os.getpid():
+        with _mysql_pool_lock:
+            pool = _mysql_pool
+            if pool is None or pool.pid != os.getpid():
+                cfg = current_app.config
+                params = _mysql_config(cfg["DATABASE_URL"])
+                pool = ConnectionPool(
+                    lambda: mysql.connector.connect(**params),
+                    size=cfg.get("MYSQL_POOL_SIZE", 5),
+                    max_overflow=cfg.get("MYSQL_POOL_MAX_OVERFLOW", 10),
+                    timeout=cfg.get("MYSQL_POOL_TIMEOUT", 10),
+                    idle_timeout=cfg.get("MYSQL_POOL_IDLE_TIMEOUT", 300),
+                    pre_ping=cfg.get("MYSQL_POOL_PRE_PING", True),
+                )
+                _mysql_pool = pool
+    return pool
+
+def pool_stats():
+    """Pool counters for monitoring, None when MySQL has not been used"""
+    pool = _mysql_pool
+    if pool is None or pool.pid != os.getpid():
+        return None
+    return pool.stats()
+
+def get_mysql_connection():
+    """Get MySQL connection from the pool (close() returns it)"""
+    return get_mysql_pool().connect()
 
 def get_mysql_data_connection():
     """Get a separate MySQL connection specifically for data queries"""
     try:
-        database_url = current_app.config.get("DATABASE_URL")
-        if not database_url:
+        if not current_app.config.get("DATABASE_URL"):
             return None
-            
-        parsed = urlparse(database_url)
-        config = {
-            'host': parsed.hostname,
-            'port': parsed.port or 3306,
-            'user': parsed.username,
-            'password': parsed.password,
-            'database': parsed.path.lstrip('/'),
-            'autocommit': True,
-        }
-        
-        return mysql.connector.connect(**config)
+        conn = get_mysql_pool().connect()
+        # released at teardown if the caller does not close it
+        g.setdefault("_db_extra", []).append(conn)
+        return conn
     except Exception as e:
         current_app.logger.error(f"Failed to connect to MySQL: {e}")
         return None
 
-def _ensure_schema(conn):
-    """Ensure schema exists - only for SQLite"""
-    if hasattr(conn, 'executescript'):  # SQLite
-        conn.executescript(open("db/schema.sql", "r", encoding="utf-8").read())
-        conn.commit()
-
 def close_db(e=None):
-    conn = getattr(g, "_db_conn", None)
-    if conn is not None:
-        conn.close()
+    persistent = (current_app.config.get("SQLITE_MODE") == "wal"
+                  and not (current_app.config.get("DATABASE_URL") and not current_app.config.get("SQLITE_FALLBACK")))
+    for attr in ("_db_conn", "_db_read_conn"):
+        conn = g.pop(attr, None)
+        if conn is None:
+            continue
+        if persistent:
+            # per-thread connection stays open, just drop anything uncommitted
+            if conn.in_transaction:
+                conn.rollback()
+        else:
+            conn.close()
+    for extra in g.pop("_db_extra", []):
+        extra.close()
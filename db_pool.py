@@ -0,0 +1,137 @@
+"""
+Process-wide MySQL connection pool
+Bounded size + overflow, idle timeout, pre-ping health checks and
+hit/miss/wait counters for monitoring.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became available within the pool timeout"""
+
+
+class PooledConnection:
+    """Thin proxy around a driver connection; close() hands it back to the pool"""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get("_conn")
+        if conn is None:
+            raise AttributeError(f"connection already returned to pool ({name})")
+        return getattr(conn, name)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+
+class ConnectionPool:
+    def __init__(self, connect, size=5, max_overflow=10, timeout=10.0,
+                 idle_timeout=300, pre_ping=True):
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.pre_ping = pre_ping
+        self.pid = os.getpid()
+        self._idle = deque()  # (conn, returned_at), most recently used on the right
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {"hits": 0, "misses": 0, "waits": 0, "timeouts": 0,
+                       "stale": 0, "expired": 0}
+
+    def connect(self):
+        """Check out a connection, returns a PooledConnection"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn = None
+            with self._cond:
+                while True:
+                    if self._idle:
+                        conn, returned_at = self._idle.pop()
+                        if self.idle_timeout and time.monotonic() - returned_at > self.idle_timeout:
+                            self._stats["expired"] += 1
+                            self._discard(conn)
+                            conn = None
+                            continue
+                        break
+                    if self._open < self.size + self.max_overflow:
+                        self._open += 1
+                        self._stats["misses"] += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(f"no MySQL connection available after {self.timeout}s")
+                    self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+            elif self.pre_ping and not self._ping(conn):
+                with self._cond:
+                    self._stats["stale"] += 1
+                    self._discard(conn)
+                continue
+            else:
+                with self._cond:
+                    self._stats["hits"] += 1
+            return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """Return a connection to the pool, overflow connections are closed"""
+        try:
+            if getattr(conn, "in_transaction", False):
+                conn.rollback()
+        except Exception:
+            with self._cond:
+                self._discard(conn)
+            return
+        with self._cond:
+            if len(self._idle) >= self.size:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return dict(self._stats, size=self.size, max_overflow=self.max_overflow,
+                        open=self._open, idle=len(self._idle),
+                        checked_out=self._open - len(self._idle))
+
+    def dispose(self):
+        with self._cond:
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+
+    def _discard(self, conn):
+        # caller holds self._cond
+        self._open -= 1
+        self._cond.notify()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _ping(conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
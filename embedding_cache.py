@@ -0,0 +1,90 @@
+"""
+Persistent embedding cache keyed by (model name, normalized chunk text hash)
+Backed by one SQLite file (WITHOUT ROWID, 16-byte keys, raw float32 vectors)
+so re-ingesting or reindexing only embeds text that was never seen before.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+import numpy as np
+from flask import current_app, has_app_context
+from .embeddings import embed, model_name
+
+LOOKUP_BATCH = 500
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+_local = threading.local()
+
+
+def normalize_text(text):
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def text_hash(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).digest()[:16]
+
+
+def _cache_path():
+    if has_app_context():
+        return current_app.config.get("RAG_EMBEDDING_CACHE", "instance/rag/embeddings.db")
+    return "instance/rag/embeddings.db"
+
+
+def _connect():
+    path = _cache_path()
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = conns[path] = sqlite3.connect(path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS embeddings (
+            model TEXT NOT NULL, hash BLOB NOT NULL, vector BLOB NOT NULL,
+            PRIMARY KEY (model, hash)) WITHOUT ROWID""")
+    return conn
+
+
+def cached_embed(texts, name=None):
+    """Embed texts, reusing cached vectors; returns an (n, dim) float32 array"""
+    texts = list(texts)
+    if not texts:
+        return np.zeros((0, 0), dtype="float32")
+    name = name or model_name()
+    keys = [text_hash(t) for t in texts]
+    conn = _connect()
+
+    found = {}
+    unique = list(dict.fromkeys(keys))
+    for i in range(0, len(unique), LOOKUP_BATCH):
+        part = unique[i:i + LOOKUP_BATCH]
+        rows = conn.execute(f"SELECT hash, vector FROM embeddings WHERE model=? AND hash IN ({','.join('?' * len(part))})",
+                            [name, *part]).fetchall()
+        found.update((bytes(h), np.frombuffer(v, dtype="float32")) for h, v in rows)
+
+    missing = [k for k in unique if k not in found]
+    if missing:
+        first_text = {}
+        for key, text in zip(keys, texts):
+            first_text.setdefault(key, text)
+        vectors = embed([first_text[k] for k in missing], name=name)
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO embeddings(model, hash, vector) VALUES(?,?,?)",
+                             [(name, k, v.tobytes()) for k, v in zip(missing, vectors)])
+        found.update(zip(missing, vectors))
+
+    with _stats_lock:
+        _stats["misses"] += len(missing)
+        _stats["hits"] += len(texts) - len(missing)
+    return np.stack([found[k] for k in keys]).astype("float32", copy=False)
+
+
+def embedding_cache_stats():
+    with _stats_lock:
+        total = _stats["hits"] + _stats["misses"]
+        return dict(_stats, hit_rate=_stats["hits"] / total if total else 0.0)
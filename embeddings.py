@@ -0,0 +1,38 @@
+"""
+Sentence-transformers embeddings shared by the RAG and tutor features
+Models are loaded once per process; vectors are float32 and L2-normalized so
+inner product == cosine similarity.
+"""
+import threading
+from flask import current_app, has_app_context
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def model_name():
+    if has_app_context():
+        return current_app.config.get("RAG_EMBEDDING_MODEL", DEFAULT_MODEL)
+    return DEFAULT_MODEL
+
+
+def get_embedding_model(name=None):
+    name = name or model_name()
+    model = _models.get(name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(name)
+            if model is None:
+                from sentence_transformers import SentenceTransformer
+                model = _models[name] = SentenceTransformer(name)
+    return model
+
+
+def embed(texts, name=None, batch_size=64):
+    """Embed a list of strings, returns an (n, dim) float32 array"""
+    import numpy as np
+    vectors = get_embedding_model(name).encode(list(texts), batch_size=batch_size,
+                                               normalize_embeddings=True, convert_to_numpy=True)
+    return np.ascontiguousarray(vectors, dtype="float32")
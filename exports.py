@@ -0,0 +1,177 @@
+"""
+Streaming CSV/JSON exports for analytics and admin data
+GET /api/v1/exports/<name>.<csv|json>[?gzip=1]
+
+Rows are read with a server-side cursor in EXPORT_BATCH_SIZE batches (an
+unbuffered cursor on its own connection for MySQL, plain cursor iteration on
+SQLite), encoded batch by batch and sent as a chunked response, optionally
+gzip-compressed on the fly. Only one batch is held in memory at a time, so
+peak memory does not depend on the size of the export.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from flask import Blueprint, Response, abort, current_app, request, stream_with_context
+from flask_login import current_user
+from .db import get_db, get_mysql_data_connection
+from .roles import role_required
+
+exports_bp = Blueprint("exports", __name__)
+
+_OWNED_CLASSROOMS = "SELECT id FROM classrooms WHERE created_by = ?"
+
+# name -> (roles, SELECT, teacher filter on the listed rows' classroom_id column or None)
+EXPORTS = {
+    "submissions": (("teacher", "admin"),
+                    "SELECT s.id, s.assignment_id, a.classroom_id, s.user_id, s.score, s.submitted_at "
+                    "FROM submissions s JOIN assignments a ON a.id = s.assignment_id",
+                    "a.classroom_id"),
+    "classrooms": (("teacher", "admin"),
+                   "SELECT k.classroom_id, c.name, k.members, k.submitters, k.submissions, k.score_sum, "
+                   "k.score_sq_sum, k.last_submitted_at "
+                   "FROM analytics_classroom k LEFT JOIN classrooms c ON c.id = k.classroom_id",
+                   "k.classroom_id"),
+    "assessments": (("teacher", "admin"),
+                    "SELECT k.assignment_id, k.classroom_id, a.title, k.submissions, k.score_sum, k.score_sq_sum, "
+                    "k.last_submitted_at FROM analytics_assessment k JOIN assignments a ON a.id = k.assignment_id",
+                    "k.classroom_id"),
+    "students": (("teacher", "admin"),
+                 "SELECT k.user_id, u.full_name, u.email, k.classroom_id, k.submissions, k.score_sum, k.score_sq_sum, "
+                 "k.last_submitted_at FROM analytics_student k LEFT JOIN users u ON u.id = k.user_id",
+                 "k.classroom_id"),
+    "users": (("admin",), "SELECT id, email, role, full_name FROM users", None),
+}
+
+MIMETYPES = {"csv": "text/csv", "json": "application/json"}
+
+
+def _value(v):
+    if isinstance(v, (datetime, date)):
+        return str(v)
+    if isinstance(v, Decimal):
+        return float(v)
+    if isinstance(v, bytes):
+        return v.decode("utf-8", "replace")
+    return v
+
+
+def iter_batches(conn, sql, params=(), batch_size=1000):
+    """Yield (columns, rows) batches from a server-side cursor
+
+    The first batch is (columns, []) before anything is fetched, so an
+    empty result still has its header. On MySQL conn must be a connection
+    nothing else uses until the generator is exhausted: the cursor is
+    unbuffered.
+    """
+    sqlite = hasattr(conn, "executescript")
+    cur = conn.cursor() if sqlite else conn.cursor(buffered=False)
+    done = False
+    try:
+        cur.execute(sql if sqlite else sql.replace("?", "%s"), params)
+        columns = [c[0] for c in cur.description]
+        yield columns, []
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield columns, rows
+        done = True
+    finally:
+        if not (done or sqlite):
+            # client went away mid-export, drain the result so the connection can go back to the pool
+            conn.consume_results()
+        cur.close()
+
+
+def encode_csv(batches):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    header = False
+    for columns, rows in batches:
+        if not header:
+            writer.writerow(columns)
+            header = True
+        writer.writerows([_value(v) for v in row] for row in rows)
+        if buf.tell():
+            yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+
+
+def encode_json(batches):
+    """A JSON array of objects, written one batch at a time"""
+    first = True
+    yield b"["
+    for columns, rows in batches:
+        if not rows:
+            continue
+        chunk = ",".join(json.dumps(dict(zip(columns, map(_value, row))), default=str) for row in rows)
+        yield (chunk if first else "," + chunk).encode("utf-8")
+        first = False
+    yield b"]"
+
+
+def gzip_chunks(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _query(name):
+    roles, sql, owner_column = EXPORTS[name]
+    if current_user.role not in roles:
+        abort(403)
+    clauses, params = [], []
+    if current_user.role != "admin" and owner_column:
+        clauses.append(f"{owner_column} IN ({_OWNED_CLASSROOMS})")
+        params.append(current_user.id)
+    classroom_id = request.args.get("classroom_id", type=int)
+    if classroom_id is not None and owner_column:
+        clauses.append(f"{owner_column} = ?")
+        params.append(classroom_id)
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    return sql, params
+
+
+def _export_connection():
+    if current_app.config.get("DATABASE_URL") and not current_app.config.get("SQLITE_FALLBACK"):
+        # its own connection, the unbuffered result set would block the request's one
+        conn = get_mysql_data_connection()
+        if conn is None:
+            abort(503)
+        return conn
+    return get_db(readonly=True)
+
+
+def _batches(sql, params, batch_size):
+    # connect inside the stream: the view's own connections are closed at
+    # teardown, before the body is sent; this one is closed when the stream ends
+    yield from iter_batches(_export_connection(), sql, params, batch_size)
+
+
+@exports_bp.route("/api/v1/exports/<name>.<fmt>")
+@role_required("teacher", "admin")
+def export(name, fmt):
+    if name not in EXPORTS or fmt not in MIMETYPES:
+        abort(404)
+    sql, params = _query(name)
+    cfg = current_app.config
+    batches = _batches(sql, params, cfg.get("EXPORT_BATCH_SIZE", 1000))
+    chunks = encode_csv(batches) if fmt == "csv" else encode_json(batches)
+    filename = f"{name}.{fmt}"
+    mimetype = MIMETYPES[fmt]
+    if request.args.get("gzip") in ("1", "true"):
+        chunks = gzip_chunks(chunks, cfg.get("EXPORT_GZIP_LEVEL", 6))
+        filename += ".gz"
+        mimetype = "application/gzip"
+    # no Content-Length: the response goes out with chunked transfer encoding
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"',
+                             "Cache-Control": "no-store", "X-Accel-Buffering": "no"})
@@ -0,0 +1,138 @@
+"""
+Auto-grading for assessment submissions
+An assignment's answer key (assignments.content_json) is compiled once into
+NumPy arrays of normalized answers and points, cached per assignment and
+content hash, so an edited key is recompiled on its next use. Submissions
+are scored as (submissions x questions) array comparisons; a regrade reads
+them in id-ordered batches and writes changed scores back with executemany.
+Every score written here is folded into the analytics aggregates in the same
+transaction.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+import numpy as np
+from flask import current_app
+from .analytics import apply_scores
+from .db import get_db
+from .jobs import job_app_context, set_progress
+
+_lock = threading.Lock()
+_keys = OrderedDict()  # (assignment id, content hash) -> CompiledKey
+_stats = {"hits": 0, "misses": 0}
+
+
+def _normalize(values):
+    return np.char.lower(np.char.strip(np.asarray(values, dtype=str)))
+
+
+class CompiledKey:
+    def __init__(self, content):
+        questions = content.get("questions") or []
+        if not questions:
+            raise ValueError("assessment has no questions")
+        self.size = len(questions)
+        self.answers = _normalize([str(q.get("answer", "")) for q in questions])
+        self.points = np.array([float(q.get("points", 1)) for q in questions])
+        self.total = float(self.points.sum()) or 1.0
+
+    def answer_matrix(self, submissions):
+        """(n, questions) normalized answers, missing ones padded with "" """
+        matrix = np.full((len(submissions), self.size), "", dtype=object)
+        for i, answers in enumerate(submissions):
+            answers = [("" if a is None else str(a)) for a in (answers or [])[:self.size]]
+            matrix[i, :len(answers)] = answers
+        return _normalize(matrix)
+
+    def score(self, submissions):
+        """Scores (0-100, 2 decimals) for a list of answer lists"""
+        if not submissions:
+            return np.zeros(0)
+        correct = (self.answer_matrix(submissions) == self.answers) & (self.answers != "")
+        return np.round(100.0 * (correct @ self.points) / self.total, 2)
+
+
+def content_hash(content_json):
+    return hashlib.sha1(content_json.encode("utf-8")).hexdigest()
+
+
+def get_key(assignment_id, content_json=None):
+    """Cached CompiledKey for an assignment, recompiled when its content changes"""
+    if content_json is None:
+        row = get_db(readonly=True).execute("SELECT content_json FROM assignments WHERE id=?", (assignment_id,)).fetchone()
+        if row is None:
+            raise LookupError(f"assignment {assignment_id} not found")
+        content_json = row["content_json"]
+    cache_key = (assignment_id, content_hash(content_json))
+    with _lock:
+        key = _keys.get(cache_key)
+        if key is not None:
+            _keys.move_to_end(cache_key)
+            _stats["hits"] += 1
+            return key
+        _stats["misses"] += 1
+    key = CompiledKey(json.loads(content_json))
+    with _lock:
+        _keys[cache_key] = key
+        while len(_keys) > current_app.config.get("GRADING_CACHE_SIZE", 512):
+            _keys.popitem(last=False)
+    return key
+
+
+def grade(assignment_id, answers):
+    """Score one submission's answers"""
+    return float(get_key(assignment_id).score([answers])[0])
+
+
+def grade_submission(submission_id):
+    """Score a stored submission and update the analytics aggregates, returns the score"""
+    db = get_db(readonly=False)
+    row = db.execute("SELECT assignment_id, user_id, answers_json, score, submitted_at FROM submissions WHERE id=?",
+                     (submission_id,)).fetchone()
+    if row is None:
+        raise LookupError(f"submission {submission_id} not found")
+    score = grade(row["assignment_id"], json.loads(row["answers_json"] or "[]"))
+    if row["score"] is None or float(row["score"]) != score:
+        db.execute("UPDATE submissions SET score=? WHERE id=?", (score, submission_id))
+        apply_scores(db, row["assignment_id"], [(row["user_id"], row["score"], score, row["submitted_at"])])
+    db.commit()
+    return score
+
+
+def regrade_assignment(assignment_id, batch_size=None):
+    """Rescore every submission of an assignment, returns counts"""
+    batch_size = batch_size or current_app.config.get("GRADING_BATCH_SIZE", 1000)
+    key = get_key(assignment_id)
+    db = get_db(readonly=False)
+    total = db.execute("SELECT COUNT(*) AS n FROM submissions WHERE assignment_id=?", (assignment_id,)).fetchone()["n"]
+    last_id, seen, changed = 0, 0, 0
+    while True:
+        rows = db.execute("SELECT id, user_id, answers_json, score, submitted_at FROM submissions WHERE assignment_id=? AND id>? "
+                          "ORDER BY id LIMIT ?", (assignment_id, last_id, batch_size)).fetchall()
+        if not rows:
+            break
+        scores = key.score([json.loads(r["answers_json"] or "[]") for r in rows])
+        changes = [(r, float(s)) for r, s in zip(rows, scores) if r["score"] is None or float(r["score"]) != s]
+        if changes:
+            cur = db.cursor()
+            cur.executemany("UPDATE submissions SET score=? WHERE id=?", [(s, r["id"]) for r, s in changes])
+            cur.close()
+            apply_scores(db, assignment_id, [(r["user_id"], r["score"], s, r["submitted_at"]) for r, s in changes])
+        db.commit()
+        changed += len(changes)
+        seen += len(rows)
+        last_id = rows[-1]["id"]
+        set_progress(100.0 * seen / (total or 1), submissions=seen, changed=changed)
+    return {"assignment_id": assignment_id, "submissions": seen, "changed": changed}
+
+
+def regrade_job(assignment_id):
+    """Job entry point for a bulk regrade"""
+    with job_app_context():
+        return regrade_assignment(assignment_id)
+
+
+def grading_cache_stats():
+    with _lock:
+        return dict(_stats, entries=len(_keys))
@@ -0,0 +1,196 @@
+"""
+Per-request DB and timing instrumentation
+When METRICS_ENABLED is set, connections from get_db() are wrapped to count
+queries and time them, slow requests are logged, and aggregated histograms
+per endpoint are served at /metrics in Prometheus text format.
+Counters are per worker process. When disabled nothing is wrapped or hooked.
+"""
+import threading
+import time
+from bisect import bisect_left
+from flask import Blueprint, Response, abort, current_app, g, request
+
+metrics_bp = Blueprint("metrics", __name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+_lock = threading.Lock()
+_endpoints = {}  # endpoint -> {"requests", "errors", "duration": Histogram, "db_time": Histogram, "queries": Histogram}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _QueryStats:
+    __slots__ = ("count", "total", "slowest", "slowest_sql")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_sql = None
+
+    def record(self, sql, elapsed):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+            self.slowest_sql = sql
+
+
+def _request_stats():
+    stats = g.get("_query_stats")
+    if stats is None:
+        stats = g._query_stats = _QueryStats()
+    return stats
+
+
+class _Timed:
+    """Proxy timing execute/executemany/executescript on a connection or cursor"""
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    def __iter__(self):
+        return iter(self._target)
+
+    def __enter__(self):
+        self._target.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._target.__exit__(*exc)
+
+    def _timed(self, method, sql, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = getattr(self._target, method)(sql, *args, **kwargs)
+        finally:
+            _request_stats().record(sql, time.perf_counter() - start)
+        if result is None:
+            return None
+        if result is self._target:
+            return self
+        # sqlite3 Connection.execute returns a new cursor, keep timing its reuse
+        return _Timed(result)
+
+    def execute(self, sql, *args, **kwargs):
+        return self._timed("execute", sql, *args, **kwargs)
+
+    def executemany(self, sql, *args, **kwargs):
+        return self._timed("executemany", sql, *args, **kwargs)
+
+    def executescript(self, sql, *args, **kwargs):
+        return self._timed("executescript", sql, *args, **kwargs)
+
+    def cursor(self, *args, **kwargs):
+        return _Timed(self._target.cursor(*args, **kwargs))
+
+
+def instrument_connection(conn):
+    return _Timed(conn)
+
+
+def _before_request():
+    g._request_started = time.perf_counter()
+
+
+def _teardown_request(exc=None):
+    started = g.pop("_request_started", None)
+    if started is None:
+        return
+    duration = time.perf_counter() - started
+    stats = g.pop("_query_stats", None) or _QueryStats()
+    endpoint = request.endpoint or "<unmatched>"
+    with _lock:
+        entry = _endpoints.get(endpoint)
+        if entry is None:
+            entry = _endpoints[endpoint] = {"requests": 0, "errors": 0,
+                                            "duration": Histogram(DURATION_BUCKETS),
+                                            "db_time": Histogram(DURATION_BUCKETS),
+                                            "queries": Histogram(QUERY_BUCKETS)}
+        entry["requests"] += 1
+        entry["errors"] += exc is not None
+        entry["duration"].observe(duration)
+        entry["db_time"].observe(stats.total)
+        entry["queries"].observe(stats.count)
+
+    cfg = current_app.config
+    if duration * 1000 > cfg.get("SLOW_REQUEST_MS", 500) or stats.count > cfg.get("SLOW_REQUEST_QUERIES", 50):
+        slowest = (stats.slowest_sql or "").split()
+        current_app.logger.warning(
+            f"Slow request {request.method} {request.path} ({endpoint}): {duration * 1000:.1f}ms, "
+            f"{stats.count} queries, {stats.total * 1000:.1f}ms in DB, "
+            f"slowest {stats.slowest * 1000:.1f}ms: {' '.join(slowest)[:200]}")
+
+
+def init_instrumentation(app):
+    """Register /metrics and, when METRICS_ENABLED, the per-request hooks"""
+    app.register_blueprint(metrics_bp)
+    if app.config.get("METRICS_ENABLED"):
+        app.before_request(_before_request)
+        app.teardown_request(_teardown_request)
+
+
+def _histogram_lines(name, endpoint, hist):
+    lines, cumulative = [], 0
+    for bound, count in zip(hist.buckets + ("+Inf",), hist.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {hist.sum:.6f}')
+    lines.append(f'{name}_count{{endpoint="{endpoint}"}} {hist.count}')
+    return lines
+
+
+def render_metrics():
+    from .data_propagate import formula_cache_stats
+    from .db import pool_stats
+    from .grading import grading_cache_stats
+    from .embedding_cache import embedding_cache_stats
+    from .tutor_cache import tutor_cache_stats
+    from .user_cache import user_cache_stats
+
+    lines = []
+    with _lock:
+        snapshot = list(_endpoints.items())
+        lines.append("# TYPE http_requests_total counter")
+        for endpoint, entry in snapshot:
+            lines.append(f'http_requests_total{{endpoint="{endpoint}"}} {entry["requests"]}')
+        lines.append("# TYPE http_request_errors_total counter")
+        for endpoint, entry in snapshot:
+            lines.append(f'http_request_errors_total{{endpoint="{endpoint}"}} {entry["errors"]}')
+        for name, key in (("http_request_duration_seconds", "duration"),
+                          ("db_time_per_request_seconds", "db_time"),
+                          ("db_queries_per_request", "queries")):
+            lines.append(f"# TYPE {name} histogram")
+            for endpoint, entry in snapshot:
+                lines.extend(_histogram_lines(name, endpoint, entry[key]))
+
+    for prefix, stats in (("mysql_pool", pool_stats()), ("user_cache", user_cache_stats()),
+                          ("tutor_cache", tutor_cache_stats()), ("embedding_cache", embedding_cache_stats()),
+                          ("formula_cache", formula_cache_stats()), ("grading_cache", grading_cache_stats())):
+        for key, value in (stats or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f"{prefix}_{key} {value}")
+    return "\n".join(lines) + "\n"
+
+
+@metrics_bp.route("/metrics")
+def metrics():
+    if not current_app.config.get("METRICS_ENABLED"):
+        abort(404)
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,126 @@
+"""
+Job status notifications for the long-poll and SSE status endpoints
+Job backends call publish(job_id) on every status/progress transition.
+Waiting requests in this process are woken directly; with RQ the id is also
+published on Redis and one listener thread per process fans it out, so
+status changes made by other workers arrive as events too. Subscribers
+re-read the job status once per event instead of polling on a timer; a slow
+re-check (JOB_EVENTS_RECHECK) covers local-backend workers running in
+another process. JOB_EVENTS_MAX_SUBSCRIBERS caps open subscriptions per
+worker process.
+"""
+import os
+import threading
+from flask import current_app
+
+CHANNEL = "job-events"
+
+_lock = threading.Lock()
+_waiters = {}  # job id -> set of threading.Event
+_slots = None
+_slots_size = None
+_listener_pid = None
+
+
+class TooManySubscribers(Exception):
+    """Raised when this worker already holds JOB_EVENTS_MAX_SUBSCRIBERS subscriptions"""
+
+
+def notify(job_id):
+    """Wake subscribers of job_id in this process"""
+    with _lock:
+        for event in _waiters.get(job_id, ()):
+            event.set()
+
+
+def publish(job_id):
+    notify(job_id)
+    from .jobs import backend, get_redis
+    try:
+        if backend() == "rq":
+            get_redis().publish(CHANNEL, job_id)
+    except Exception as e:
+        current_app.logger.warning(f"Could not publish job event for {job_id}: {e}")
+
+
+def rq_on_success(job, connection, result, *args, **kwargs):
+    """RQ success callback, the job has finished"""
+    notify(job.id)
+    connection.publish(CHANNEL, job.id)
+
+
+def rq_on_failure(job, connection, *exc_info, **kwargs):
+    """RQ failure callback"""
+    notify(job.id)
+    connection.publish(CHANNEL, job.id)
+
+
+def _listen(redis):
+    pubsub = redis.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(CHANNEL)
+    for message in pubsub.listen():
+        data = message.get("data")
+        if data:
+            notify(data.decode() if isinstance(data, bytes) else data)
+
+
+def _ensure_listener():
+    global _listener_pid
+    from .jobs import backend, get_redis
+    if _listener_pid == os.getpid() or backend() != "rq":
+        return
+    with _lock:
+        if _listener_pid == os.getpid():
+            return
+        threading.Thread(target=_listen, args=(get_redis(),), name="job-events", daemon=True).start()
+        _listener_pid = os.getpid()
+
+
+def _get_slots():
+    global _slots, _slots_size
+    size = current_app.config.get("JOB_EVENTS_MAX_SUBSCRIBERS", 100)
+    if _slots is None or _slots_size != size:
+        with _lock:
+            if _slots is None or _slots_size != size:
+                _slots = threading.BoundedSemaphore(size)
+                _slots_size = size
+    return _slots
+
+
+class Subscription:
+    """with Subscription(job_id) as sub: sub.wait(timeout) -> True when an event arrived"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.event = threading.Event()
+        self._slots = None
+
+    def __enter__(self):
+        slots = _get_slots()
+        if not slots.acquire(blocking=False):
+            raise TooManySubscribers()
+        self._slots = slots
+        _ensure_listener()
+        with _lock:
+            _waiters.setdefault(self.job_id, set()).add(self.event)
+        return self
+
+    def wait(self, timeout):
+        arrived = self.event.wait(timeout)
+        self.event.clear()
+        return arrived
+
+    def __exit__(self, *exc):
+        with _lock:
+            waiters = _waiters.get(self.job_id)
+            if waiters is not None:
+                waiters.discard(self.event)
+                if not waiters:
+                    del _waiters[self.job_id]
+        self._slots.release()
+        return False
+
+
+def subscriber_count():
+    with _lock:
+        return sum(len(w) for w in _waiters.values())
@@ -0,0 +1,194 @@
+"""
+Background jobs (Redis + RQ, or the local database-backed backend)
+Shared by the OCR/RAG job functions and the /jobs endpoints, status dicts
+follow job_status_model in api_docs.py. JOB_BACKEND picks "rq", "local" or
+"auto" (RQ when Redis answers a ping, local otherwise); either way the job
+runs on a worker, never on the request thread.
+"""
+import json
+import os
+from contextlib import nullcontext
+from flask import current_app, has_app_context
+from redis import Redis
+from rq import Callback, Queue, Retry, Worker, get_current_job
+from rq.command import send_stop_job_command
+from rq.job import Job
+from rq.registry import FailedJobRegistry, FinishedJobRegistry, StartedJobRegistry
+from . import local_jobs
+from .job_events import publish, rq_on_failure, rq_on_success
+
+# RQ status -> job_status_model status
+STATUS_MAP = {
+    "queued": "queued",
+    "deferred": "queued",
+    "scheduled": "queued",
+    "started": "processing",
+    "finished": "completed",
+    "failed": "failed",
+    "stopped": "failed",
+    "canceled": "failed",
+}
+
+_app = None
+_backend = None  # (pid, backend) resolved for "auto"
+
+
+def backend():
+    """"rq" or "local" for this process"""
+    global _backend
+    choice = current_app.config.get("JOB_BACKEND", "auto")
+    if choice != "auto":
+        return choice
+    if _backend is None or _backend[0] != os.getpid():
+        try:
+            Redis.from_url(current_app.config["REDIS_URL"], socket_connect_timeout=1).ping()
+            resolved = "rq"
+        except Exception:
+            current_app.logger.warning("Redis unavailable, using the local job backend")
+            resolved = "local"
+        _backend = (os.getpid(), resolved)
+    return _backend[1]
+
+
+def get_redis():
+    return Redis.from_url(current_app.config["REDIS_URL"])
+
+
+def get_queue(name=None):
+    return Queue(name or current_app.config["RQ_DEFAULT_QUEUE"], connection=get_redis())
+
+
+def enqueue(func, *args, priority=0, **kwargs):
+    """Queue func(*args, **kwargs), returns the job id
+
+    Higher priority runs first on the local backend; on RQ priority > 0
+    puts the job at the front of the queue. Failures are retried
+    JOB_MAX_RETRIES times on both.
+    """
+    retries = current_app.config.get("JOB_MAX_RETRIES", 2)
+    if backend() == "local":
+        local_jobs.start_workers(current_app._get_current_object())
+        return local_jobs.enqueue(func, args, kwargs, priority, retries)
+    return get_queue().enqueue(func, *args, at_front=priority > 0,
+                               retry=Retry(max=retries) if retries else None,
+                               on_success=Callback(rq_on_success), on_failure=Callback(rq_on_failure), **kwargs).id
+
+
+def cancel(job_id):
+    """Cancel a queued or running job, returns False if it was not found or already ended"""
+    if backend() == "local":
+        return local_jobs.cancel(job_id)
+    try:
+        job = Job.fetch(job_id, connection=get_redis())
+    except Exception:
+        return False
+    status = job.get_status(refresh=False)
+    if status == "started":
+        send_stop_job_command(get_redis(), job_id)
+    elif STATUS_MAP.get(status) == "queued":
+        job.cancel()
+    else:
+        return False
+    publish(job_id)
+    return True
+
+
+def set_progress(progress, **meta):
+    """Report progress (0-100) from inside a running job, no-op outside one"""
+    job_id = local_jobs.current_job_id()
+    if job_id is not None:
+        local_jobs.update_progress(progress, meta)
+    else:
+        job = get_current_job()
+        if job is None:
+            return
+        job.meta.update(meta)
+        job.meta["progress"] = round(float(progress), 1)
+        job.save_meta()
+        job_id = job.id
+    publish(job_id)
+
+
+def _local_status(job_id):
+    job = local_jobs.fetch(job_id)
+    if job is None:
+        return None
+    status = STATUS_MAP.get(job["status"], "queued")
+    meta = json.loads(job["meta_json"] or "{}")
+    if status == "completed":
+        result = json.loads(job["result_json"]) if job["result_json"] else None
+    elif status == "failed":
+        result = job["error"]
+    else:
+        result = meta.get("result")
+    return {
+        "job_id": job["id"],
+        "status": status,
+        "result": result,
+        "progress": 100.0 if status == "completed" else job["progress"],
+    }
+
+
+def job_status(job_id):
+    """Status dict for /jobs/status/<job_id>, None if the job is unknown"""
+    if backend() == "local":
+        return _local_status(job_id)
+    try:
+        job = Job.fetch(job_id, connection=get_redis())
+    except Exception:
+        return None
+    status = STATUS_MAP.get(job.get_status(refresh=False), "queued")
+    result = None
+    if status == "completed":
+        result = job.result
+    elif status == "failed":
+        result = job.meta.get("error") or job.exc_info
+    else:
+        result = job.meta.get("result")  # partial results streamed with set_progress
+    return {
+        "job_id": job.id,
+        "status": status,
+        "result": result,
+        "progress": 100.0 if status == "completed" else job.meta.get("progress", 0.0),
+    }
+
+
+def queue_info():
+    """Counts for /jobs/queue/info, same keys for both backends"""
+    if backend() == "local":
+        counts = local_jobs.counts()
+        return {
+            "backend": "local",
+            "queued": counts.get("queued", 0),
+            "processing": counts.get("started", 0),
+            "completed": counts.get("finished", 0),
+            "failed": counts.get("failed", 0) + counts.get("canceled", 0),
+            "workers": current_app.config.get("JOB_LOCAL_WORKERS", 2),
+        }
+    queue = get_queue()
+    return {
+        "backend": "rq",
+        "queued": queue.count,
+        "processing": StartedJobRegistry(queue=queue).count,
+        "completed": FinishedJobRegistry(queue=queue).count,
+        "failed": FailedJobRegistry(queue=queue).count,
+        "workers": Worker.count(queue=queue),
+    }
+
+
+def init_jobs(app):
+    """Start local job workers in this process when that backend is in use"""
+    with app.app_context():
+        if backend() == "local":
+            local_jobs.start_workers(app)
+
+
+def job_app_context():
+    """App context for job functions running in an RQ worker (created once per worker)"""
+    global _app
+    if has_app_context():
+        return nullcontext()
+    if _app is None:
+        from . import create_app
+        _app = create_app()
+    return _app.app_context()
@@ -0,0 +1,118 @@
+"""
+Background job endpoints (/api/v1/jobs/*), same contract for RQ and the
+local job backend. /status/<id>/wait (long poll) and /status/<id>/stream
+(SSE) hold one connection and answer on job events instead of client polling.
+"""
+import time
+from flask import Blueprint, abort, current_app, jsonify, request
+from flask_login import login_required
+from .job_events import Subscription, TooManySubscribers
+from .jobs import cancel, job_status, queue_info
+from .roles import role_required
+from .sse import sse_event, sse_response
+
+jobs_bp = Blueprint("jobs_api", __name__)
+
+TERMINAL = ("completed", "failed")
+
+
+def _busy():
+    response = jsonify({"error": "too many open job subscriptions, retry shortly"})
+    response.status_code = 503
+    response.headers["Retry-After"] = "2"
+    return response
+
+
+def _changed(info, status, progress):
+    return info["status"] != status or (progress is not None and info["progress"] != progress)
+
+
+@jobs_bp.route("/api/v1/jobs/status/<job_id>")
+@login_required
+def status(job_id):
+    info = job_status(job_id)
+    if info is None:
+        abort(404)
+    return jsonify(info)
+
+
+@jobs_bp.route("/api/v1/jobs/status/<job_id>/wait")
+@login_required
+def wait_status(job_id):
+    """Long poll: returns as soon as status/progress differ from the ones the client passes"""
+    known_status = request.args.get("status")
+    known_progress = request.args.get("progress", type=float)
+    timeout = min(request.args.get("timeout", 25, type=float), current_app.config.get("JOB_EVENTS_MAX_WAIT", 60))
+    recheck = current_app.config.get("JOB_EVENTS_RECHECK", 5)
+    try:
+        with Subscription(job_id) as sub:
+            deadline = time.monotonic() + timeout
+            while True:
+                info = job_status(job_id)
+                if info is None:
+                    abort(404)
+                remaining = deadline - time.monotonic()
+                if _changed(info, known_status, known_progress) or info["status"] in TERMINAL or remaining <= 0:
+                    return jsonify(info)
+                sub.wait(min(remaining, recheck))
+    except TooManySubscribers:
+        return _busy()
+
+
+@jobs_bp.route("/api/v1/jobs/status/<job_id>/stream")
+@login_required
+def stream_status(job_id):
+    """SSE: a `status` event per transition, the stream ends after a terminal status"""
+    if job_status(job_id) is None:
+        abort(404)
+    sub = Subscription(job_id)
+    try:
+        sub.__enter__()
+    except TooManySubscribers:
+        return _busy()
+    recheck = current_app.config.get("JOB_EVENTS_RECHECK", 5)
+    keepalive = current_app.config.get("JOB_EVENTS_KEEPALIVE", 15)
+    released = []
+
+    def release():
+        # from the generator, or on close when the client left before it started
+        if not released:
+            released.append(True)
+            sub.__exit__(None, None, None)
+
+    def events():
+        try:
+            last, idle = None, 0.0
+            while True:
+                info = job_status(job_id)
+                if info is not None and info != last:
+                    yield sse_event("status", info)
+                    last, idle = info, 0.0
+                    if info["status"] in TERMINAL:
+                        return
+                elif idle >= keepalive:
+                    yield ": keepalive\n\n"
+                    idle = 0.0
+                started = time.monotonic()
+                sub.wait(recheck)
+                idle += time.monotonic() - started
+        finally:
+            release()
+
+    response = sse_response(events())
+    response.call_on_close(release)
+    return response
+
+
+@jobs_bp.route("/api/v1/jobs/cancel/<job_id>", methods=["POST"])
+@login_required
+def cancel_job(job_id):
+    if not cancel(job_id):
+        abort(404)
+    return jsonify(job_status(job_id))
+
+
+@jobs_bp.route("/api/v1/jobs/queue/info")
+@role_required("admin")
+def info():
+    return jsonify(queue_info())
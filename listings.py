@@ -0,0 +1,88 @@
+"""
+Keyset-paginated classroom and assessment listings
+GET /api/v1/classrooms/ and /api/v1/assessments/ return
+{"items", "next_cursor"}, newest first (id descending). Admins see
+everything, teachers what they created, students what their memberships
+give access to. The queries walk the primary key backwards and probe the
+composite indexes from migration 6, and they are written in SQL both
+backends run the same way so SQLite and MySQL return identical pages.
+"""
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user, login_required
+from .db import get_db
+from .pagination import decode_cursor, page
+
+listings_bp = Blueprint("listings", __name__)
+
+CLASSROOM_COLUMNS = "c.id, c.name, c.join_code, c.created_by, c.created_at"
+ASSESSMENT_COLUMNS = "a.id, a.classroom_id, a.title, a.time_limit_minutes, a.due_at"
+
+
+def _param(conn):
+    return "?" if hasattr(conn, "executescript") else "%s"
+
+
+def _rows(conn, sql, params):
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    columns = [c[0] for c in cur.description]
+    # datetimes from MySQL and TEXT timestamps from SQLite both come out as "YYYY-MM-DD HH:MM:SS"
+    rows = [{k: (str(v) if hasattr(v, "isoformat") else v) for k, v in zip(columns, row)} for row in cur.fetchall()]
+    cur.close()
+    return rows
+
+
+def _scope(role, p):
+    """(WHERE clause on the listed table, needs user id) for a role"""
+    if role == "admin":
+        return "1=1", False
+    if role == "teacher":
+        return f"c.created_by = {p}", True
+    return f"c.id IN (SELECT m.classroom_id FROM classroom_members m WHERE m.user_id = {p})", True
+
+
+def list_classrooms(conn, user_id, role, limit=20, cursor=None):
+    p = _param(conn)
+    where, with_user = _scope(role, p)
+    params = [user_id] if with_user else []
+    after = decode_cursor(cursor, int)
+    if after:
+        where += f" AND c.id < {p}"
+        params.append(after[0])
+    rows = _rows(conn, f"SELECT {CLASSROOM_COLUMNS} FROM classrooms c WHERE {where} ORDER BY c.id DESC LIMIT {p}",
+                 params + [limit + 1])
+    return page(rows, limit, lambda row: (row["id"],))
+
+
+def list_assessments(conn, user_id, role, limit=20, cursor=None):
+    p = _param(conn)
+    where, with_user = _scope(role, p)
+    params = [user_id] if with_user else []
+    if role == "admin":
+        clause = "1=1"
+    else:
+        # classroom 0 holds tests shared with everyone (see seed_demo.py)
+        clause = f"(a.classroom_id = 0 OR a.classroom_id IN (SELECT c.id FROM classrooms c WHERE {where}))"
+    after = decode_cursor(cursor, int)
+    if after:
+        clause += f" AND a.id < {p}"
+        params.append(after[0])
+    rows = _rows(conn, f"SELECT {ASSESSMENT_COLUMNS} FROM assignments a WHERE {clause} ORDER BY a.id DESC LIMIT {p}",
+                 params + [limit + 1])
+    return page(rows, limit, lambda row: (row["id"],))
+
+
+def _limit():
+    return max(1, min(request.args.get("limit", 20, type=int), current_app.config.get("LISTING_MAX_LIMIT", 100)))
+
+
+@listings_bp.route("/api/v1/classrooms/")
+@login_required
+def classrooms():
+    return jsonify(list_classrooms(get_db(readonly=True), current_user.id, current_user.role, _limit(), request.args.get("cursor")))
+
+
+@listings_bp.route("/api/v1/assessments/")
+@login_required
+def assessments():
+    return jsonify(list_assessments(get_db(readonly=True), current_user.id, current_user.role, _limit(), request.args.get("cursor")))
@@ -0,0 +1,250 @@
+"""
+Local job backend (used when Redis/RQ is not available)
+Jobs are rows in the `jobs` table (migration 5) run by worker threads that
+start with the app (JOB_LOCAL_WORKERS per process) or in a separate process
+with `python -m app.local_jobs`. A worker claims the highest priority due job
+with a conditional UPDATE, so any number of processes can share the table.
+Failed jobs are retried with exponential backoff up to their max_retries;
+queued jobs are cancelled at once, running ones at their next set_progress.
+Jobs of a worker process that stops heartbeating are put back in the queue.
+"""
+import importlib
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from flask import current_app
+from .db import close_db, get_db
+from .job_events import publish
+
+_local = threading.local()
+_wakeup = threading.Event()
+_started_pid = None
+_start_lock = threading.Lock()
+
+
+class JobCanceled(Exception):
+    """Raised inside a running job once it has been cancelled"""
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _func_path(func):
+    return f"{func.__module__}:{func.__qualname__}"
+
+
+def _resolve(path):
+    module, _, name = path.partition(":")
+    target = importlib.import_module(module)
+    for part in name.split("."):
+        target = getattr(target, part)
+    return target
+
+
+def enqueue(func, args=(), kwargs=None, priority=0, max_retries=0):
+    """Insert a queued job, returns its id"""
+    job_id = str(uuid.uuid4())
+    now = time.time()
+    db = get_db(readonly=False)
+    db.execute("INSERT INTO jobs(id, func, args_json, priority, max_retries, run_at, created_at, updated_at) "
+               "VALUES(?,?,?,?,?,?,?,?)",
+               (job_id, _func_path(func), json.dumps({"args": list(args), "kwargs": kwargs or {}}),
+                priority, max_retries, now, now, now))
+    db.commit()
+    _wakeup.set()
+    return job_id
+
+
+def fetch(job_id):
+    row = get_db(readonly=True).execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def cancel(job_id):
+    """Cancel a job, returns False when it already ended or does not exist"""
+    db = get_db(readonly=False)
+    now = time.time()
+    cur = db.execute("UPDATE jobs SET status='canceled', error='canceled', ended_at=?, updated_at=? "
+                     "WHERE id=? AND status='queued'",
+                     (now, now, job_id))
+    if not cur.rowcount:
+        cur = db.execute("UPDATE jobs SET cancel_requested=1 WHERE id=? AND status='started'", (job_id,))
+    db.commit()
+    if cur.rowcount:
+        publish(job_id)
+    return bool(cur.rowcount)
+
+
+def counts():
+    """Number of jobs per status"""
+    rows = get_db(readonly=True).execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+    return {r["status"]: r["n"] for r in rows}
+
+
+def current_job_id():
+    job = getattr(_local, "job", None)
+    return job["id"] if job else None
+
+
+def update_progress(progress, meta):
+    """set_progress() for the job running on this thread"""
+    job = _local.job
+    job["meta"].update(meta)
+    db = get_db(readonly=False)
+    db.execute("UPDATE jobs SET progress=?, meta_json=?, updated_at=? WHERE id=?",
+               (round(float(progress), 1), json.dumps(job["meta"], default=str), time.time(), job["id"]))
+    db.commit()
+    row = db.execute("SELECT cancel_requested FROM jobs WHERE id=?", (job["id"],)).fetchone()
+    if row and row["cancel_requested"]:
+        raise JobCanceled(job["id"])
+
+
+def _claim(db, name):
+    """Mark the next due job as started by this worker, returns its row or None"""
+    while True:
+        row = db.execute("SELECT id FROM jobs WHERE status='queued' AND run_at<=? "
+                         "ORDER BY priority DESC, run_at, created_at LIMIT 1", (time.time(),)).fetchone()
+        if row is None:
+            db.commit()
+            return None
+        now = time.time()
+        cur = db.execute("UPDATE jobs SET status='started', worker=?, attempts=attempts+1, started_at=?, updated_at=? "
+                         "WHERE id=? AND status='queued'", (name, now, now, row["id"]))
+        db.commit()
+        if cur.rowcount:  # another worker may have taken it first
+            publish(row["id"])
+            return dict(db.execute("SELECT * FROM jobs WHERE id=?", (row["id"],)).fetchone())
+
+
+def _finish(db, job_id, status, result=None, error=None):
+    now = time.time()
+    db.execute("UPDATE jobs SET status=?, result_json=?, error=?, progress=CASE WHEN ?='finished' THEN 100 ELSE progress END, "
+               "ended_at=?, updated_at=? WHERE id=?",
+               (status, json.dumps(result, default=str) if result is not None else None, error, status, now, now, job_id))
+    db.commit()
+    publish(job_id)
+
+
+def _run(job):
+    cfg = current_app.config
+    db = get_db(readonly=False)
+    payload = json.loads(job["args_json"])
+    _local.job = {"id": job["id"], "meta": json.loads(job["meta_json"] or "{}")}
+    try:
+        result = _resolve(job["func"])(*payload["args"], **payload["kwargs"])
+    except JobCanceled:
+        _finish(db, job["id"], "canceled", error="canceled")
+    except Exception as e:
+        current_app.logger.error(f"Job {job['id']} ({job['func']}) failed: {e}")
+        if job["attempts"] <= job["max_retries"]:
+            delay = cfg.get("JOB_RETRY_DELAY", 5) * 2 ** (job["attempts"] - 1)
+            db.execute("UPDATE jobs SET status='queued', run_at=?, error=?, updated_at=? WHERE id=?",
+                       (time.time() + delay, str(e), time.time(), job["id"]))
+            db.commit()
+            publish(job["id"])
+        else:
+            _finish(db, job["id"], "failed", error="".join(traceback.format_exception_only(type(e), e)).strip())
+    else:
+        _finish(db, job["id"], "finished", result=result)
+    finally:
+        _local.job = None
+
+
+def requeue_stale(db, stale_after):
+    """Handle jobs of workers that stopped heartbeating, returns how many
+
+    The lost run already counts as an attempt (attempts is incremented at
+    claim time): the job is canceled if that was requested, failed once it
+    has used up max_retries, and put back in the queue otherwise.
+    """
+    cutoff = time.time() - stale_after
+    rows = db.execute("SELECT id, attempts, max_retries, cancel_requested FROM jobs "
+                      "WHERE status='started' AND updated_at<?", (cutoff,)).fetchall()
+    handled = []
+    for row in rows:
+        now = time.time()
+        if row["cancel_requested"]:
+            sql, params = "status='canceled', error='canceled', ended_at=?", (now,)
+        elif row["attempts"] > row["max_retries"]:
+            sql, params = "status='failed', error=?, ended_at=?", ("worker stopped responding", now)
+        else:
+            sql, params = "status='queued', worker=NULL, run_at=?", (now,)
+        # same condition again: the worker may have come back since the SELECT
+        cur = db.execute(f"UPDATE jobs SET {sql}, updated_at=? WHERE id=? AND status='started' AND updated_at<?",
+                         params + (now, row["id"], cutoff))
+        if cur.rowcount:
+            handled.append(row["id"])
+    db.commit()
+    for job_id in handled:
+        publish(job_id)
+    return len(handled)
+
+
+def _worker_loop(app):
+    name = worker_name()
+    while True:
+        job = None
+        try:
+            with app.app_context():
+                try:
+                    job = _claim(get_db(readonly=False), name)
+                    if job is not None:
+                        _run(job)
+                finally:
+                    close_db()
+        except Exception as e:
+            app.logger.error(f"Local job worker error: {e}")
+            time.sleep(1)
+        if job is None:
+            _wakeup.wait(app.config.get("JOB_POLL_INTERVAL", 1.0))
+            _wakeup.clear()
+
+
+def _heartbeat_loop(app):
+    name = worker_name()
+    interval = app.config.get("JOB_STALE_SECONDS", 120) / 4
+    while True:
+        try:
+            with app.app_context():
+                try:
+                    db = get_db(readonly=False)
+                    db.execute("UPDATE jobs SET updated_at=? WHERE worker=? AND status='started'", (time.time(), name))
+                    db.commit()
+                    requeue_stale(db, app.config.get("JOB_STALE_SECONDS", 120))
+                finally:
+                    close_db()
+        except Exception as e:
+            app.logger.error(f"Local job heartbeat error: {e}")
+        time.sleep(interval)
+
+
+def start_workers(app, workers=None):
+    """Start this process's worker threads (once per process)"""
+    global _started_pid
+    workers = app.config.get("JOB_LOCAL_WORKERS", 2) if workers is None else workers
+    if workers <= 0 or _started_pid == os.getpid():
+        return
+    with _start_lock:
+        if _started_pid == os.getpid():
+            return
+        for i in range(workers):
+            threading.Thread(target=_worker_loop, args=(app,), name=f"local-job-{i}", daemon=True).start()
+        threading.Thread(target=_heartbeat_loop, args=(app,), name="local-job-heartbeat", daemon=True).start()
+        _started_pid = os.getpid()
+
+
+def main():
+    from . import create_app
+    app = create_app()
+    start_workers(app, app.config.get("JOB_LOCAL_WORKERS", 2) or 2)
+    while True:
+        time.sleep(3600)
+
+
+if __name__ == "__main__":
+    main()
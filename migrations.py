@@ -0,0 +1,270 @@
+"""
+Versioned schema migrations
+Applied once at startup (init_db / scripts/init_db.py) so that opening a
+connection on the request path never touches DDL.
+"""
+import sqlite3
+
+SCHEMA_PATH = "db/schema.sql"
+
+VERSION_TABLE_SQL = """CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)"""
+
+
+def _split_script(script):
+    """Split a SQL script into single statements (keeps triggers intact)"""
+    statements, buf = [], ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            if buf.strip().rstrip(";").strip():
+                statements.append(buf.strip())
+            buf = ""
+    if buf.strip():
+        statements.append(buf.strip())
+    return statements
+
+
+def _baseline(dialect):
+    # The MySQL schema is provisioned by setup_database.py
+    if dialect != "sqlite":
+        return []
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        return _split_script(f.read())
+
+
+def _tutor_messages(dialect):
+    if dialect == "sqlite":
+        return [
+            """CREATE TABLE IF NOT EXISTS tutor_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""",
+            "CREATE INDEX IF NOT EXISTS idx_tutor_messages_session ON tutor_messages(user_id, session_id, id)",
+        ]
+    return [
+        """CREATE TABLE IF NOT EXISTS tutor_messages (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            session_id VARCHAR(64) NOT NULL,
+            role VARCHAR(16) NOT NULL,
+            content MEDIUMTEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_tutor_messages_session (user_id, session_id, id))""",
+    ]
+
+
+def _ocr_pages(dialect):
+    if dialect == "sqlite":
+        return [
+            """CREATE TABLE IF NOT EXISTS ocr_pages (
+                content_hash TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                page_count INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                confidence REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (content_hash, page))""",
+        ]
+    return [
+        """CREATE TABLE IF NOT EXISTS ocr_pages (
+            content_hash CHAR(64) NOT NULL,
+            page INT NOT NULL,
+            page_count INT NOT NULL,
+            text MEDIUMTEXT NOT NULL,
+            confidence FLOAT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (content_hash, page))""",
+    ]
+
+
+def _ocr_search(dialect):
+    if dialect == "sqlite":
+        return [
+            "CREATE INDEX IF NOT EXISTS idx_ocr_extractions_user ON ocr_extractions(user_id, id)",
+            """CREATE VIRTUAL TABLE IF NOT EXISTS ocr_extractions_fts USING fts5(
+                extracted_text, filename, content='ocr_extractions', content_rowid='id',
+                tokenize='porter unicode61')""",
+            # external content table: the triggers keep the index in step with every save
+            """CREATE TRIGGER IF NOT EXISTS ocr_extractions_fts_ai AFTER INSERT ON ocr_extractions BEGIN
+                INSERT INTO ocr_extractions_fts(rowid, extracted_text, filename)
+                VALUES (new.id, new.extracted_text, new.filename);
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS ocr_extractions_fts_ad AFTER DELETE ON ocr_extractions BEGIN
+                INSERT INTO ocr_extractions_fts(ocr_extractions_fts, rowid, extracted_text, filename)
+                VALUES ('delete', old.id, old.extracted_text, old.filename);
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS ocr_extractions_fts_au AFTER UPDATE ON ocr_extractions BEGIN
+                INSERT INTO ocr_extractions_fts(ocr_extractions_fts, rowid, extracted_text, filename)
+                VALUES ('delete', old.id, old.extracted_text, old.filename);
+                INSERT INTO ocr_extractions_fts(rowid, extracted_text, filename)
+                VALUES (new.id, new.extracted_text, new.filename);
+            END""",
+            "INSERT INTO ocr_extractions_fts(ocr_extractions_fts) VALUES ('rebuild')",
+        ]
+    # InnoDB maintains FULLTEXT indexes on every insert/update
+    return [
+        "CREATE INDEX idx_ocr_extractions_user ON ocr_extractions(user_id, id)",
+        "ALTER TABLE ocr_extractions ADD FULLTEXT INDEX ft_ocr_extractions (extracted_text, filename)",
+    ]
+
+
+def _jobs(dialect):
+    if dialect == "sqlite":
+        return [
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                func TEXT NOT NULL,
+                args_json TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                priority INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_retries INTEGER NOT NULL DEFAULT 0,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                progress REAL NOT NULL DEFAULT 0,
+                meta_json TEXT,
+                result_json TEXT,
+                error TEXT,
+                worker TEXT,
+                run_at REAL NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                ended_at REAL,
+                updated_at REAL)""",
+            "CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs(status, priority, run_at)",
+        ]
+    return [
+        """CREATE TABLE IF NOT EXISTS jobs (
+            id VARCHAR(36) PRIMARY KEY,
+            func VARCHAR(255) NOT NULL,
+            args_json MEDIUMTEXT NOT NULL,
+            status VARCHAR(16) NOT NULL DEFAULT 'queued',
+            priority INT NOT NULL DEFAULT 0,
+            attempts INT NOT NULL DEFAULT 0,
+            max_retries INT NOT NULL DEFAULT 0,
+            cancel_requested TINYINT NOT NULL DEFAULT 0,
+            progress DOUBLE NOT NULL DEFAULT 0,
+            meta_json MEDIUMTEXT,
+            result_json MEDIUMTEXT,
+            error TEXT,
+            worker VARCHAR(128),
+            run_at DOUBLE NOT NULL,
+            created_at DOUBLE NOT NULL,
+            started_at DOUBLE,
+            ended_at DOUBLE,
+            updated_at DOUBLE,
+            INDEX idx_jobs_queue (status, priority, run_at))""",
+    ]
+
+
+def _listing_indexes(dialect):
+    exists = " IF NOT EXISTS" if dialect == "sqlite" else ""
+    return [
+        f"CREATE INDEX{exists} idx_classroom_members_user ON classroom_members(user_id, classroom_id)",
+        f"CREATE INDEX{exists} idx_classrooms_owner ON classrooms(created_by, id)",
+        f"CREATE INDEX{exists} idx_assignments_classroom ON assignments(classroom_id, id)",
+        f"CREATE INDEX{exists} idx_submissions_assignment ON submissions(assignment_id, id)",
+    ]
+
+
+def _analytics(dialect):
+    # filled by `python -m app.analytics rebuild`, then kept current as submissions are scored
+    if dialect == "sqlite":
+        real, ts, exists = "REAL", "TIMESTAMP", " IF NOT EXISTS"
+    else:
+        real, ts, exists = "DOUBLE", "DATETIME NULL", ""
+    totals = f"""submissions INTEGER NOT NULL DEFAULT 0,
+            score_sum {real} NOT NULL DEFAULT 0,
+            score_sq_sum {real} NOT NULL DEFAULT 0,
+            last_submitted_at {ts}"""
+    return [
+        f"""CREATE TABLE IF NOT EXISTS analytics_student (
+            user_id INTEGER NOT NULL,
+            classroom_id INTEGER NOT NULL,
+            {totals},
+            PRIMARY KEY (user_id, classroom_id))""",
+        f"""CREATE TABLE IF NOT EXISTS analytics_classroom (
+            classroom_id INTEGER PRIMARY KEY,
+            members INTEGER NOT NULL DEFAULT 0,
+            submitters INTEGER NOT NULL DEFAULT 0,
+            {totals})""",
+        f"""CREATE TABLE IF NOT EXISTS analytics_assessment (
+            assignment_id INTEGER PRIMARY KEY,
+            classroom_id INTEGER NOT NULL,
+            {totals})""",
+        f"CREATE INDEX{exists} idx_analytics_student_classroom ON analytics_student(classroom_id, user_id)",
+        f"CREATE INDEX{exists} idx_analytics_assessment_classroom ON analytics_assessment(classroom_id, assignment_id)",
+    ]
+
+
+# (version, description, statements(dialect)) - append only, never renumber
+MIGRATIONS = [
+    (1, "baseline schema (db/schema.sql)", _baseline),
+    (2, "tutor chat messages saved by streaming replies", _tutor_messages),
+    (3, "per-page OCR results keyed by file content hash", _ocr_pages),
+    (4, "full-text index over OCR extraction history", _ocr_search),
+    (5, "job table for the local job backend", _jobs),
+    (6, "composite indexes for classroom/assessment listings and regrades", _listing_indexes),
+    (7, "analytics aggregate tables per student, classroom and assessment", _analytics),
+]
+
+
+def _dialect(conn):
+    return "sqlite" if hasattr(conn, "executescript") else "mysql"
+
+
+def schema_version(conn):
+    """Return the highest applied migration version (0 for a fresh database)"""
+    cur = conn.cursor()
+    cur.execute("SELECT MAX(version) FROM schema_version")
+    row = cur.fetchone()
+    cur.close()
+    return (row[0] if row else None) or 0
+
+
+def apply_migrations(conn):
+    """Apply pending migrations in order, returns the list of applied versions"""
+    dialect = _dialect(conn)
+    param = "?" if dialect == "sqlite" else "%s"
+    cur = conn.cursor()
+    cur.execute(VERSION_TABLE_SQL)
+    conn.commit()
+
+    if dialect == "mysql":
+        # serialize concurrent workers starting up against the same server
+        cur.execute("SELECT GET_LOCK('schema_migrations', 60)")
+        cur.fetchall()
+
+    applied = []
+    try:
+        for version, description, statements in MIGRATIONS:
+            if version <= schema_version(conn):
+                continue
+            if dialect == "sqlite":
+                # take the write lock before re-checking, another worker may have won
+                cur.execute("BEGIN IMMEDIATE")
+                if version <= schema_version(conn):
+                    conn.rollback()
+                    continue
+            try:
+                for stmt in statements(dialect):
+                    cur.execute(stmt)
+                cur.execute(f"INSERT INTO schema_version(version, description) VALUES({param},{param})",
+                            (version, description))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied.append(version)
+    finally:
+        if dialect == "mysql":
+            cur.execute("SELECT RELEASE_LOCK('schema_migrations')")
+            cur.fetchall()
+        cur.close()
+    return applied
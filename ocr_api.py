@@ -0,0 +1,48 @@
+"""
+OCR endpoints (/api/v1/ocr/*): uploads are OCR'd by ocr_job on a worker, the
+response carries the job id for /api/v1/jobs/status/<job_id>; /extractions
+pages through the user's history, full-text searched when q is given.
+"""
+import os
+import uuid
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user, login_required
+from werkzeug.utils import secure_filename
+from .db import get_db
+from .jobs import enqueue
+from .ocr_engine import ocr_job
+from .ocr_search import list_extractions, search_extractions
+
+ocr_bp = Blueprint("ocr_api", __name__)
+
+ALLOWED_EXTENSIONS = {".pdf", ".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".gif", ".webp"}
+
+
+@ocr_bp.route("/api/v1/ocr/upload", methods=["POST"])
+@login_required
+def upload():
+    upload = request.files.get("image") or request.files.get("file")
+    if upload is None or not upload.filename:
+        return jsonify({"error": "image is required"}), 400
+    filename = secure_filename(upload.filename)
+    if os.path.splitext(filename)[1].lower() not in ALLOWED_EXTENSIONS:
+        return jsonify({"error": f"unsupported file type, use one of {sorted(ALLOWED_EXTENSIONS)}"}), 400
+    folder = os.path.join(current_app.config["UPLOAD_FOLDER"], "ocr")
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{uuid.uuid4().hex}_{filename}")
+    upload.save(path)
+    job_id = enqueue(ocr_job, path, current_user.id, filename, True)
+    current_app.logger.info(f"OCR upload of {filename} by user {current_user.id}: job {job_id}")
+    return jsonify({"job_id": job_id, "status": "queued", "filename": filename}), 202
+
+
+@ocr_bp.route("/api/v1/ocr/extractions")
+@login_required
+def extractions():
+    limit = max(1, min(request.args.get("limit", 20, type=int), current_app.config.get("LISTING_MAX_LIMIT", 100)))
+    cursor = request.args.get("cursor")
+    q = (request.args.get("q") or "").strip()
+    db = get_db(readonly=True)
+    if q:
+        return jsonify(search_extractions(db, current_user.id, q, limit, cursor))
+    return jsonify(list_extractions(db, current_user.id, limit, cursor))
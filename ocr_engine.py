@@ -0,0 +1,174 @@
+"""
+Page-parallel OCR for /ocr/upload
+PDFs are split into pages that are rendered and OCR'd in a process pool sized
+to the available cores (OCR_WORKERS overrides). Finished pages are saved to
+ocr_pages as they complete, so a file whose content hash was already extracted
+(even partially) is not OCR'd again. The job status only carries page counts
+and the last finished page; the text is read back from ocr_pages at the end.
+Pages are rendered with pdf2image when it is installed; otherwise PyPDF2 is
+used - its text layer when the page has one, its embedded images if not.
+"""
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from flask import current_app
+from .db import get_db
+from .jobs import job_app_context, set_progress
+from .rag_ingest import file_hash
+
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not on Linux
+        return os.cpu_count() or 1
+
+
+def _worker_init():
+    # one tesseract thread per process, the pool provides the parallelism
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def _get_pool():
+    global _pool, _pool_key
+    workers = current_app.config.get("OCR_WORKERS", 0) or available_cores()
+    key = (os.getpid(), workers)
+    if _pool is None or _pool_key != key:
+        with _pool_lock:
+            if _pool is None or _pool_key != key:
+                if _pool is not None and _pool_key[0] == os.getpid():
+                    _pool.shutdown(wait=False)
+                _pool = ProcessPoolExecutor(max_workers=workers, initializer=_worker_init)
+                _pool_key = key
+    return _pool
+
+
+def _ocr_image(image, lang):
+    """Returns (text, mean word confidence)"""
+    import pytesseract
+    data = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
+    lines, confs = {}, []
+    for i, word in enumerate(data["text"]):
+        if not word.strip():
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(key, []).append(word)
+        conf = float(data["conf"][i])
+        if conf >= 0:
+            confs.append(conf)
+    text = "\n".join(" ".join(words) for _, words in sorted(lines.items()))
+    return text, (sum(confs) / len(confs) if confs else 0.0)
+
+
+def _ocr_pdf_page(path, page, dpi, lang, min_text_chars):
+    """OCR one PDF page (0-based) in a pool worker, returns (page, text, confidence)"""
+    try:
+        from pdf2image import convert_from_path
+    except ImportError:
+        convert_from_path = None
+    if convert_from_path is not None:
+        images = convert_from_path(path, dpi=dpi, first_page=page + 1, last_page=page + 1)
+        text, conf = _ocr_image(images[0], lang) if images else ("", 0.0)
+        return page, text, conf
+
+    from PIL import Image
+    from PyPDF2 import PdfReader
+    pdf_page = PdfReader(path).pages[page]
+    text = pdf_page.extract_text() or ""
+    if len(text.strip()) >= min_text_chars:
+        return page, text, 100.0  # born-digital page, nothing to recognize
+    parts, confs = [], []
+    for embedded in pdf_page.images:
+        part, conf = _ocr_image(Image.open(io.BytesIO(embedded.data)), lang)
+        parts.append(part)
+        confs.append(conf)
+    return page, "\n".join(parts), (sum(confs) / len(confs) if confs else 0.0)
+
+
+def _ocr_image_file(path, page, dpi, lang, min_text_chars):
+    from PIL import Image
+    with Image.open(path) as image:
+        text, conf = _ocr_image(image, lang)
+    return page, text, conf
+
+
+def page_count(path):
+    if os.path.splitext(path)[1].lower() != ".pdf":
+        return 1
+    from PyPDF2 import PdfReader
+    with open(path, "rb") as fh:
+        return len(PdfReader(fh).pages)
+
+
+def cached_pages(content_hash):
+    """Already extracted pages for a file hash, {page: (text, confidence)}"""
+    rows = get_db(readonly=True).execute(
+        "SELECT page, text, confidence FROM ocr_pages WHERE content_hash=?", (content_hash,)).fetchall()
+    return {r["page"]: (r["text"], r["confidence"]) for r in rows}
+
+
+def _save_page(content_hash, page, total, text, confidence):
+    db = get_db(readonly=False)
+    # REPLACE: two jobs for the same file may both finish a page
+    db.execute("REPLACE INTO ocr_pages(content_hash, page, page_count, text, confidence) VALUES(?,?,?,?,?)",
+               (content_hash, page, total, text, confidence))
+    db.commit()
+
+
+def extract(path):
+    """OCR an image or PDF, returns {"text", "confidence", "pages", "content_hash", "cached_pages"}"""
+    cfg = current_app.config
+    content_hash = file_hash(path)
+    total = page_count(path)
+    done = set(cached_pages(content_hash))
+    cached = len(done)
+    todo = [p for p in range(total) if p not in done]
+
+    def report(last=None):
+        set_progress(len(done) / (total or 1) * 100, pages_done=len(done), pages_total=total, result=last)
+
+    report()
+    if todo:
+        fn = _ocr_pdf_page if os.path.splitext(path)[1].lower() == ".pdf" else _ocr_image_file
+        args = (cfg.get("OCR_DPI", 300), cfg.get("OCR_LANG", "eng"), cfg.get("OCR_MIN_TEXT_CHARS", 32))
+        pool = _get_pool()
+        futures = [pool.submit(fn, os.path.abspath(path), page, *args) for page in todo]
+        for future in as_completed(futures):
+            page, text, conf = future.result()
+            _save_page(content_hash, page, total, text, conf)
+            done.add(page)
+            report({"page": page + 1, "confidence": conf})
+
+    pages = cached_pages(content_hash)
+    ordered = [pages[p] for p in range(total)]
+    confs = [conf for _, conf in ordered if conf is not None]
+    return {
+        "text": "\n\n".join(text for text, _ in ordered),
+        "confidence": round(sum(confs) / len(confs), 2) if confs else 0.0,
+        "pages": total,
+        "content_hash": content_hash,
+        "cached_pages": cached,
+    }
+
+
+def ocr_job(path, user_id, filename=None, remove_after=False):
+    """Job entry point for /ocr/upload, saves the extraction to the user's history
+
+    remove_after deletes the uploaded copy once it is saved, repeats of the
+    same file are served from ocr_pages by content hash anyway.
+    """
+    with job_app_context():
+        result = extract(path)
+        filename = filename or os.path.basename(path)
+        db = get_db(readonly=False)
+        db.execute("INSERT INTO ocr_extractions(user_id, filename, extracted_text) VALUES(?,?,?)",
+                   (user_id, filename, result["text"]))
+        db.commit()
+    if remove_after:
+        os.remove(path)
+    return dict(result, filename=filename)
@@ -0,0 +1,105 @@
+"""
+Full-text search over OCR extraction history
+SQLite uses the ocr_extractions_fts FTS5 table (bm25 ranking, snippet()),
+MySQL the FULLTEXT index in boolean mode; both are kept current as
+extractions are saved (migration 4). Pages are fetched with an opaque keyset
+cursor over (score, id), so deep pages cost the same as the first one.
+"""
+import re
+from .pagination import decode_cursor, page
+
+SNIPPET_OPEN, SNIPPET_CLOSE, SNIPPET_WORDS = "[", "]", 16
+
+
+def _dialect(conn):
+    return "sqlite" if hasattr(conn, "executescript") else "mysql"
+
+
+def _terms(q):
+    return re.findall(r"\w+", q.lower())[:16]
+
+
+def _python_snippet(text, terms):
+    # MySQL has no snippet(): window around the first matching word
+    words = text.split()
+    hit = next((i for i, w in enumerate(words) if any(t in w.lower() for t in terms)), 0)
+    start = max(hit - SNIPPET_WORDS // 2, 0)
+    window = [f"{SNIPPET_OPEN}{w}{SNIPPET_CLOSE}" if any(t in w.lower() for t in terms) else w
+              for w in words[start:start + SNIPPET_WORDS]]
+    return ("..." if start else "") + " ".join(window) + ("..." if start + SNIPPET_WORDS < len(words) else "")
+
+
+def _search_sqlite(db, user_id, terms, match_any, after, limit, with_text):
+    match = (" OR " if match_any else " ").join(f'"{t}"*' for t in terms)
+    keyset = "WHERE score > ? OR (score = ? AND id > ?)" if after else ""
+    params = [match, user_id] + ([after[0], after[0], after[1]] if after else []) + [limit]
+    rows = db.execute(f"""
+        SELECT * FROM (
+            SELECT e.id, e.filename, e.created_at, {"e.extracted_text," if with_text else ""}
+                   snippet(ocr_extractions_fts, 0, '{SNIPPET_OPEN}', '{SNIPPET_CLOSE}', '...', {SNIPPET_WORDS}) AS snippet,
+                   bm25(ocr_extractions_fts) AS score
+            FROM ocr_extractions_fts JOIN ocr_extractions e ON e.id = ocr_extractions_fts.rowid
+            WHERE ocr_extractions_fts MATCH ? AND e.user_id = ?)
+        {keyset}
+        ORDER BY score, id LIMIT ?""", params).fetchall()
+    # bm25 is lower-is-better, flip it so callers always get higher-is-better
+    return [dict(dict(r), rank=-r["score"]) for r in rows]
+
+
+def _search_mysql(db, user_id, terms, match_any, after, limit, with_text):
+    against = " ".join(f"{'' if match_any else '+'}{t}*" for t in terms)
+    keyset = "HAVING score < %s OR (score = %s AND id < %s)" if after else ""
+    params = [against, user_id, against] + ([after[0], after[0], after[1]] if after else []) + [limit]
+    cur = db.cursor(dictionary=True)
+    cur.execute(f"""
+        SELECT id, filename, created_at, extracted_text,
+               MATCH(extracted_text, filename) AGAINST(%s IN BOOLEAN MODE) AS score
+        FROM ocr_extractions
+        WHERE user_id = %s AND MATCH(extracted_text, filename) AGAINST(%s IN BOOLEAN MODE)
+        {keyset}
+        ORDER BY score DESC, id DESC LIMIT %s""", params)
+    rows = cur.fetchall()
+    cur.close()
+    items = []
+    for r in rows:
+        item = dict(r, snippet=_python_snippet(r["extracted_text"], terms), rank=float(r["score"]), score=float(r["score"]))
+        if not with_text:
+            item.pop("extracted_text")
+        items.append(item)
+    return items
+
+
+def search_extractions(db, user_id, q, limit=20, cursor=None, match_any=False, with_text=False):
+    """Ranked matches for q, returns {"items", "next_cursor"}
+
+    Items carry id, filename, created_at, snippet and rank (higher is better).
+    match_any=True matches any term instead of all of them (used by the tutor).
+    """
+    terms = _terms(q)
+    if not terms:
+        return {"items": [], "next_cursor": None}
+    search = _search_sqlite if _dialect(db) == "sqlite" else _search_mysql
+    items = search(db, user_id, terms, match_any, decode_cursor(cursor, float, int), limit + 1, with_text)
+    result = page(items, limit, lambda item: (item["score"], item["id"]))
+    for item in result["items"]:
+        item.pop("score")
+    return result
+
+
+def list_extractions(db, user_id, limit=20, cursor=None):
+    """Newest first without a query, same {"items", "next_cursor"} shape"""
+    after = decode_cursor(cursor, int)
+    param = "?" if _dialect(db) == "sqlite" else "%s"
+    sql = f"SELECT id, filename, created_at FROM ocr_extractions WHERE user_id = {param}"
+    params = [user_id]
+    if after:
+        sql += f" AND id < {param}"
+        params.append(after[0])
+    sql += f" ORDER BY id DESC LIMIT {param}"
+    params.append(limit + 1)
+    cur = db.cursor()
+    cur.execute(sql, params)
+    columns = [c[0] for c in cur.description]
+    items = [dict(zip(columns, row)) for row in cur.fetchall()]
+    cur.close()
+    return page(items, limit, lambda item: (item["id"],))
@@ -0,0 +1,34 @@
+"""
+Keyset (cursor) pagination helpers
+A cursor is the sort key of the last row of a page, base64 encoded so
+clients treat it as opaque. Pages are fetched with limit + 1 rows to know
+whether another page follows.
+"""
+import base64
+import json
+
+
+def encode_cursor(*values):
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode()
+
+
+def decode_cursor(cursor, *types):
+    """Tuple of values converted with types, None for a missing or invalid cursor"""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(types):
+            return None
+        return tuple(t(v) for t, v in zip(types, values))
+    except (ValueError, TypeError):
+        return None
+
+
+def page(items, limit, key):
+    """{"items", "next_cursor"} from up to limit + 1 fetched rows, key(item) -> cursor values"""
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(*key(items[-1]))
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,77 @@
+"""
+Password hashing off the request thread
+pbkdf2 runs in a small process pool with a bounded queue; when the queue is
+full callers get HashingBusy straight away instead of piling up behind it.
+PASSWORD_POOL_WORKERS=0 hashes inline (old behaviour).
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app
+from passlib.hash import pbkdf2_sha256
+
+_pool = None
+_pool_pid = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full or a hash did not finish in time"""
+
+
+def _hash(password, rounds):
+    return pbkdf2_sha256.using(rounds=rounds).hash(password)
+
+
+def _verify(password, password_hash, rounds):
+    """Returns (ok, new_hash) - new_hash is set when the stored cost is outdated"""
+    if not pbkdf2_sha256.verify(password, password_hash):
+        return False, None
+    hasher = pbkdf2_sha256.using(rounds=rounds)
+    if hasher.needs_update(password_hash):
+        return True, hasher.hash(password)
+    return True, None
+
+
+def _get_pool():
+    global _pool, _pool_pid, _slots
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                cfg = current_app.config
+                workers = cfg.get("PASSWORD_POOL_WORKERS", 2)
+                _pool = ProcessPoolExecutor(max_workers=workers)
+                _slots = threading.BoundedSemaphore(workers + cfg.get("PASSWORD_POOL_QUEUE", 32))
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def _run(fn, *args):
+    cfg = current_app.config
+    if cfg.get("PASSWORD_POOL_WORKERS", 2) <= 0:
+        return fn(*args)
+    pool, slots = _get_pool(), _slots
+    if not slots.acquire(blocking=False):
+        raise HashingBusy("password hashing queue is full")
+    try:
+        future = pool.submit(fn, *args)
+    except BaseException:
+        slots.release()
+        raise
+    # the slot is held until the hash really ends, not until the caller gives up on it
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=cfg.get("PASSWORD_POOL_TIMEOUT", 10))
+    except FutureTimeout:
+        future.cancel()
+        raise HashingBusy("password hashing timed out")
+
+
+def hash_password(password):
+    return _run(_hash, password, current_app.config.get("PASSWORD_HASH_ROUNDS", 29000))
+
+
+def verify_password(password, password_hash):
+    """Check a password, returns (ok, new_hash); store new_hash when it is not None"""
+    return _run(_verify, password, password_hash, current_app.config.get("PASSWORD_HASH_ROUNDS", 29000))
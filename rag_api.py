@@ -0,0 +1,59 @@
+"""
+RAG endpoints (/api/v1/rag/*): ingest and reindex run as background jobs,
+the response carries the job id for /api/v1/jobs/status/<job_id>.
+"""
+import os
+import re
+import uuid
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user
+from werkzeug.utils import secure_filename
+from .jobs import enqueue
+from .rag_ingest import ingest_job, reindex_job
+from .roles import role_required
+
+rag_bp = Blueprint("rag_api", __name__)
+
+ALLOWED_EXTENSIONS = {".pdf", ".docx", ".txt", ".md"}
+
+
+def _namespace(value):
+    namespace = value or "default"
+    return namespace if re.fullmatch(r"[A-Za-z0-9_-]{1,64}", namespace) else None
+
+
+@rag_bp.route("/api/v1/rag/ingest", methods=["POST"])
+@role_required("teacher", "admin")
+def ingest():
+    upload = request.files.get("file")
+    namespace = _namespace(request.form.get("namespace"))
+    if upload is None or not upload.filename:
+        return jsonify({"error": "file is required"}), 400
+    if namespace is None:
+        return jsonify({"error": "invalid namespace"}), 400
+    filename = secure_filename(upload.filename)
+    if os.path.splitext(filename)[1].lower() not in ALLOWED_EXTENSIONS:
+        return jsonify({"error": f"unsupported file type, use one of {sorted(ALLOWED_EXTENSIONS)}"}), 400
+    # kept outside RAG_SOURCE_DIR: /rag/reindex mirrors that folder and must not see uploads
+    folder = os.path.join(current_app.config["UPLOAD_FOLDER"], "rag_ingest", namespace)
+    os.makedirs(folder, exist_ok=True)
+    # the stored name is the doc_id: ingest replaces an existing doc_id, so a
+    # second upload of notes.pdf must not take over (and drop) the first one's chunks
+    doc_id = f"{uuid.uuid4().hex}_{filename}"
+    path = os.path.join(folder, doc_id)
+    upload.save(path)
+    job_id = enqueue(ingest_job, path, namespace, doc_id, True)
+    current_app.logger.info(f"RAG ingest of {filename} into {namespace} by user {current_user.id}: job {job_id}")
+    return jsonify({"job_id": job_id, "status": "queued", "doc_id": doc_id, "filename": filename,
+                    "namespace": namespace}), 202
+
+
+@rag_bp.route("/api/v1/rag/reindex", methods=["POST"])
+@role_required("admin")
+def reindex():
+    payload = request.get_json(silent=True) or {}
+    namespace = payload.get("namespace") or request.form.get("namespace")
+    if namespace is not None and _namespace(namespace) is None:
+        return jsonify({"error": "invalid namespace"}), 400
+    job_id = enqueue(reindex_job, namespace)
+    return jsonify({"job_id": job_id, "status": "queued", "namespace": namespace}), 202
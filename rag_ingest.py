@@ -0,0 +1,210 @@
+"""
+Streaming RAG ingestion for /rag/ingest and incremental /rag/reindex
+Pages are extracted lazily, chunked incrementally and embedded in fixed-size
+batches that are appended to the namespace index as they are produced, so
+peak memory depends on the batch size and not on the document size.
+Documents are tracked by content hash: reindex only drops/re-ingests the
+ones that changed, and chunk embeddings come from the embedding cache.
+Documents are tagged with their origin; reindex only ever drops documents
+that came from the source folder, never ones uploaded through /rag/ingest.
+"""
+import hashlib
+import os
+import zipfile
+from xml.etree.ElementTree import iterparse
+from flask import current_app
+from .embedding_cache import cached_embed
+from .jobs import job_app_context, set_progress
+from .tutor_cache import invalidate as invalidate_tutor_cache
+from .vector_index import get_namespace_index
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+TEXT_BLOCK = 64 * 1024
+
+
+class _CountingReader:
+    """File wrapper counting bytes read, for progress on compressed streams"""
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.fh.read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def _pdf_pages(path):
+    from PyPDF2 import PdfReader
+    with open(path, "rb") as fh:
+        # a file object keeps PyPDF2 reading from disk instead of buffering the whole file
+        reader = PdfReader(fh)
+        total = len(reader.pages) or 1
+        for i, page in enumerate(reader.pages):
+            yield page.extract_text() or "", (i + 1) / total
+
+
+def _docx_pages(path):
+    # stream word/document.xml paragraph by paragraph instead of loading the DOM
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo("word/document.xml")
+        with zf.open(info) as raw:
+            stream = _CountingReader(raw)
+            block = []
+            for _, elem in iterparse(stream, events=("end",)):
+                if elem.tag == WORD_NS + "p":
+                    block.append("".join(t.text or "" for t in elem.iter(WORD_NS + "t")))
+                    elem.clear()
+                    if sum(len(p) for p in block) >= TEXT_BLOCK:
+                        yield "\n".join(block), stream.bytes_read / (info.file_size or 1)
+                        block = []
+            if block:
+                yield "\n".join(block), 1.0
+
+
+def _text_pages(path):
+    total = os.path.getsize(path) or 1
+    with open(path, "r", encoding="utf-8", errors="replace") as fh:
+        read = 0
+        while True:
+            block = fh.read(TEXT_BLOCK)
+            if not block:
+                break
+            read += len(block)
+            yield block, min(read / total, 1.0)
+
+
+def iter_pages(path):
+    """Yield (text, fraction_done) one page or block at a time"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".pdf":
+        return _pdf_pages(path)
+    if ext == ".docx":
+        return _docx_pages(path)
+    return _text_pages(path)
+
+
+def iter_chunks(pages, size=1000, overlap=150):
+    """Split a page stream into overlapping chunks, yields (chunk, fraction_done)"""
+    buf, fraction = "", 0.0
+    for text, fraction in pages:
+        buf += text + "\n"
+        while len(buf) >= size:
+            cut = buf.rfind(" ", size // 2, size)
+            cut = cut if cut > 0 else size
+            chunk = buf[:cut].strip()
+            if chunk:
+                yield chunk, fraction
+            # start the overlap on a word boundary
+            start = buf.find(" ", max(cut - overlap, 1), cut)
+            buf = buf[start + 1 if start > 0 else max(cut - overlap, 1):]
+    if buf.strip():
+        yield buf.strip(), fraction
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _ingest_into(writer, path, doc_id, content_hash, progress=(0, 99), source="upload"):
+    """Chunk, embed and append one document through an open index writer"""
+    cfg = current_app.config
+    batch_size = cfg.get("RAG_EMBED_BATCH", 64)
+    lo, hi = progress
+    count, batch = 0, []
+    for text, fraction in iter_chunks(iter_pages(path), cfg.get("RAG_CHUNK_SIZE", 1000), cfg.get("RAG_CHUNK_OVERLAP", 150)):
+        batch.append((doc_id, count, text))
+        count += 1
+        if len(batch) >= batch_size:
+            writer.add(cached_embed([c[2] for c in batch]), batch)
+            batch = []
+            set_progress(lo + (hi - lo) * fraction, stage="ingesting", doc_id=doc_id, chunks=count)
+    if batch:
+        writer.add(cached_embed([c[2] for c in batch]), batch)
+    writer.record_document(doc_id, content_hash, count, source)
+    return count
+
+
+def ingest_document(path, namespace="default", doc_id=None):
+    """Stream a document into a namespace index, returns a summary dict
+
+    Re-ingesting an unchanged file is a no-op, a changed file replaces the old chunks.
+    """
+    cfg = current_app.config
+    doc_id = doc_id or os.path.basename(path)
+    index = get_namespace_index(namespace)
+    content_hash = file_hash(path)
+    if index.documents().get(doc_id) == content_hash:
+        set_progress(100, stage="done", chunks=0)
+        return {"doc_id": doc_id, "namespace": namespace, "chunks": 0, "unchanged": True}
+
+    set_progress(0, stage="ingesting", chunks=0)
+    with index.writer(flush_every=cfg.get("RAG_INGEST_FLUSH_EVERY", 20)) as writer:
+        writer.drop_documents([doc_id])
+        count = _ingest_into(writer, path, doc_id, content_hash)
+    invalidate_tutor_cache(namespace=namespace)
+    set_progress(100, stage="done", chunks=count)
+    return {"doc_id": doc_id, "namespace": namespace, "chunks": count}
+
+
+def reindex_namespace(namespace="default", source_dir=None):
+    """Bring a namespace in line with its source folder, touching only what changed"""
+    cfg = current_app.config
+    source_dir = source_dir or os.path.join(cfg.get("RAG_SOURCE_DIR", "uploads/rag"), namespace)
+    index = get_namespace_index(namespace)
+    indexed = index.documents()
+
+    set_progress(0, stage="hashing", namespace=namespace)
+    current = {}
+    for root, _, files in os.walk(source_dir):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            current[os.path.relpath(path, source_dir).replace(os.sep, "/")] = (path, file_hash(path))
+
+    from_dir = index.documents(source="dir")
+    added = [d for d in current if d not in indexed]
+    modified = [d for d in current if d in indexed and indexed[d] != current[d][1]]
+    # uploads are not stored in source_dir, only documents that came from it can have been deleted
+    deleted = [d for d in from_dir if d not in current]
+    retag = [d for d in current if d in indexed and d not in from_dir and d not in modified]
+    summary = {"namespace": namespace, "unchanged": len(current) - len(added) - len(modified),
+               "added": len(added), "modified": len(modified), "deleted": len(deleted), "chunks": 0}
+    todo = modified + added
+    if todo or deleted:
+        with index.writer(flush_every=cfg.get("RAG_INGEST_FLUSH_EVERY", 20)) as writer:
+            writer.drop_documents(modified + deleted)
+            for i, doc_id in enumerate(todo):
+                path, content_hash = current[doc_id]
+                span = (5 + 94 * i / len(todo), 5 + 94 * (i + 1) / len(todo))
+                summary["chunks"] += _ingest_into(writer, path, doc_id, content_hash, progress=span, source="dir")
+        invalidate_tutor_cache(namespace=namespace)
+    if retag:
+        # same file now lives in source_dir (or was indexed before origins were tracked)
+        with index.writer() as writer:
+            writer.tag_documents(retag, "dir")
+    set_progress(100, stage="done", **summary)
+    return summary
+
+
+def ingest_job(path, namespace="default", doc_id=None, remove_after=False):
+    """Job entry point for /rag/ingest, remove_after deletes the uploaded copy once it is indexed"""
+    with job_app_context():
+        result = ingest_document(path, namespace, doc_id)
+    if remove_after:
+        os.remove(path)
+    return result
+
+
+def reindex_job(namespace=None):
+    """Job entry point for /rag/reindex, all namespaces when none is given"""
+    with job_app_context():
+        if namespace:
+            return [reindex_namespace(namespace)]
+        root = current_app.config.get("RAG_SOURCE_DIR", "uploads/rag")
+        names = sorted(d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d))) if os.path.isdir(root) else []
+        return [reindex_namespace(name) for name in names]
@@ -1,26 +1,186 @@
+"""
+Seed demo accounts and, optionally, a production-sized synthetic dataset
+
+  python seed_demo.py                                  # demo users + sample test
+  python seed_demo.py --students 100000 --teachers 2000 --classrooms 4000 --seed 42
+
+Works against SQLite (SQLITE_PATH) or MySQL (DATABASE_URL with SQLITE_FALLBACK=0).
+Rows are generated lazily and written with executemany in large transactions;
+the same --seed always produces the same data.
+"""
 from passlib.hash import pbkdf2_sha256
-import sqlite3, json, os
+import argparse, itertools, json, os, random, sqlite3, string, time
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 
 load_dotenv()
-path = os.getenv("SQLITE_PATH","instance/app.db")
-conn = sqlite3.connect(path)
-conn.row_factory = sqlite3.Row
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--students", type=int, default=0)
+parser.add_argument("--teachers", type=int, default=0)
+parser.add_argument("--classrooms", type=int, default=0)
+parser.add_argument("--assignments-per-classroom", type=float, default=8, help="mean, Poisson distributed")
+parser.add_argument("--classes-per-student", type=float, default=3, help="mean number of memberships")
+parser.add_argument("--submission-rate", type=float, default=0.8, help="share of members who submit")
+parser.add_argument("--seed", type=int, default=42)
+parser.add_argument("--batch-size", type=int, default=20000)
+parser.add_argument("--no-demo", action="store_true", help="skip the three demo accounts and sample test")
+args = parser.parse_args()
+
+rng = random.Random(args.seed)
+use_mysql = bool(os.getenv("DATABASE_URL")) and os.getenv("SQLITE_FALLBACK", "1") != "1"
+if use_mysql:
+    import mysql.connector
+    url = urlparse(os.getenv("DATABASE_URL"))
+    conn = mysql.connector.connect(host=url.hostname, port=url.port or 3306, user=url.username,
+                                   password=url.password, database=url.path.lstrip("/"))
+    PARAM = "%s"
+else:
+    path = os.getenv("SQLITE_PATH","instance/app.db")
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous=OFF")  # bulk load, rerun on failure
+    PARAM = "?"
+
+PASSWORD_HASH = pbkdf2_sha256.hash("password123")  # shared by generated users, hashing 100k times is pointless
+TERM_START = datetime(2025, 7, 1)
+
+
+def _ts(dt):
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _sql(sql):
+    return sql.replace("?", PARAM)
+
+def _next_id(table):
+    cur = conn.cursor()
+    cur.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+    return cur.fetchone()[0] + 1
+
+def _bulk_insert(sql, rows):
+    """executemany in batches, one transaction per batch; returns row count"""
+    cur = conn.cursor()
+    total = 0
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, args.batch_size))
+        if not batch:
+            break
+        cur.executemany(_sql(sql), batch)
+        conn.commit()
+        total += len(batch)
+    return total
 
 def _insert_user(email, role, name):
-    conn.execute("INSERT INTO users(email,password_hash,role,full_name) VALUES(?,?,?,?)",
-                 (email, pbkdf2_sha256.hash("password123"), role, name))
-
-_insert_user("student@ai.com","student","Student One")
-_insert_user("teacher@ai.com","teacher","Teacher One")
-_insert_user("admin@ai.com","admin","Admin User")
-
-# Simple sample test
-conn.execute("""INSERT INTO assignments(classroom_id,title,content_json,time_limit_minutes)
-VALUES(0,'Sample Physics Test',?,30)""", (json.dumps({"questions":[
-    {"q":"Unit of force?","options":["N","J","Pa","W"],"answer":"N"},
-    {"q":"Speed formula?","options":["d/t","t/d","d*t","d^2"],"answer":"d/t"},
-    {"q":"g on Earth?","options":["9.8","1.6","3.7","24.8"],"answer":"9.8"},
-]}),))
-conn.commit()
-print("Seeded demo users and test.")
+    conn.cursor().execute(_sql("INSERT INTO users(email,password_hash,role,full_name) VALUES(?,?,?,?)"),
+                          (email, pbkdf2_sha256.hash("password123"), role, name))
+
+def _sample_questions(n):
+    questions = []
+    for i in range(n):
+        options = [rng.choice(string.ascii_uppercase) + str(j) for j in range(4)]
+        questions.append({"q": f"Question {i + 1}?", "options": options, "answer": rng.choice(options)})
+    return questions
+
+def _poisson(mean):
+    # Knuth, fine for the small means used here
+    limit, k, p = pow(2.718281828459045, -mean), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+if not args.no_demo:
+    _insert_user("student@ai.com","student","Student One")
+    _insert_user("teacher@ai.com","teacher","Teacher One")
+    _insert_user("admin@ai.com","admin","Admin User")
+
+    # Simple sample test
+    conn.cursor().execute(_sql("""INSERT INTO assignments(classroom_id,title,content_json,time_limit_minutes)
+    VALUES(0,'Sample Physics Test',?,30)"""), (json.dumps({"questions":[
+        {"q":"Unit of force?","options":["N","J","Pa","W"],"answer":"N"},
+        {"q":"Speed formula?","options":["d/t","t/d","d*t","d^2"],"answer":"d/t"},
+        {"q":"g on Earth?","options":["9.8","1.6","3.7","24.8"],"answer":"9.8"},
+    ]}),))
+    conn.commit()
+    print("Seeded demo users and test.")
+
+if args.students or args.teachers or args.classrooms:
+    started = time.perf_counter()
+    teachers = max(args.teachers, 1)
+
+    # users
+    first_user = _next_id("users")
+    teacher_ids = list(range(first_user, first_user + teachers))
+    student_ids = list(range(first_user + teachers, first_user + teachers + args.students))
+    n = _bulk_insert("INSERT INTO users(id,email,password_hash,role,full_name) VALUES(?,?,?,?,?)",
+                     ((uid, f"{role}{uid}@load.test", PASSWORD_HASH, role, f"{role.title()} {uid}")
+                      for role, ids in (("teacher", teacher_ids), ("student", student_ids)) for uid in ids))
+    print(f"users: {n}")
+
+    # classrooms - a few teachers own many classes (Pareto)
+    first_class = _next_id("classrooms")
+    classroom_ids = list(range(first_class, first_class + args.classrooms))
+    owner_weights = [rng.paretovariate(1.5) for _ in teacher_ids]
+    owners = rng.choices(teacher_ids, weights=owner_weights, k=len(classroom_ids))
+    n = _bulk_insert("INSERT INTO classrooms(id,name,join_code,created_by,created_at) VALUES(?,?,?,?,?)",
+                     ((cid, f"Class {cid}", "".join(rng.choices(string.ascii_uppercase + string.digits, k=6)),
+                       owner, _ts(TERM_START + timedelta(days=rng.randint(0, 30))))
+                      for cid, owner in zip(classroom_ids, owners)))
+    print(f"classrooms: {n}")
+
+    # memberships - class popularity is skewed, each student joins ~N classes
+    members = {cid: [] for cid in classroom_ids}
+    if classroom_ids:
+        popularity = [rng.paretovariate(1.2) for _ in classroom_ids]
+        cumulative = list(itertools.accumulate(popularity))
+        for sid in student_ids:
+            k = min(max(1, _poisson(args.classes_per_student)), len(classroom_ids))
+            for cid in set(rng.choices(classroom_ids, cum_weights=cumulative, k=k)):
+                members[cid].append(sid)
+    n = _bulk_insert("INSERT INTO classroom_members(classroom_id,user_id) VALUES(?,?)",
+                     ((cid, sid) for cid, sids in members.items() for sid in sids))
+    print(f"memberships: {n}")
+
+    # assignments - 3 to 20 questions each, due dates spread over the term
+    first_assignment = _next_id("assignments")
+    assignments = []  # (id, classroom_id, answer key, due_at)
+    for cid in classroom_ids:
+        for _ in range(_poisson(args.assignments_per_classroom)):
+            questions = _sample_questions(rng.randint(3, 20))
+            due_at = TERM_START + timedelta(days=rng.randint(7, 120))
+            assignments.append((first_assignment + len(assignments), cid, questions, due_at))
+    n = _bulk_insert("INSERT INTO assignments(id,classroom_id,title,content_json,time_limit_minutes,due_at) VALUES(?,?,?,?,?,?)",
+                     ((aid, cid, f"Assessment {aid}", json.dumps({"questions": qs}), rng.choice((15, 30, 45, 60)), _ts(due))
+                      for aid, cid, qs, due in assignments))
+    print(f"assignments: {n}")
+
+    # submissions - per-student ability drives a beta-distributed accuracy
+    ability = {sid: rng.betavariate(5, 2) for sid in student_ids}
+
+    def _submissions():
+        for aid, cid, questions, due_at in assignments:
+            for sid in members[cid]:
+                if rng.random() > args.submission_rate:
+                    continue
+                answers, correct = [], 0
+                for q in questions:
+                    if rng.random() < ability[sid]:
+                        answers.append(q["answer"])
+                        correct += 1
+                    else:
+                        answers.append(rng.choice(q["options"]))
+                        correct += answers[-1] == q["answer"]
+                submitted_at = due_at - timedelta(minutes=rng.expovariate(1 / 2880))
+                yield (aid, sid, json.dumps(answers), round(100.0 * correct / len(questions), 2), _ts(submitted_at))
+
+    n = _bulk_insert("INSERT INTO submissions(assignment_id,user_id,answers_json,score,submitted_at) VALUES(?,?,?,?,?)",
+                     _submissions())
+    print(f"submissions: {n}")
+    print(f"Generated dataset (seed={args.seed}) in {time.perf_counter() - started:.1f}s")
+
+conn.close()
@@ -0,0 +1,14 @@
+"""
+Server-Sent Events helpers shared by the tutor and job status streams
+"""
+import json
+from flask import Response, stream_with_context
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(events):
+    return Response(stream_with_context(events), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,52 @@
+"""
+Readers must memory-map the search index, not copy it into each process
+"""
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+pytest.importorskip("flask")
+
+MODULE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vector_index.py")
+_spec = importlib.util.spec_from_file_location("vector_index", MODULE_PATH)
+vector_index = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(vector_index)
+
+# a fresh process, like a gunicorn worker: RSS growth while loading is what the reader copied
+LOAD_READER = """
+import importlib.util, json, os, sys
+spec = importlib.util.spec_from_file_location("vector_index", sys.argv[1])
+vector_index = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(vector_index)
+ns = vector_index.NamespaceIndex(sys.argv[2], "ns")
+rss = lambda: int(open("/proc/self/statm").read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+before = rss()
+index = ns._load_reader()
+print(json.dumps({"grown": rss() - before, "ntotal": index.ntotal}))
+"""
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc to measure RSS")
+@pytest.mark.parametrize("kind, rows, flat_max", [("flat", 60000, 100000), ("hnsw", 20000, 1000)])
+def test_reader_maps_index(tmp_path, kind, rows, flat_max):
+    ns = vector_index.NamespaceIndex(str(tmp_path), "ns", flat_max=flat_max)
+    vectors = np.random.default_rng(0).standard_normal((rows, 128)).astype("float32")
+    ns.add(vectors, [("doc", i, f"chunk {i}") for i in range(rows)])
+    assert ns._info("kind") == kind
+    size = os.path.getsize(ns.index_path)
+
+    out = subprocess.run([sys.executable, "-c", LOAD_READER, MODULE_PATH, str(tmp_path)],
+                         capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout)
+
+    # the vector storage must stay in the page cache; HNSW still reads its graph
+    assert result["ntotal"] == rows
+    assert result["grown"] < size - vectors.nbytes / 2, f"{kind} index of {size} bytes grew RSS by {result['grown']}"
+    scores, ids = ns.search_vectors(vectors[:5], k=1)
+    assert list(ids[:, 0]) == [0, 1, 2, 3, 4]
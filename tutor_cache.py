@@ -0,0 +1,142 @@
+"""
+Semantic response cache for the AI tutor (in front of Gemini)
+Entries are scoped per classroom and keyed by the question embedding plus a
+hash of the retrieved context: a new question reuses a cached reply when its
+context hash matches and cosine similarity is above TUTOR_CACHE_THRESHOLD.
+Entries are dropped after TUTOR_CACHE_TTL, by LRU beyond TUTOR_CACHE_SIZE,
+and as soon as a namespace they drew from is re-indexed (checked via the
+index file generation, so ingest jobs in other processes are seen too).
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from flask import current_app
+from .embeddings import embed
+from .vector_index import get_namespace_index
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # entry id -> entry dict, oldest first
+_next_id = 0
+_stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0, "invalidations": 0, "latency_saved_s": 0.0}
+
+
+def context_hash(chunks):
+    """Stable hash of the retrieved context (list of chunk dicts or strings)"""
+    h = hashlib.sha256()
+    for chunk in chunks:
+        text = chunk.get("text", "") if isinstance(chunk, dict) else str(chunk)
+        h.update(text.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _generations(namespaces):
+    return {ns: get_namespace_index(ns).generation() for ns in namespaces}
+
+
+def lookup(question_vector, ctx_hash, classroom_id=None):
+    """Return a cached reply dict or None"""
+    cfg = current_app.config
+    now = time.monotonic()
+    with _lock:
+        candidates = [(eid, e) for eid, e in _entries.items()
+                      if e["scope"] == classroom_id and e["context_hash"] == ctx_hash]
+        if not candidates:
+            _stats["misses"] += 1
+            return None
+        sims = np.stack([e["vector"] for _, e in candidates]) @ question_vector
+        best = int(np.argmax(sims))
+        eid, entry = candidates[best]
+        if sims[best] < cfg.get("TUTOR_CACHE_THRESHOLD", 0.92):
+            _stats["misses"] += 1
+            return None
+        if now - entry["created"] > cfg.get("TUTOR_CACHE_TTL", 3600):
+            del _entries[eid]
+            _stats["misses"] += 1
+            _stats["stale"] += 1
+            return None
+
+    if _generations(entry["generations"]) != entry["generations"]:
+        with _lock:
+            _entries.pop(eid, None)
+            _stats["misses"] += 1
+            _stats["stale"] += 1
+        return None
+
+    with _lock:
+        if eid in _entries:
+            _entries.move_to_end(eid)
+        _stats["hits"] += 1
+        _stats["latency_saved_s"] += entry["latency"]
+    return dict(entry["reply"], cached=True, similarity=round(float(sims[best]), 4))
+
+
+def store(question_vector, ctx_hash, reply, classroom_id=None, namespaces=(), latency=0.0):
+    global _next_id
+    entry = {
+        "scope": classroom_id,
+        "vector": np.asarray(question_vector, dtype="float32"),
+        "context_hash": ctx_hash,
+        "reply": reply,
+        "generations": _generations(namespaces),
+        "latency": latency,
+        "created": time.monotonic(),
+    }
+    max_entries = current_app.config.get("TUTOR_CACHE_SIZE", 2000)
+    with _lock:
+        _next_id += 1
+        _entries[_next_id] = entry
+        while len(_entries) > max_entries:
+            _entries.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+def cache_key(question, context_chunks, classroom_id=None, namespaces=()):
+    """Lookup key for a question and its context, None when the cache is disabled"""
+    if not current_app.config.get("TUTOR_CACHE_ENABLED", True):
+        return None
+    return {"vector": embed([question])[0], "context_hash": context_hash(context_chunks),
+            "classroom_id": classroom_id, "namespaces": tuple(namespaces)}
+
+
+def lookup_key(key):
+    return None if key is None else lookup(key["vector"], key["context_hash"], key["classroom_id"])
+
+
+def remember(key, reply, latency=0.0):
+    if key is not None:
+        store(key["vector"], key["context_hash"], reply, key["classroom_id"], key["namespaces"], latency)
+
+
+def cached_reply(question, context_chunks, generate, classroom_id=None, namespaces=()):
+    """Answer from the cache or call generate() -> reply dict and cache its result"""
+    key = cache_key(question, context_chunks, classroom_id, namespaces)
+    if key is None:
+        return generate()
+    reply = lookup_key(key)
+    if reply is not None:
+        return reply
+    started = time.perf_counter()
+    reply = generate()
+    remember(key, reply, time.perf_counter() - started)
+    return dict(reply, cached=False)
+
+
+def invalidate(classroom_id=None, namespace=None):
+    """Drop entries for a classroom and/or entries built from a namespace"""
+    with _lock:
+        doomed = [eid for eid, e in _entries.items()
+                  if (classroom_id is not None and e["scope"] == classroom_id)
+                  or (namespace is not None and namespace in e["generations"])]
+        for eid in doomed:
+            del _entries[eid]
+        _stats["invalidations"] += len(doomed)
+    return len(doomed)
+
+
+def tutor_cache_stats():
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return dict(_stats, entries=len(_entries), hit_rate=_stats["hits"] / lookups if lookups else 0.0)
@@ -0,0 +1,185 @@
+"""
+Multi-source context for the AI tutor
+OCR extractions, MySQL course data and RAG search run concurrently under a
+per-request deadline (TUTOR_CONTEXT_DEADLINE_MS). Sources that miss it are
+dropped; the rest are merged, ranked and packed into a token-budgeted block.
+A timed-out call keeps running in its pool thread, so once a source has
+TUTOR_CONTEXT_MAX_OVERDUE calls still running past their deadline, further
+requests skip it ("busy") instead of queueing behind the stuck ones; calls
+within their deadline are not counted. MySQL queries also carry a
+server-side execution time limit.
+"""
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import current_app
+from .db import close_db, get_db, get_mysql_data_connection
+from .ocr_search import search_extractions
+
+_executor = None
+_executor_lock = threading.Lock()
+_overdue = {}  # source name -> calls past their deadline and still running
+_overdue_lock = threading.Lock()
+
+_USER_CLASSROOMS = ("SELECT id FROM classrooms WHERE created_by = %(user_id)s "
+                    "UNION SELECT classroom_id FROM classroom_members WHERE user_id = %(user_id)s")
+
+# (label, query) run against get_mysql_data_connection(), %(like)s is the keyword pattern;
+# only classrooms the user teaches or belongs to are searched
+MYSQL_CONTEXT_QUERIES = [
+    ("classroom", f"SELECT name FROM classrooms WHERE id IN ({_USER_CLASSROOMS}) AND name LIKE %(like)s "
+                  "LIMIT %(limit)s"),
+    ("assignment", f"SELECT a.title, c.name FROM assignments a JOIN classrooms c ON c.id = a.classroom_id "
+                   f"WHERE a.classroom_id IN ({_USER_CLASSROOMS}) AND a.title LIKE %(like)s "
+                   "ORDER BY a.id DESC LIMIT %(limit)s"),
+]
+
+STOPWORDS = {"the", "a", "an", "is", "are", "what", "how", "why", "of", "to", "in", "and", "or", "for", "on", "with", "does", "do", "i", "me", "explain"}
+
+
+def _keywords(message):
+    words = [w for w in re.findall(r"[a-z0-9]+", message.lower()) if len(w) > 2 and w not in STOPWORDS]
+    return list(dict.fromkeys(words))[:8]
+
+
+def _overlap_score(text, keywords):
+    if not keywords:
+        return 0.0
+    lower = text.lower()
+    return sum(1 for k in keywords if k in lower) / len(keywords)
+
+
+def ocr_source(message, user_id, limit):
+    keywords = _keywords(message)
+    if not keywords:
+        return []
+    # full-text index (ocr_search), any keyword may match, bm25/FULLTEXT rank first
+    found = search_extractions(get_db(readonly=True), user_id, " ".join(keywords), limit=limit * 4,
+                               match_any=True, with_text=True)
+    return [{"text": r["extracted_text"][:2000], "source": f"ocr:{r['filename']}",
+             "score": _overlap_score(r["extracted_text"], keywords)} for r in found["items"]]
+
+
+def mysql_source(message, user_id, limit):
+    keywords = _keywords(message)
+    conn = get_mysql_data_connection() if keywords else None
+    if conn is None:
+        return []
+    # a statement that outlives the request deadline is stopped by the server
+    hint = f"SELECT /*+ MAX_EXECUTION_TIME({current_app.config.get('TUTOR_CONTEXT_DEADLINE_MS', 800)}) */"
+    items = []
+    try:
+        cur = conn.cursor()
+        for label, sql in MYSQL_CONTEXT_QUERIES:
+            cur.execute(sql.replace("SELECT", hint, 1),
+                        {"like": f"%{keywords[0]}%", "limit": limit, "user_id": user_id})
+            for row in cur.fetchall():
+                text = " - ".join(str(v) for v in row if v)
+                items.append({"text": text, "source": f"mysql:{label}", "score": _overlap_score(text, keywords)})
+        cur.close()
+    finally:
+        conn.close()
+    return items
+
+
+def rag_source(message, user_id, limit, namespace="default"):
+    from .vector_index import search
+    return [{"text": c["text"], "source": f"rag:{c['doc_id']}", "score": max(c["score"], 0.0)}
+            for c in search(message, namespace, limit)]
+
+
+SOURCES = {"ocr": ocr_source, "mysql": mysql_source, "rag": rag_source}
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=current_app.config.get("TUTOR_CONTEXT_WORKERS", 8),
+                                               thread_name_prefix="tutor-context")
+    return _executor
+
+
+def _mark_overdue(name, future):
+    with _overdue_lock:
+        _overdue[name] = _overdue.get(name, 0) + 1
+    # runs at once if the call finished in the meantime
+    future.add_done_callback(lambda _: _clear_overdue(name))
+
+
+def _clear_overdue(name):
+    with _overdue_lock:
+        _overdue[name] -= 1
+
+
+def _run_source(app, fn, message, user_id, limit, kwargs):
+    """Returns (items, seconds, error) so failures are timed too"""
+    started = time.perf_counter()
+    items, error = [], None
+    with app.app_context():
+        try:
+            items = fn(message, user_id, limit, **kwargs)
+        except Exception as e:
+            error = e
+        finally:
+            close_db()
+    return items, time.perf_counter() - started, error
+
+
+def _estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def assemble_context(message, user_id, namespace="default", sources=None, limit=5):
+    """Query sources in parallel, returns {"context", "chunks", "sources", "context_used"}"""
+    cfg = current_app.config
+    app = current_app._get_current_object()
+    deadline = cfg.get("TUTOR_CONTEXT_DEADLINE_MS", 800) / 1000
+    weights = cfg.get("TUTOR_CONTEXT_WEIGHTS", {"rag": 1.0, "ocr": 0.8, "mysql": 0.6})
+    names = list(sources or SOURCES)
+
+    max_overdue = cfg.get("TUTOR_CONTEXT_MAX_OVERDUE", 2)
+
+    executor = _get_executor()
+    futures, report = {}, {}
+    for name in names:
+        if _overdue.get(name, 0) >= max_overdue:
+            # earlier calls are stuck in it, don't tie up another pool thread
+            report[name] = {"status": "busy", "ms": 0.0, "items": 0, "used": 0}
+            continue
+        kwargs = {"namespace": namespace} if name == "rag" else {}
+        futures[executor.submit(_run_source, app, SOURCES[name], message, user_id, limit, kwargs)] = name
+    done, not_done = wait(futures, timeout=deadline)
+
+    candidates = []
+    for future in not_done:
+        if not future.cancel():  # still running ones finish in the background and are ignored
+            _mark_overdue(futures[future], future)
+        report[futures[future]] = {"status": "timeout", "ms": round(deadline * 1000, 1), "items": 0, "used": 0}
+    for future in done:
+        name = futures[future]
+        items, elapsed, error = future.result()
+        if error is not None:
+            current_app.logger.warning(f"Tutor context source {name} failed: {error}")
+            report[name] = {"status": "error", "ms": round(elapsed * 1000, 1), "items": 0, "used": 0}
+            continue
+        report[name] = {"status": "ok", "ms": round(elapsed * 1000, 1), "items": len(items), "used": 0}
+        candidates.extend(dict(item, origin=name, rank=item["score"] * weights.get(name, 1.0)) for item in items)
+
+    # best first, skip duplicates, stop at the token budget
+    budget = cfg.get("TUTOR_CONTEXT_TOKEN_BUDGET", 1500)
+    chunks, seen, used_tokens = [], set(), 0
+    for item in sorted(candidates, key=lambda c: c["rank"], reverse=True):
+        key = item["text"].strip().lower()[:200]
+        cost = _estimate_tokens(item["text"])
+        if key in seen or used_tokens + cost > budget:
+            continue
+        seen.add(key)
+        used_tokens += cost
+        chunks.append(item)
+        report[item["origin"]]["used"] += 1
+
+    context = "\n\n".join(f"[{c['source']}]\n{c['text']}" for c in chunks)
+    return {"context": context, "chunks": chunks, "sources": report, "context_used": bool(chunks)}
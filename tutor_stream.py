@@ -0,0 +1,169 @@
+"""
+AI tutor replies, streamed over Server-Sent Events or as one JSON response
+Gemini chunks are forwarded as `token` events while they arrive; a final
+`done` event carries the ai_response_model fields (reply, sources,
+context_used, context_sources) and the full reply is saved to the chat
+session afterwards. Both routes go through the semantic cache, scoped by
+classroom_id and the RAG namespace the context drew from.
+"""
+import threading
+import time
+import google.generativeai as genai
+from flask import Blueprint, current_app, request, abort, jsonify
+from flask_login import current_user, login_required
+from .db import get_db
+from .sse import sse_event, sse_response
+from .tutor_cache import cache_key, cached_reply, lookup_key, remember
+
+tutor_stream_bp = Blueprint("tutor_stream", __name__)
+
+_configured = None
+_configure_lock = threading.Lock()
+
+
+def _model():
+    global _configured
+    cfg = current_app.config
+    key = (cfg.get("GEMINI_API_KEY") or cfg.get("GOOGLE_AI_API_KEY"), cfg.get("GEMINI_API_ENDPOINT"))
+    if _configured != key:
+        with _configure_lock:
+            if _configured != key:
+                options = {}
+                if key[1]:
+                    # e.g. a local fake server for benchmarks
+                    options = {"transport": "rest", "client_options": {"api_endpoint": key[1]}}
+                genai.configure(api_key=key[0], **options)
+                _configured = key
+    return genai.GenerativeModel(cfg["GEMINI_MODEL"])
+
+
+def stream_reply(prompt, sources=(), context_used=False, on_complete=None, context_sources=None, key=None):
+    """SSE generator: token events, then done (or error)
+
+    With a tutor_cache key a cached reply is sent as a single token event,
+    and a freshly streamed one is stored under the key once complete.
+    """
+    cached = lookup_key(key)
+    if cached is not None:
+        yield sse_event("token", {"text": cached["reply"]})
+        if on_complete is not None:
+            on_complete(cached["reply"])
+        done = dict(cached, context_sources=context_sources) if context_sources is not None else cached
+        yield sse_event("done", done)
+        return
+    parts = []
+    started = time.perf_counter()
+    try:
+        for chunk in _model().generate_content(prompt, stream=True):
+            try:
+                text = chunk.text
+            except ValueError:  # chunk without text parts (e.g. safety metadata)
+                continue
+            if text:
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+    except Exception as e:
+        current_app.logger.error(f"Tutor stream failed: {e}")
+        yield sse_event("error", {"error": "The AI tutor is unavailable right now, please try again."})
+        return
+    reply = "".join(parts)
+    done = {"reply": reply, "sources": list(sources), "context_used": bool(context_used)}
+    remember(key, done, time.perf_counter() - started)
+    if on_complete is not None:
+        on_complete(reply)
+    if context_sources is not None:
+        done = dict(done, context_sources=context_sources)
+    yield sse_event("done", dict(done, cached=False))
+
+
+def save_chat_turn(user_id, session_id, message, reply):
+    db = get_db(readonly=False)
+    db.execute("INSERT INTO tutor_messages(user_id, session_id, role, content) VALUES(?,?,?,?)",
+               (user_id, session_id, "user", message))
+    db.execute("INSERT INTO tutor_messages(user_id, session_id, role, content) VALUES(?,?,?,?)",
+               (user_id, session_id, "assistant", reply))
+    db.commit()
+
+
+def build_prompt(message, context_chunks):
+    if not context_chunks:
+        return message
+    context = "\n\n".join(c["text"] if isinstance(c, dict) else str(c) for c in context_chunks)
+    return f"Use the following course material when it is relevant.\n\n{context}\n\nStudent question: {message}"
+
+
+def _classroom_scope(classroom_id):
+    """The cache scope for a request: the classroom if the user may use it, 403 otherwise"""
+    if classroom_id in (None, ""):
+        return None
+    try:
+        classroom_id = int(classroom_id)
+    except (TypeError, ValueError):
+        abort(400)
+    if current_user.role == "admin":
+        return classroom_id
+    db = get_db(readonly=True)
+    if current_user.role == "teacher":
+        row = db.execute("SELECT 1 FROM classrooms WHERE id=? AND created_by=?",
+                         (classroom_id, current_user.id)).fetchone()
+    else:
+        row = db.execute("SELECT 1 FROM classroom_members WHERE classroom_id=? AND user_id=?",
+                         (classroom_id, current_user.id)).fetchone()
+    if row is None:
+        abort(403)
+    return classroom_id
+
+
+def _chat_request():
+    """(message, session_id, classroom_id, chunks, context_sources, namespaces) from the JSON payload"""
+    payload = request.get_json(silent=True) or {}
+    message = (payload.get("message") or "").strip()
+    if not message:
+        abort(400)
+    session_id = payload.get("session_id") or "default"
+    classroom_id = _classroom_scope(payload.get("classroom_id"))
+    chunks, context_sources, namespaces = [], None, ()
+    if payload.get("context"):
+        from .tutor_context import assemble_context
+        namespace = payload.get("namespace", "default")
+        assembled = assemble_context(message, current_user.id, namespace)
+        chunks, context_sources = assembled["chunks"], assembled["sources"]
+        if any(c["source"].startswith("rag:") for c in chunks):
+            namespaces = (namespace,)
+    return message, session_id, classroom_id, chunks, context_sources, namespaces
+
+
+@tutor_stream_bp.route("/api/v1/tutor/chat", methods=["POST"])
+@login_required
+def chat():
+    message, session_id, classroom_id, chunks, context_sources, namespaces = _chat_request()
+    sources = sorted({c["source"] for c in chunks})
+
+    def generate():
+        try:
+            reply = _model().generate_content(build_prompt(message, chunks)).text
+        except Exception as e:
+            current_app.logger.error(f"Tutor reply failed: {e}")
+            abort(503)
+        return {"reply": reply, "sources": sources, "context_used": bool(chunks)}
+
+    result = cached_reply(message, chunks, generate, classroom_id, namespaces)
+    save_chat_turn(current_user.id, session_id, message, result["reply"])
+    if context_sources is not None:
+        result = dict(result, context_sources=context_sources)
+    return jsonify(result)
+
+
+@tutor_stream_bp.route("/api/v1/tutor/chat/stream", methods=["POST"])
+@login_required
+def chat_stream():
+    message, session_id, classroom_id, chunks, context_sources, namespaces = _chat_request()
+    user_id = current_user.id
+    sources = sorted({c["source"] for c in chunks})
+    key = cache_key(message, chunks, classroom_id, namespaces)
+
+    def on_complete(reply):
+        save_chat_turn(user_id, session_id, message, reply)
+
+    return sse_response(stream_reply(build_prompt(message, chunks), sources, bool(chunks), on_complete,
+                                     context_sources, key))
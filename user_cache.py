@@ -0,0 +1,145 @@
+"""
+Cache for Flask-Login's user_loader
+In-process LRU with TTL (per worker), or Redis when USER_CACHE_BACKEND=redis
+so invalidations are seen by every worker.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+class LocalUserCache:
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # user_id -> (expires_at, fields)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, user_id):
+        key = str(user_id)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, user_id, fields):
+        key = str(user_id)
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, fields)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._data.pop(str(user_id), None) is not None:
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(self._stats, backend="local", size=len(self._data), maxsize=self.maxsize,
+                        hit_rate=self._stats["hits"] / lookups if lookups else 0.0)
+
+
+class RedisUserCache:
+    """Shared cache; counters are per worker, entries are shared"""
+
+    def __init__(self, client, ttl=300, prefix="user_cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "errors": 0, "invalidations": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, user_id):
+        try:
+            raw = self.client.get(self.prefix + str(user_id))
+        except Exception:
+            self._count("errors")
+            return None
+        if raw is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return json.loads(raw)
+
+    def put(self, user_id, fields):
+        try:
+            self.client.set(self.prefix + str(user_id), json.dumps(fields), ex=self.ttl)
+        except Exception:
+            self._count("errors")
+
+    def invalidate(self, user_id):
+        try:
+            self.client.delete(self.prefix + str(user_id))
+            self._count("invalidations")
+        except Exception:
+            self._count("errors")
+
+    def clear(self):
+        try:
+            for key in self.client.scan_iter(self.prefix + "*"):
+                self.client.delete(key)
+        except Exception:
+            self._count("errors")
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(self._stats, backend="redis",
+                        hit_rate=self._stats["hits"] / lookups if lookups else 0.0)
+
+
+def get_user_cache():
+    """Get the process-wide user cache, created from Config on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cfg = current_app.config
+                ttl = cfg.get("USER_CACHE_TTL", 300)
+                cache = None
+                if cfg.get("USER_CACHE_BACKEND") == "redis":
+                    try:
+                        import redis
+                        client = redis.Redis.from_url(cfg["REDIS_URL"], socket_timeout=0.5)
+                        client.ping()
+                        cache = RedisUserCache(client, ttl=ttl)
+                    except Exception as e:
+                        current_app.logger.warning(f"Redis user cache unavailable, using local cache: {e}")
+                _cache = cache or LocalUserCache(maxsize=cfg.get("USER_CACHE_SIZE", 1024), ttl=ttl)
+    return _cache
+
+
+def invalidate_user(user_id):
+    """Drop a cached user - call after changing role, name, email or password"""
+    get_user_cache().invalidate(user_id)
+
+
+def user_cache_stats():
+    return _cache.stats() if _cache is not None else None
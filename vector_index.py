@@ -0,0 +1,393 @@
+"""
+Persistent FAISS index per RAG namespace
+
+Layout in RAG_INDEX_DIR for namespace "ns":
+  ns.f32       append-only raw float32 vectors (row number == chunk id)
+  ns.chunks.db chunk text/metadata (SQLite)
+  ns.faiss     search index, replaced atomically on write
+
+The index type follows corpus size: exact flat for small namespaces, HNSW
+up to RAG_IVF_MIN chunks, IVF beyond that. Readers memory-map the index so
+gunicorn workers share pages; new chunks are added to the existing index,
+only a change of index type (or a 4x growth of an IVF index) rebuilds it
+from the stored vectors.
+"""
+import math
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import faiss
+import numpy as np
+from flask import current_app
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes, single process
+    fcntl = None
+
+HNSW_M = 32
+BUILD_BATCH = 65536
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _normalize(vectors):
+    # always a private copy: normalize_L2 works in place and inputs may be read-only memmaps
+    vectors = np.array(vectors, dtype="float32", order="C", copy=True)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+class NamespaceIndex:
+    def __init__(self, index_dir, namespace, flat_max=20000, ivf_min=200000,
+                 nprobe=16, ef_search=64):
+        if not re.fullmatch(r"[A-Za-z0-9_-]{1,64}", namespace):
+            raise ValueError(f"invalid namespace: {namespace!r}")
+        os.makedirs(index_dir, exist_ok=True)
+        base = os.path.join(index_dir, namespace)
+        self.namespace = namespace
+        self.vectors_path = base + ".f32"
+        self.meta_path = base + ".chunks.db"
+        self.index_path = base + ".faiss"
+        self.lock_path = base + ".lock"
+        self.flat_max = flat_max
+        self.ivf_min = ivf_min
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self._reader = None
+        self._reader_mtime = None
+        self._reader_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        with self._meta() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS chunks (id INTEGER PRIMARY KEY, doc_id TEXT, chunk_no INTEGER, text TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_doc ON chunks(doc_id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("""CREATE TABLE IF NOT EXISTS documents (doc_id TEXT PRIMARY KEY, content_hash TEXT,
+                            chunks INTEGER, indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                            source TEXT NOT NULL DEFAULT 'upload')""")
+            if "source" not in [r[1] for r in conn.execute("PRAGMA table_info(documents)")]:
+                # older namespaces: origin unknown, treat as uploads so a reindex never drops them
+                conn.execute("ALTER TABLE documents ADD COLUMN source TEXT NOT NULL DEFAULT 'upload'")
+
+    # -- storage -------------------------------------------------------
+
+    @contextmanager
+    def _meta(self):
+        conn = sqlite3.connect(self.meta_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _info(self, key, default=None):
+        with self._meta() as conn:
+            row = conn.execute("SELECT value FROM info WHERE key=?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_info(self, conn, **values):
+        conn.executemany("INSERT OR REPLACE INTO info(key, value) VALUES(?,?)",
+                         [(k, str(v)) for k, v in values.items()])
+
+    def documents(self, source=None):
+        """doc_id -> content hash of every document in the namespace
+
+        source is "upload" (/rag/ingest) or "dir" (RAG_SOURCE_DIR, /rag/reindex).
+        """
+        with self._meta() as conn:
+            if source is None:
+                return dict(conn.execute("SELECT doc_id, content_hash FROM documents").fetchall())
+            return dict(conn.execute("SELECT doc_id, content_hash FROM documents WHERE source=?", (source,)).fetchall())
+
+    def generation(self):
+        """Changes whenever the search index file is rewritten"""
+        try:
+            return os.stat(self.index_path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    @property
+    def dim(self):
+        value = self._info("dim")
+        return int(value) if value else None
+
+    def count(self):
+        dim = self.dim
+        if not dim or not os.path.exists(self.vectors_path):
+            return 0
+        return os.path.getsize(self.vectors_path) // (4 * dim)
+
+    def vectors(self):
+        """Memory-mapped (n, dim) view of every stored vector"""
+        n = self.count()
+        if n == 0:
+            return np.zeros((0, self.dim or 0), dtype="float32")
+        return np.memmap(self.vectors_path, dtype="float32", mode="r", shape=(n, self.dim))
+
+    @contextmanager
+    def _exclusive(self):
+        # one writer per namespace across threads and processes
+        with self._write_lock, open(self.lock_path, "a+") as fh:
+            if fcntl:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    # -- index type ----------------------------------------------------
+
+    def choose_kind(self, n):
+        if n <= self.flat_max:
+            return "flat"
+        if n < self.ivf_min:
+            return "hnsw"
+        return "ivf"
+
+    def _build(self, kind, vectors):
+        n, dim = vectors.shape
+        if kind == "flat":
+            index = faiss.IndexIDMap(faiss.IndexFlatIP(dim))
+        elif kind == "hnsw":
+            hnsw = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            hnsw.hnsw.efConstruction = 80
+            index = faiss.IndexIDMap(hnsw)
+        else:
+            nlist = max(16, min(65536, int(4 * math.sqrt(n))))
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            sample = min(n, nlist * 64)
+            rows = np.sort(np.random.default_rng(0).choice(n, size=sample, replace=False))
+            index.train(np.ascontiguousarray(vectors[rows]))
+        for start in range(0, n, BUILD_BATCH):
+            chunk = np.ascontiguousarray(vectors[start:start + BUILD_BATCH])
+            index.add_with_ids(chunk, np.arange(start, start + len(chunk), dtype="int64"))
+        return index
+
+    def _write(self, index):
+        tmp = self.index_path + f".tmp{os.getpid()}"
+        faiss.write_index(index, tmp)
+        os.replace(tmp, self.index_path)  # readers keep their old mapping until they reload
+
+    # -- writes --------------------------------------------------------
+
+    @contextmanager
+    def writer(self, flush_every=0):
+        """Hold the namespace write lock and the loaded index across many add() calls
+
+        Vectors and chunks hit disk on every add; the search index is written
+        every flush_every batches (0 = only at the end) and when the block exits.
+        """
+        with self._exclusive():
+            writer = IndexWriter(self, flush_every)
+            try:
+                yield writer
+            finally:
+                writer.flush()
+
+    def add(self, vectors, chunks):
+        """Append vectors with their chunks [(doc_id, chunk_no, text), ...], returns the new ids"""
+        with self.writer() as writer:
+            return writer.add(vectors, chunks)
+
+    def rebuild(self):
+        """Rebuild the search index from the stored vectors"""
+        with self._exclusive():
+            total = self.count()
+            if total == 0:
+                return
+            kind = self.choose_kind(total)
+            self._write(self._build(kind, self.vectors()))
+            with self._meta() as conn:
+                self._set_info(conn, kind=kind, trained_at=total)
+
+    # -- reads ---------------------------------------------------------
+
+    def _load_reader(self):
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._reader_lock:
+            if self._reader is None or self._reader_mtime != mtime:
+                # IO_FLAG_MMAP only maps IVF inverted lists, flat and HNSW storage
+                # needs MMAP_IFC or every worker reads its own copy
+                mmap = faiss.IO_FLAG_MMAP if self._info("kind") == "ivf" else faiss.IO_FLAG_MMAP_IFC
+                flags = mmap | getattr(faiss, "IO_FLAG_READ_ONLY", 0)
+                try:
+                    index = faiss.read_index(self.index_path, flags)
+                except RuntimeError:
+                    # index types without mmap support are read into memory
+                    index = faiss.read_index(self.index_path)
+                params = faiss.ParameterSpace()
+                for name, value in (("nprobe", self.nprobe), ("efSearch", self.ef_search)):
+                    try:
+                        params.set_index_parameter(index, name, value)
+                    except RuntimeError:
+                        pass
+                self._reader, self._reader_mtime = index, mtime
+            return self._reader
+
+    def search_vectors(self, queries, k=5):
+        """Returns (scores, ids) arrays of shape (len(queries), k), ids are -1 when missing"""
+        queries = _normalize(queries)
+        index = self._load_reader()
+        if index is None or index.ntotal == 0:
+            return (np.zeros((len(queries), 0), dtype="float32"), np.zeros((len(queries), 0), dtype="int64"))
+        return index.search(queries, k)
+
+    def chunks(self, ids):
+        ids = [int(i) for i in ids if i >= 0]
+        if not ids:
+            return {}
+        with self._meta() as conn:
+            rows = conn.execute(f"SELECT id, doc_id, chunk_no, text FROM chunks WHERE id IN ({','.join('?' * len(ids))})",
+                                ids).fetchall()
+        return {r[0]: {"id": r[0], "doc_id": r[1], "chunk_no": r[2], "text": r[3]} for r in rows}
+
+    def search(self, query_vector, k=5):
+        scores, ids = self.search_vectors(query_vector, k)
+        if not ids.size:
+            return []
+        found = self.chunks(ids[0])
+        return [dict(found[int(i)], score=float(s)) for s, i in zip(scores[0], ids[0]) if int(i) in found]
+
+
+class IndexWriter:
+    def __init__(self, ns, flush_every=0):
+        self.ns = ns
+        self.flush_every = flush_every
+        self._index = None
+        self._kind = ns._info("kind")
+        self._trained_at = int(ns._info("trained_at", 0))
+        self._pending = 0
+
+    def add(self, vectors, chunks):
+        ns = self.ns
+        vectors = _normalize(vectors)
+        if len(vectors) != len(chunks):
+            raise ValueError("vectors and chunks must have the same length")
+        if not len(vectors):
+            return []
+        dim = ns.dim
+        if dim is None:
+            with ns._meta() as conn:
+                ns._set_info(conn, dim=vectors.shape[1])
+        elif vectors.shape[1] != dim:
+            raise ValueError(f"namespace {ns.namespace} stores {dim}-d vectors, got {vectors.shape[1]}")
+
+        start = ns.count()
+        ids = list(range(start, start + len(vectors)))
+        with open(ns.vectors_path, "ab") as fh:
+            fh.write(vectors.tobytes())
+        with ns._meta() as conn:
+            conn.executemany("INSERT OR REPLACE INTO chunks(id, doc_id, chunk_no, text) VALUES(?,?,?,?)",
+                             [(i, *chunk) for i, chunk in zip(ids, chunks)])
+        self._update_index(start, vectors)
+        self._pending += 1
+        if self.flush_every and self._pending >= self.flush_every:
+            self.flush()
+        return ids
+
+    def _update_index(self, start, new_vectors):
+        ns = self.ns
+        total = start + len(new_vectors)
+        kind = ns.choose_kind(total)
+        if self._index is None and os.path.exists(ns.index_path):
+            self._index = faiss.read_index(ns.index_path)
+        rebuild = (self._index is None
+                   or self._index.ntotal != start  # index fell behind the vector file (crash between writes)
+                   or self._kind != kind
+                   or (kind == "ivf" and total > 4 * self._trained_at))
+        if rebuild:
+            self._index = ns._build(kind, ns.vectors())
+            self._kind, self._trained_at = kind, total
+            with ns._meta() as conn:
+                ns._set_info(conn, kind=kind, trained_at=total)
+        else:
+            self._index.add_with_ids(new_vectors, np.arange(start, total, dtype="int64"))
+
+    def record_document(self, doc_id, content_hash, chunks, source="upload"):
+        with self.ns._meta() as conn:
+            conn.execute("INSERT OR REPLACE INTO documents(doc_id, content_hash, chunks, source) VALUES(?,?,?,?)",
+                         (doc_id, content_hash, chunks, source))
+
+    def tag_documents(self, doc_ids, source):
+        with self.ns._meta() as conn:
+            conn.executemany("UPDATE documents SET source=? WHERE doc_id=?", [(source, d) for d in doc_ids])
+
+    def drop_documents(self, doc_ids):
+        """Remove documents' chunks and vectors, compacting ids; returns chunks removed
+
+        The search index is rebuilt and swapped in together with the renumbered
+        chunks, so readers never map hits through ids from the other layout.
+        """
+        ns, drop = self.ns, set(doc_ids)
+        if not drop:
+            return 0
+        index, kind = None, None
+        with ns._meta() as conn:
+            rows = conn.execute("SELECT id, doc_id FROM chunks ORDER BY id").fetchall()
+            keep = [i for i, doc_id in rows if doc_id not in drop]
+            removed = len(rows) - len(keep)
+            conn.executemany("DELETE FROM documents WHERE doc_id=?", [(d,) for d in drop])
+            if removed:
+                old = ns.vectors()
+                tmp = ns.vectors_path + f".tmp{os.getpid()}"
+                with open(tmp, "wb") as fh:
+                    for start in range(0, len(keep), BUILD_BATCH):
+                        fh.write(np.ascontiguousarray(old[keep[start:start + BUILD_BATCH]]).tobytes())
+                del old
+                if keep:
+                    kind = ns.choose_kind(len(keep))
+                    index = ns._build(kind, np.memmap(tmp, dtype="float32", mode="r", shape=(len(keep), ns.dim)))
+                conn.executemany("DELETE FROM chunks WHERE doc_id=?", [(d,) for d in drop])
+                # ascending order: every target id is already free
+                conn.executemany("UPDATE chunks SET id=? WHERE id=?",
+                                 [(new, old_id) for new, old_id in enumerate(keep) if new != old_id])
+                ns._set_info(conn, kind=kind or "", trained_at=len(keep))
+                os.replace(tmp, ns.vectors_path)
+                if index is not None:
+                    ns._write(index)
+                elif os.path.exists(ns.index_path):
+                    os.remove(ns.index_path)
+        if removed:
+            self._index, self._kind, self._trained_at = index, kind, len(keep)
+        return removed
+
+    def flush(self):
+        if self._pending and self._index is not None:
+            self.ns._write(self._index)
+        self._pending = 0
+
+
+def get_namespace_index(namespace="default"):
+    """Per-process NamespaceIndex for the configured RAG_INDEX_DIR"""
+    cfg = current_app.config
+    key = (cfg.get("RAG_INDEX_DIR", "instance/rag"), namespace)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = _indexes[key] = NamespaceIndex(
+                    key[0], namespace,
+                    flat_max=cfg.get("RAG_FLAT_MAX", 20000),
+                    ivf_min=cfg.get("RAG_IVF_MIN", 200000),
+                    nprobe=cfg.get("RAG_IVF_NPROBE", 16),
+                    ef_search=cfg.get("RAG_HNSW_EF_SEARCH", 64),
+                )
+    return index
+
+
+def search(q, namespace="default", limit=5):
+    """Semantic search used by /rag/search and the tutor's RAG context"""
+    from .embeddings import embed
+    return get_namespace_index(namespace).search(embed([q]), k=limit)